@@ -20,6 +20,7 @@
 #
 #############################################################################
 
+from . import controllers
 from . import models
 from . import report
 from . import wizard
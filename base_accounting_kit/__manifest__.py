@@ -55,6 +55,11 @@
         'data/followup_levels.xml',
         'data/account_asset_data.xml',
         'data/recurring_entry_cron.xml',
+        'data/account_dashboard_data.xml',
+        'data/account_balance_snapshot_data.xml',
+        'data/account_report_batch_data.xml',
+        'data/account_report_job_data.xml',
+        'data/account_aged_snapshot_data.xml',
         'views/assets.xml',
         'views/dashboard_views.xml',
         'views/reports_config_view.xml',
@@ -64,6 +69,9 @@
         'views/account_payment_view.xml',
         'views/res_config_view.xml',
         'views/recurring_payments_view.xml',
+        'views/account_report_batch_views.xml',
+        'views/account_report_job_views.xml',
+        'views/account_aged_snapshot_views.xml',
         'views/account_followup.xml',
         'views/followup_report.xml',
         'wizard/asset_depreciation_confirmation_wizard_views.xml',
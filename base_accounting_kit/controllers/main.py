@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+#############################################################################
+#
+#    Cybrosys Technologies Pvt. Ltd.
+#
+#    Copyright (C) 2019-TODAY Cybrosys Technologies(<https://www.cybrosys.com>)
+#    Author: Cybrosys Techno Solutions(<https://www.cybrosys.com>)
+#
+#    You can modify it under the terms of the GNU LESSER
+#    GENERAL PUBLIC LICENSE (LGPL v3), Version 3.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU LESSER GENERAL PUBLIC LICENSE (LGPL v3) for more details.
+#
+#    You should have received a copy of the GNU LESSER GENERAL PUBLIC LICENSE
+#    (LGPL v3) along with this program.
+#    If not, see <http://www.gnu.org/licenses/>.
+#
+#############################################################################
+
+import json
+
+import odoo
+from odoo import api, fields, http
+from odoo.http import request
+from werkzeug.wrappers import Response
+
+from ..models.account_dashboard import get_period_bounds
+
+
+class DashboardExport(http.Controller):
+
+    @http.route('/base_accounting_kit/dashboard/export/<string:series>',
+                type='http', auth='user')
+    def export_dashboard_series(self, series, file_format='csv',
+                                company_ids='', date_from=None, date_to=None,
+                                **kwargs):
+        """ Stream a series behind the dashboard charts as a chunked CSV or
+        XLSX download, e.g. ``?file_format=xlsx&company_ids=1,2
+        &date_from=2018-01-01&date_to=2021-01-01``."""
+        dashboard = request.env['account.move']
+        company_ids = dashboard._check_dashboard_export(
+            series, file_format,
+            [int(company_id) for company_id in company_ids.split(',')
+             if company_id.strip()])
+        default_from, default_to = get_period_bounds('this_year')
+        date_from = fields.Date.to_date(date_from) or default_from
+        date_to = fields.Date.to_date(date_to) or default_to
+        # the request cursor is closed once this method returns, before the
+        # response body is sent: the rows are read in a cursor of their own
+        dbname, uid, context = request.db, request.uid, dict(request.context)
+
+        def stream():
+            with api.Environment.manage(), \
+                    odoo.registry(dbname).cursor() as cr:
+                env = api.Environment(cr, uid, context)
+                for chunk in env['account.move']._dashboard_export_stream(
+                        series, file_format, company_ids, date_from, date_to):
+                    yield chunk
+
+        if file_format == 'xlsx':
+            mimetype = ('application/vnd.openxmlformats-officedocument.'
+                        'spreadsheetml.sheet')
+        else:
+            mimetype = 'text/csv; charset=utf-8'
+        filename = '%s_%s_%s.%s' % (series, date_from, date_to, file_format)
+        return Response(stream(), mimetype=mimetype, direct_passthrough=True,
+                        headers=[('Content-Disposition',
+                                  http.content_disposition(filename))])
+
+
+class LedgerExport(http.Controller):
+
+    @http.route('/base_accounting_kit/ledger/export/<string:model>/<int:wizard_id>',
+                type='http', auth='user')
+    def export_ledger(self, model, wizard_id, file_format='xlsx', **kwargs):
+        """ Stream the ledger prepared by a ledger report wizard (general
+        ledger, bank book or cash book) as a chunked CSV or XLSX
+        download."""
+        if model not in request.env or not getattr(
+                request.env[model], '_ledger_report', None):
+            raise request.not_found()
+        wizard = request.env[model].browse(wizard_id)
+        wizard.check_access_rule('read')
+        if file_format not in ('csv', 'xlsx') or not wizard.export_data:
+            raise request.not_found()
+        data = json.loads(wizard.export_data)
+        report_name = wizard._ledger_report
+        dbname, uid, context = request.db, request.uid, dict(request.context)
+
+        def stream():
+            with api.Environment.manage(), \
+                    odoo.registry(dbname).cursor() as cr:
+                env = api.Environment(cr, uid, context)
+                for chunk in env[report_name]._export_ledger(data,
+                                                             file_format):
+                    yield chunk
+
+        if file_format == 'xlsx':
+            mimetype = ('application/vnd.openxmlformats-officedocument.'
+                        'spreadsheetml.sheet')
+        else:
+            mimetype = 'text/csv; charset=utf-8'
+        filename = '%s.%s' % (report_name.split('.')[-1].replace('report_', ''),
+                              file_format)
+        return Response(stream(), mimetype=mimetype, direct_passthrough=True,
+                        headers=[('Content-Disposition',
+                                  http.content_disposition(filename))])
@@ -33,3 +33,11 @@ from . import recurring_payments
 from . import res_config_settings
 from . import res_partner
 from . import account_dashboard
+from . import account_dashboard_aggregate
+from . import account_dashboard_bundle
+from . import account_balance_snapshot
+from . import account_report_batch
+from . import account_report_job
+from . import account_report_cache
+from . import account_aged_snapshot
+from . import account_currency_converter
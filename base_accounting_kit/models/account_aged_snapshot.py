@@ -0,0 +1,274 @@
+# -*- coding: utf-8 -*-
+#############################################################################
+#
+#    Cybrosys Technologies Pvt. Ltd.
+#
+#    Copyright (C) 2019-TODAY Cybrosys Technologies(<https://www.cybrosys.com>)
+#    Author: Cybrosys Techno Solutions(<https://www.cybrosys.com>)
+#
+#    You can modify it under the terms of the GNU LESSER
+#    GENERAL PUBLIC LICENSE (LGPL v3), Version 3.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU LESSER GENERAL PUBLIC LICENSE (LGPL v3) for more details.
+#
+#    You should have received a copy of the GNU LESSER GENERAL PUBLIC LICENSE
+#    (LGPL v3) along with this program.
+#    If not, see <http://www.gnu.org/licenses/>.
+#
+#############################################################################
+
+import logging
+
+from dateutil.relativedelta import relativedelta
+
+from odoo import SUPERUSER_ID, api, fields, models, tools
+
+_logger = logging.getLogger(__name__)
+
+DEFAULT_PERIOD_LENGTH = 30
+
+ACCOUNT_TYPES = {
+    'customer': ['receivable'],
+    'supplier': ['payable'],
+    'customer_supplier': ['payable', 'receivable'],
+}
+
+
+class AccountAgedSnapshot(models.Model):
+    """ Aged partner balance of a company at a month end, per partner and
+    account type, in the currency of the company and for the posted
+    entries. The aged balances of past month ends are read from it
+    instead of being recomputed, and their evolution is shown by the
+    aged balance trend views.
+
+    Posting or resetting an entry, or reconciling items, dated on or
+    before a snapshot makes it stale: ``res.company.aged_snapshot_date``
+    moves back to that date, the stale snapshots are not read anymore and
+    the cron rebuilds them."""
+    _name = 'account.aged.snapshot'
+    _description = 'Aged Partner Balance Snapshot'
+    _order = 'date desc, company_id, partner_id'
+
+    company_id = fields.Many2one('res.company', string='Company',
+                                 required=True, readonly=True)
+    date = fields.Date(string='Date', required=True, readonly=True)
+    account_type = fields.Selection([('receivable', 'Receivable'),
+                                     ('payable', 'Payable')],
+                                    string='Account Type', required=True,
+                                    readonly=True)
+    period_length = fields.Integer(string='Period Length (days)',
+                                   required=True, readonly=True)
+    partner_id = fields.Many2one('res.partner', string='Partner',
+                                 readonly=True)
+    direction = fields.Float(string='Not Due', readonly=True)
+    period_4 = fields.Float(string='1st Period Overdue', readonly=True)
+    period_3 = fields.Float(string='2nd Period Overdue', readonly=True)
+    period_2 = fields.Float(string='3rd Period Overdue', readonly=True)
+    period_1 = fields.Float(string='4th Period Overdue', readonly=True)
+    period_0 = fields.Float(string='Older', readonly=True)
+    total = fields.Float(string='Total', readonly=True)
+    line_count = fields.Integer(string='Open Items', readonly=True)
+
+    def init(self):
+        tools.create_index(self._cr, 'account_aged_snapshot_lookup_index',
+                           self._table, ['company_id', 'date',
+                                         'period_length', 'account_type'])
+
+    @api.model
+    def _get_period_length(self):
+        return int(self.env['ir.config_parameter'].sudo().get_param(
+            'base_accounting_kit.aged_snapshot_period_length',
+            DEFAULT_PERIOD_LENGTH))
+
+    @api.model
+    def _build(self, company, date, period_length=None):
+        """ Compute and store the aged balances of ``company`` at
+        ``date``, replacing the stored ones."""
+        period_length = period_length or self._get_period_length()
+        report = self.env[
+            'report.base_accounting_kit.report_agedpartnerbalance'
+        ].with_context(allowed_company_ids=[company.id],
+                       company_ids=[company.id],
+                       include_nullified_amount=True)
+        self.search([('company_id', '=', company.id), ('date', '=', date),
+                     ('period_length', '=', period_length)]).unlink()
+        values = []
+        for account_type in ('receivable', 'payable'):
+            res, __, lines = report._get_partner_move_lines(
+                [account_type], fields.Date.to_string(date), 'posted',
+                period_length)
+            values += [{
+                'company_id': company.id,
+                'date': date,
+                'account_type': account_type,
+                'period_length': period_length,
+                'partner_id': partner['partner_id'],
+                'direction': partner['direction'],
+                'period_4': partner['4'],
+                'period_3': partner['3'],
+                'period_2': partner['2'],
+                'period_1': partner['1'],
+                'period_0': partner['0'],
+                'total': partner['total'],
+                'line_count': lines.get(partner['partner_id'], 0),
+            } for partner in res]
+        self.create(values)
+
+    @api.model
+    def _refresh(self, company, months=1):
+        """ Store the aged balances of ``company`` at the last ``months``
+        month ends that have none yet, and rebuild its stale snapshots."""
+        period_length = self._get_period_length()
+        todo = set()
+        for index in range(months):
+            date = fields.Date.today() + relativedelta(months=-index, day=1,
+                                                       days=-1)
+            if not self.search_count([('company_id', '=', company.id),
+                                      ('date', '=', date),
+                                      ('period_length', '=', period_length)]):
+                todo.add((date, period_length))
+        stale_date = company.aged_snapshot_date
+        if stale_date:
+            self.flush()
+            self._cr.execute('''
+                SELECT DISTINCT date, period_length FROM account_aged_snapshot
+                WHERE company_id = %s AND date >= %s
+            ''', [company.id, stale_date])
+            todo.update(self._cr.fetchall())
+        for date, length in sorted(todo):
+            self._build(company, date, length)
+        if stale_date:
+            self._cr.execute('''
+                UPDATE res_company SET aged_snapshot_date = NULL
+                WHERE id = %s AND aged_snapshot_date = %s
+            ''', [company.id, stale_date])
+            company.invalidate_cache(['aged_snapshot_date'])
+
+    @api.model
+    def _cron_snapshot(self, months=1):
+        """ Refresh the snapshots of every company, each company in its own
+        cursor."""
+        for company in self.env['res.company'].search([]):
+            try:
+                with self.pool.cursor() as cr:
+                    env = api.Environment(cr, SUPERUSER_ID, {
+                        'allowed_company_ids': [company.id],
+                    })
+                    env[self._name]._refresh(
+                        env['res.company'].browse(company.id), months)
+            except Exception:
+                _logger.exception("Failed to store the aged balance "
+                                  "snapshot of company %s", company.id)
+
+    @api.model
+    def _invalidate(self, company_dates):
+        """ Mark the snapshots of each company of ``company_dates``
+        ({company_id: date}) dated on or after its date as stale."""
+        self.flush()
+        for company_id, date in company_dates.items():
+            self._cr.execute('''
+                UPDATE res_company SET aged_snapshot_date = %s
+                WHERE id = %s
+                  AND (aged_snapshot_date IS NULL OR aged_snapshot_date > %s)
+                  AND EXISTS (SELECT 1 FROM account_aged_snapshot
+                              WHERE company_id = %s AND date >= %s)
+            ''', [date, company_id, date, company_id, date])
+            if self._cr.rowcount:
+                self.env['res.company'].browse(company_id).invalidate_cache(
+                    ['aged_snapshot_date'])
+
+    @api.model
+    def _invalidate_records(self, records, date_field):
+        """ Invalidate the snapshots covering ``records`` (journal entries
+        or partial reconciliations), dated by ``date_field``."""
+        company_dates = {}
+        for record in records:
+            date = record[date_field]
+            if not date or not record.company_id:
+                continue
+            company_id = record.company_id.id
+            company_dates[company_id] = min(
+                date, company_dates.get(company_id, date))
+        if company_dates:
+            self._invalidate(company_dates)
+
+    @api.model
+    def _get_aged_balances(self, company_ids, date, result_selection,
+                           period_length):
+        """ Return the partner lines and totals of the aged partner balance
+        report from the snapshots, or None when the snapshots cannot answer:
+        one of the companies has no snapshot at ``date`` for this period
+        length or a stale one, or its currency is not the one of the current
+        company."""
+        companies = self.env['res.company'].browse(company_ids)
+        if any(company.currency_id != self.env.company.currency_id
+               for company in companies):
+            return None
+        if any(company.aged_snapshot_date and
+               company.aged_snapshot_date <= fields.Date.to_date(date)
+               for company in companies):
+            return None
+        self.flush()
+        self._cr.execute('''
+            SELECT COUNT(DISTINCT company_id) FROM account_aged_snapshot
+            WHERE company_id IN %s AND date = %s AND period_length = %s
+        ''', [tuple(companies.ids), date, period_length])
+        if self._cr.fetchone()[0] != len(companies):
+            return None
+        self._cr.execute('''
+            SELECT s.partner_id, p.name, p.trust, SUM(s.direction),
+                   SUM(s.period_0), SUM(s.period_1), SUM(s.period_2),
+                   SUM(s.period_3), SUM(s.period_4), SUM(s.line_count)
+            FROM account_aged_snapshot s
+            LEFT JOIN res_partner p ON p.id = s.partner_id
+            WHERE s.company_id IN %s AND s.date = %s
+              AND s.period_length = %s AND s.account_type IN %s
+            GROUP BY s.partner_id, p.name, p.trust
+            ORDER BY UPPER(p.name)
+        ''', [tuple(companies.ids), date, period_length,
+              tuple(ACCOUNT_TYPES[result_selection])])
+        return self.env[
+            'report.base_accounting_kit.report_agedpartnerbalance'
+        ]._get_partner_values(self._cr.fetchall())
+
+
+class ResCompany(models.Model):
+    _inherit = 'res.company'
+
+    aged_snapshot_date = fields.Date(
+        string='Aged Snapshots Stale From', readonly=True,
+        help='The aged balance snapshots of the company dated on or after '
+             'this date are stale and waiting to be rebuilt.')
+
+
+class AccountMove(models.Model):
+    _inherit = 'account.move'
+
+    def post(self):
+        res = super(AccountMove, self).post()
+        self.env['account.aged.snapshot']._invalidate_records(self, 'date')
+        return res
+
+    def button_draft(self):
+        self.env['account.aged.snapshot']._invalidate_records(
+            self.filtered(lambda move: move.state == 'posted'), 'date')
+        return super(AccountMove, self).button_draft()
+
+
+class AccountPartialReconcile(models.Model):
+    _inherit = 'account.partial.reconcile'
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        partials = super(AccountPartialReconcile, self).create(vals_list)
+        self.env['account.aged.snapshot']._invalidate_records(partials,
+                                                              'max_date')
+        return partials
+
+    def unlink(self):
+        self.env['account.aged.snapshot']._invalidate_records(self,
+                                                              'max_date')
+        return super(AccountPartialReconcile, self).unlink()
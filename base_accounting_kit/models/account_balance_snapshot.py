@@ -0,0 +1,212 @@
+# -*- coding: utf-8 -*-
+#############################################################################
+#
+#    Cybrosys Technologies Pvt. Ltd.
+#
+#    Copyright (C) 2019-TODAY Cybrosys Technologies(<https://www.cybrosys.com>)
+#    Author: Cybrosys Techno Solutions(<https://www.cybrosys.com>)
+#
+#    You can modify it under the terms of the GNU LESSER
+#    GENERAL PUBLIC LICENSE (LGPL v3), Version 3.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU LESSER GENERAL PUBLIC LICENSE (LGPL v3) for more details.
+#
+#    You should have received a copy of the GNU LESSER GENERAL PUBLIC LICENSE
+#    (LGPL v3) along with this program.
+#    If not, see <http://www.gnu.org/licenses/>.
+#
+#############################################################################
+
+from dateutil.relativedelta import relativedelta
+
+from odoo import api, fields, models, tools
+
+# context keys of account.move.line._query_get() the snapshots cannot
+# answer: the reports filtering on them scan the move lines
+SNAPSHOT_UNSUPPORTED_FILTERS = ('analytic_account_ids', 'analytic_tag_ids',
+                                'account_tag_ids', 'partner_ids',
+                                'reconcile_date')
+
+
+class AccountBalanceSnapshot(models.Model):
+    """ Cumulative posted debit/credit per account and journal at month
+    boundaries: a row dated D holds the totals of the posted lines dated
+    before D. Rows are only stored for the months in which the account and
+    journal had lines, the balance at a boundary being the one of the
+    latest row dated on or before it.
+
+    The snapshots of a company are valid up to its
+    ``balance_snapshot_date``. Posting or resetting to draft an entry
+    dated before that date moves it back to the start of the month of the
+    entry, and the snapshots are rebuilt by cron.
+    """
+    _name = 'account.balance.snapshot'
+    _description = 'Account Balance Snapshot'
+    _order = 'date'
+
+    company_id = fields.Many2one('res.company', string='Company',
+                                 readonly=True)
+    account_id = fields.Many2one('account.account', string='Account',
+                                 readonly=True, ondelete='cascade')
+    journal_id = fields.Many2one('account.journal', string='Journal',
+                                 readonly=True, ondelete='cascade')
+    date = fields.Date(string='Date', readonly=True)
+    debit = fields.Float(string='Debit', readonly=True)
+    credit = fields.Float(string='Credit', readonly=True)
+
+    def init(self):
+        tools.create_index(self._cr, 'account_balance_snapshot_lookup_index',
+                           self._table, ['account_id', 'journal_id', 'date'])
+
+    @api.model
+    def _build(self, company):
+        """ Rebuild the snapshots of ``company`` up to the start of the
+        current month, in a single pass over its posted lines."""
+        until = fields.Date.today().replace(day=1)
+        self.env['account.move.line'].flush(
+            ['company_id', 'account_id', 'journal_id', 'date',
+             'parent_state', 'debit', 'credit'])
+        self._cr.execute(
+            "DELETE FROM account_balance_snapshot WHERE company_id = %s",
+            [company.id])
+        self._cr.execute('''
+            INSERT INTO account_balance_snapshot
+                (company_id, account_id, journal_id, date, debit, credit)
+            SELECT company_id, account_id, journal_id, date,
+                   SUM(debit) OVER w, SUM(credit) OVER w
+            FROM (
+                SELECT l.company_id, l.account_id, l.journal_id,
+                       (date_trunc('month', l.date) + interval '1 month')::date AS date,
+                       SUM(l.debit) AS debit, SUM(l.credit) AS credit
+                FROM account_move_line l
+                WHERE l.company_id = %s AND l.parent_state = 'posted'
+                  AND l.date < %s
+                GROUP BY l.company_id, l.account_id, l.journal_id,
+                         date_trunc('month', l.date)
+            ) monthly
+            WINDOW w AS (PARTITION BY account_id, journal_id ORDER BY date)
+        ''', [company.id, until])
+        company.balance_snapshot_date = until
+        self.invalidate_cache()
+
+    @api.model
+    def _cron_build(self):
+        """ Rebuild the snapshots of the companies whose snapshots do not
+        cover every past month."""
+        until = fields.Date.today().replace(day=1)
+        for company in self.env['res.company'].search(
+                ['|', ('balance_snapshot_date', '=', False),
+                 ('balance_snapshot_date', '<', until)]):
+            self._build(company)
+
+    @api.model
+    def _invalidate_moves(self, moves):
+        """ Invalidate the snapshots that include the posted lines of
+        ``moves``, which are being posted or reset to draft."""
+        for company in moves.mapped('company_id'):
+            dates = moves.filtered(
+                lambda move: move.company_id == company and move.date
+            ).mapped('date')
+            if not dates:
+                continue
+            valid_until = min(dates).replace(day=1)
+            self._cr.execute('''
+                UPDATE res_company SET balance_snapshot_date = %s
+                WHERE id = %s AND balance_snapshot_date > %s
+            ''', [valid_until, company.id, valid_until])
+            if self._cr.rowcount:
+                self._cr.execute('''
+                    DELETE FROM account_balance_snapshot
+                    WHERE company_id = %s AND date > %s
+                ''', [company.id, valid_until])
+                company.invalidate_cache(['balance_snapshot_date'])
+
+    @api.model
+    def _get_initial_balances(self, accounts):
+        """ Return the initial balances of ``accounts`` for the context of
+        account.move.line._query_get(), as {account_id: (debit, credit)},
+        from the nearest snapshot and a scan of the lines between that
+        snapshot and ``date_from``.
+
+        Return None when the snapshots cannot answer: draft entries are
+        included, the context filters on something the snapshots are not
+        broken down by, or no snapshot covers ``date_from``.
+        """
+        context = self.env.context
+        date_from = fields.Date.to_date(context.get('date_from'))
+        if not date_from or not context.get('strict_range') \
+                or context.get('state') != 'posted' \
+                or any(context.get(key) for key in
+                       SNAPSHOT_UNSUPPORTED_FILTERS):
+            return None
+        boundary = date_from.replace(day=1)
+        companies = accounts.mapped('company_id')
+        if not companies or any(not company.balance_snapshot_date or
+                                company.balance_snapshot_date < boundary
+                                for company in companies):
+            return None
+
+        where = ["account_id IN %s", "date <= %s"]
+        params = [tuple(accounts.ids), boundary]
+        if context.get('journal_ids'):
+            where.append("journal_id IN %s")
+            params.append(tuple(context['journal_ids']))
+        self._cr.execute('''
+            SELECT account_id, SUM(debit), SUM(credit)
+            FROM (
+                SELECT DISTINCT ON (account_id, journal_id)
+                       account_id, debit, credit
+                FROM account_balance_snapshot
+                WHERE ''' + ' AND '.join(where) + '''
+                ORDER BY account_id, journal_id, date DESC
+            ) snapshot
+            GROUP BY account_id
+        ''', params)
+        balances = {account_id: (debit, credit)
+                    for account_id, debit, credit in self._cr.fetchall()}
+
+        if boundary < date_from:
+            tables, where_clause, where_params = self.env[
+                'account.move.line'].with_context(
+                date_from=boundary, date_to=date_from - relativedelta(days=1),
+                initial_bal=False)._query_get()
+            self._cr.execute('''
+                SELECT account_move_line.account_id,
+                       SUM(account_move_line.debit),
+                       SUM(account_move_line.credit)
+                FROM ''' + tables + '''
+                WHERE account_move_line.account_id IN %s
+                  AND ''' + (where_clause.strip() or 'TRUE') + '''
+                GROUP BY account_move_line.account_id
+            ''', [tuple(accounts.ids)] + list(where_params))
+            for account_id, debit, credit in self._cr.fetchall():
+                snapshot_debit, snapshot_credit = balances.get(account_id,
+                                                               (0.0, 0.0))
+                balances[account_id] = (snapshot_debit + debit,
+                                        snapshot_credit + credit)
+        return balances
+
+
+class ResCompany(models.Model):
+    _inherit = 'res.company'
+
+    balance_snapshot_date = fields.Date(
+        string='Balance Snapshots Until', readonly=True,
+        help='The account balance snapshots of the company are valid for '
+             'the initial balances up to this date.')
+
+
+class AccountMove(models.Model):
+    _inherit = 'account.move'
+
+    def post(self):
+        self.env['account.balance.snapshot']._invalidate_moves(self)
+        return super(AccountMove, self).post()
+
+    def button_draft(self):
+        self.env['account.balance.snapshot']._invalidate_moves(
+            self.filtered(lambda move: move.state == 'posted'))
+        return super(AccountMove, self).button_draft()
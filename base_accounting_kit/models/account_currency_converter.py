@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+#############################################################################
+#
+#    Cybrosys Technologies Pvt. Ltd.
+#
+#    Copyright (C) 2019-TODAY Cybrosys Technologies(<https://www.cybrosys.com>)
+#    Author: Cybrosys Techno Solutions(<https://www.cybrosys.com>)
+#
+#    You can modify it under the terms of the GNU LESSER
+#    GENERAL PUBLIC LICENSE (LGPL v3), Version 3.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU LESSER GENERAL PUBLIC LICENSE (LGPL v3) for more details.
+#
+#    You should have received a copy of the GNU LESSER GENERAL PUBLIC LICENSE
+#    (LGPL v3) along with this program.
+#    If not, see <http://www.gnu.org/licenses/>.
+#
+#############################################################################
+
+from odoo import api, fields, models
+
+
+class AccountCurrencyConverter(models.AbstractModel):
+    """ Conversion of many amounts between currencies at once.
+
+    The rates of every (currency, date) pair involved are read by a single
+    query instead of one ``res.currency._convert()`` call per amount; the
+    reports computing their amounts in SQL join the conversion factors as
+    a ``rate(currency_id, factor)`` table, see :meth:`_get_rate_table`.
+    """
+    _name = 'account.currency.converter'
+    _description = 'Currency Conversion'
+
+    @api.model
+    def _get_rates(self, pairs, company=None):
+        """ Return the rate of each (currency_id, date) pair, as in
+        ``res.currency._get_rates()``: the latest rate of the currency on
+        or before the date, the rates of ``company`` (the current company
+        by default) first, and 1.0 without any rate."""
+        pairs = set(pairs)
+        if not pairs:
+            return {}
+        company = company or self.env.company
+        self.env['res.currency.rate'].flush(
+            ['rate', 'name', 'currency_id', 'company_id'])
+        currency_ids, dates = zip(*pairs)
+        self._cr.execute('''
+            SELECT pair.currency_id, pair.date, COALESCE(rate.rate, 1.0)
+            FROM unnest(%s::int[], %s::date[]) AS pair(currency_id, date)
+            LEFT JOIN LATERAL (
+                SELECT r.rate FROM res_currency_rate r
+                WHERE r.currency_id = pair.currency_id
+                  AND r.name <= pair.date
+                  AND (r.company_id IS NULL OR r.company_id = %s)
+                ORDER BY r.company_id, r.name DESC
+                LIMIT 1
+            ) rate ON TRUE
+        ''', [list(currency_ids), list(dates), company.id])
+        return {(currency_id, date): rate
+                for currency_id, date, rate in self._cr.fetchall()}
+
+    @api.model
+    def _get_factors(self, currencies, to_currency, date=None, company=None):
+        """ Return the factor converting an amount of each currency of
+        ``currencies`` to ``to_currency`` at ``date`` (today by default),
+        keyed by currency id."""
+        date = fields.Date.to_date(date) or fields.Date.context_today(self)
+        rates = self._get_rates([(currency.id, date) for currency in
+                                 currencies | to_currency], company)
+        return {currency.id: rates[(to_currency.id, date)] /
+                rates[(currency.id, date)] for currency in currencies}
+
+    @api.model
+    def _get_rate_table(self, currencies, to_currency, date=None,
+                        company=None):
+        """ Return the SQL and parameters of a ``rate(currency_id, factor)``
+        table of the factors of :meth:`_get_factors`, to join in a report
+        query and multiply its amounts by ``rate.factor``."""
+        factors = self._get_factors(currencies, to_currency, date, company)
+        return ("unnest(%s::int[], %s::numeric[]) AS rate(currency_id, factor)",
+                [list(factors), list(factors.values())])
+
+    @api.model
+    def _convert(self, amounts, currency_ids, to_currency, date=None,
+                 company=None):
+        """ Convert ``amounts``, each one in the currency of the same index
+        in ``currency_ids``, to ``to_currency``, rounded."""
+        factors = self._get_factors(
+            self.env['res.currency'].browse(set(currency_ids)), to_currency,
+            date, company)
+        return [to_currency.round(amount * factors[currency_id])
+                for amount, currency_id in zip(amounts, currency_ids)]
@@ -1,29 +1,369 @@
 # -*- coding: utf-8 -*-
 
-from odoo import models, fields, api
+from odoo import models, fields, api, tools
 import datetime
 from datetime import datetime
 from dateutil.relativedelta import relativedelta
 import calendar
+import csv
+import io
+import logging
+import os
+import tempfile
+import uuid
+
+from odoo.exceptions import AccessError, UserError
+from odoo.tools.translate import _
+
+try:
+    from odoo.tools.misc import xlsxwriter
+except ImportError:
+    import xlsxwriter
+
+from .account_dashboard_cache import cached_widget, dashboard_cache
+from .account_dashboard_profiler import profile_dashboard
+
+_logger = logging.getLogger(__name__)
+
+
+def get_period_bounds(period, today=None):
+    """ Return the half-open ``[date_from, date_to)`` range covered by a
+    dashboard period. Filtering a date column with plain comparisons on
+    these bounds (instead of extracting its month or year) lets Postgres
+    use the indexes on that column."""
+    today = today or fields.Date.today()
+    if period in ('this_month', 'last_month'):
+        date_from = today.replace(day=1)
+        if period == 'last_month':
+            date_from -= relativedelta(months=1)
+        return date_from, date_from + relativedelta(months=1)
+    if period in ('this_year', 'last_year'):
+        date_from = today.replace(month=1, day=1)
+        if period == 'last_year':
+            date_from -= relativedelta(years=1)
+        return date_from, date_from + relativedelta(years=1)
+    raise ValueError("Unknown dashboard period %r" % (period,))
+
+
+class DashboardQuery(object):
+    """ WHERE clause of a dashboard query.
+
+    The company, move state and period filters are applied the same way by
+    every widget, and every value is passed as a query parameter: the text
+    of a query only depends on its shape, never on the company, states or
+    dates it runs for, so its plan can be reused.
+    """
+
+    def __init__(self, alias, company_id, states, period=None,
+                 date_column='date', state_column='state'):
+        self.conditions = []
+        self.params = []
+        self.where('%s.company_id = %%s' % alias, company_id)
+        self.where('%s.%s IN %%s' % (alias, state_column), tuple(states))
+        if period:
+            date_from, date_to = get_period_bounds(period)
+            self.where('%s.%s >= %%s' % (alias, date_column), date_from)
+            self.where('%s.%s < %%s' % (alias, date_column), date_to)
+
+    def where(self, condition, *params):
+        """ Add a condition, with a ``%s`` placeholder per parameter."""
+        self.conditions.append(condition)
+        self.params.extend(params)
+        return self
+
+    @property
+    def clause(self):
+        return ' AND '.join(self.conditions)
+
+
+# sources of the dashboard metrics: the table expression scanned, the alias
+# the company/state/period filters apply to, the state column and the
+# conditions every row of the source must meet
+DASHBOARD_METRIC_SOURCES = {
+    'move': {
+        'from': 'account_move',
+        'alias': 'account_move',
+        'state_column': 'state',
+        'where': [],
+    },
+    'aggregate': {
+        'from': 'account_dashboard_aggregate',
+        'alias': 'account_dashboard_aggregate',
+        'state_column': 'parent_state',
+        'where': [],
+    },
+    'entry_line': {
+        'from': '''account_move_line
+            join account_move on account_move.id = account_move_line.move_id
+            join account_account on account_account.id = account_move_line.account_id''',
+        'alias': 'account_move_line',
+        'state_column': 'parent_state',
+        'where': [("account_move.type = %s", 'entry')],
+    },
+    'unreconciled': {
+        'from': '''account_move_line l
+            join account_account a on l.account_id = a.id''',
+        'alias': 'l',
+        'state_column': 'parent_state',
+        'where': [("l.full_reconcile_id IS NULL AND l.balance != 0 "
+                   "AND a.reconcile IS TRUE",)],
+    },
+}
+
+
+def _invoice_metric(aggregate, expression, move_type, paid=False):
+    filters = [('account_move.type', move_type)]
+    if paid:
+        filters.append(('account_move.invoice_payment_state', 'paid'))
+    return 'move', aggregate, expression, filters
+
+
+# dashboard metrics, as (source, aggregate, expression, filters): the
+# metric is the aggregate of the expression over the rows of the source
+# matching every (column, value) filter. Metrics are crossed with a period
+# and a move state filter when computed, see DashBoard._compute_metrics().
+DASHBOARD_METRICS = {
+    'customer_invoice_amount': _invoice_metric(
+        'sum', 'account_move.amount_total', 'out_invoice'),
+    'supplier_invoice_amount': _invoice_metric(
+        'sum', 'account_move.amount_total', 'in_invoice'),
+    'credit_note_amount': _invoice_metric(
+        'sum', 'account_move.amount_total', 'out_refund'),
+    'refund_amount': _invoice_metric(
+        'sum', 'account_move.amount_total', 'in_refund'),
+    'customer_invoice': _invoice_metric(
+        'sum', 'account_move.amount_total_signed', 'out_invoice'),
+    'supplier_invoice': _invoice_metric(
+        'sum', '-account_move.amount_total_signed', 'in_invoice'),
+    'credit_note': _invoice_metric(
+        'sum', '-(account_move.amount_total_signed'
+               ' - account_move.amount_residual_signed)', 'out_refund'),
+    'refund': _invoice_metric(
+        'sum', '-account_move.amount_total_signed', 'in_refund'),
+    'customer_invoice_paid': _invoice_metric(
+        'sum', 'account_move.amount_total_signed'
+               ' - account_move.amount_residual_signed', 'out_invoice', True),
+    'supplier_invoice_paid': _invoice_metric(
+        'sum', '-(account_move.amount_total_signed'
+               ' - account_move.amount_residual_signed)', 'in_invoice', True),
+    'customer_credit_paid': _invoice_metric(
+        'sum', '-(account_move.amount_total_signed'
+               ' - account_move.amount_residual_signed)', 'out_refund', True),
+    'supplier_refund_paid': _invoice_metric(
+        'sum', 'account_move.amount_total_signed'
+               ' - account_move.amount_residual_signed', 'in_refund', True),
+    'unreconciled_count': ('unreconciled', 'count', '*', []),
+}
+for _group in ('income', 'expense'):
+    _filters = [('account_dashboard_aggregate.internal_group', _group)]
+    DASHBOARD_METRICS.update({
+        '%s_debit' % _group: ('aggregate', 'sum', 'debit', _filters),
+        '%s_credit' % _group: ('aggregate', 'sum', 'credit', _filters),
+        '%s_balance' % _group: ('aggregate', 'sum', 'debit - credit',
+                                _filters),
+    })
+    _filters = [('account_account.internal_group', _group)]
+    DASHBOARD_METRICS.update({
+        'entry_%s_debit' % _group: ('entry_line', 'sum',
+                                    'account_move_line.debit', _filters),
+        'entry_%s_credit' % _group: ('entry_line', 'sum',
+                                     'account_move_line.credit', _filters),
+    })
+
+
+# series behind the dashboard charts that can be exported, as (header,
+# query). The queries take the company ids and the [date_from, date_to)
+# range as parameters.
+DASHBOARD_EXPORT_SERIES = {
+    'income_expense_daily': (
+        ['Company', 'Date', 'Group', 'State', 'Debit', 'Credit', 'Balance'],
+        '''select res_company.name, a.date, a.internal_group, a.parent_state,
+                  sum(a.debit), sum(a.credit), sum(a.debit) - sum(a.credit)
+           from account_dashboard_aggregate a
+           join res_company on res_company.id = a.company_id
+           where a.company_id IN %s AND a.date >= %s AND a.date < %s
+           group by res_company.name, a.date, a.internal_group, a.parent_state
+           order by res_company.name, a.date, a.internal_group, a.parent_state''',
+    ),
+    'income_expense_monthly': (
+        ['Company', 'Month', 'Group', 'State', 'Debit', 'Credit', 'Balance'],
+        '''select res_company.name, to_char(a.date, 'YYYY-MM') as month,
+                  a.internal_group, a.parent_state,
+                  sum(a.debit), sum(a.credit), sum(a.debit) - sum(a.credit)
+           from account_dashboard_aggregate a
+           join res_company on res_company.id = a.company_id
+           where a.company_id IN %s AND a.date >= %s AND a.date < %s
+           group by res_company.name, month, a.internal_group, a.parent_state
+           order by res_company.name, month, a.internal_group, a.parent_state''',
+    ),
+    'overdues': (
+        ['Company', 'Partner', 'Invoice', 'Due Date', 'Days Overdue',
+         'Amount Due'],
+        '''select res_company.name, res_partner.name, m.name,
+                  m.invoice_date_due, current_date - m.invoice_date_due,
+                  m.amount_residual_signed
+           from account_move m
+           join res_company on res_company.id = m.company_id
+           join res_partner on res_partner.id = m.commercial_partner_id
+           where m.company_id IN %s AND m.invoice_date_due >= %s
+             AND m.invoice_date_due < %s AND m.invoice_date_due < current_date
+             AND m.type = 'out_invoice' AND m.state = 'posted'
+             AND m.invoice_payment_state = 'not_paid'
+           order by res_company.name, m.invoice_date_due, m.id''',
+    ),
+}
+
+# number of rows fetched at once from the server side cursor of an export
+EXPORT_ITERSIZE = 2000
+
+# default number of rows of the partner rankings of the dashboard
+DEFAULT_TOP_N = 10
+
+# widgets fetched by the dashboard on load, as (method, takes_states).
+# Methods called without the states filter by the client keep their
+# historical default of posted + draft entries.
+DASHBOARD_WIDGETS = [
+    ('get_currency', False),
+    ('get_overdues', False),
+    ('get_top_10_customers', True),
+    ('bank_balance', True),
+    ('get_latebills', False),
+    ('get_total_invoice', False),
+    ('get_total_invoice_this_month', True),
+    ('get_total_invoice_last_month', False),
+    ('unreconcile_items', False),
+    ('unreconcile_items_this_month', True),
+    ('unreconcile_items_this_year', True),
+    ('unreconcile_items_last_year', False),
+    ('month_income', False),
+    ('month_income_this_month', True),
+    ('month_income_last_month', False),
+    ('month_income_this_year', True),
+    ('month_income_last_year', False),
+    ('month_expense', False),
+    ('month_expense_this_month', True),
+    ('month_expense_this_year', True),
+    ('profit_income_this_month', True),
+    ('profit_income_this_year', True),
+]
+
+# period dependent widgets, selected by the period filter of the dashboard
+DASHBOARD_PERIOD_WIDGETS = {
+    'this_month': [
+        ('get_income_this_month', True),
+        ('get_overdues_this_month', True),
+        ('get_total_invoice_current_month', True),
+        ('get_latebills_this_month', True),
+    ],
+    'this_year': [
+        ('get_income_this_year', True),
+        ('get_overdues_this_year', True),
+        ('get_total_invoice_current_year', True),
+        ('get_latebills_this_year', True),
+    ],
+    'last_month': [
+        ('get_income_last_month', True),
+        ('get_top_10_customers_last_month', True),
+    ],
+    'last_year': [
+        ('get_income_last_year', True),
+    ],
+}
+
+# fields of the journal items whose change alters the dashboard figures
+DASHBOARD_LINE_FIELDS = {'company_id', 'account_id', 'partner_id', 'move_id',
+                         'date', 'date_maturity', 'debit', 'credit',
+                         'balance', 'amount_currency'}
 
 
 class DashBoard(models.Model):
     _inherit = 'account.move'
 
+    def init(self):
+        super(DashBoard, self).init()
+        tools.create_index(self._cr, 'account_move_line_company_state_date_index',
+                           'account_move_line',
+                           ['company_id', 'parent_state', 'date'])
+        tools.create_index(self._cr, 'account_move_company_type_payment_due_index',
+                           'account_move',
+                           ['company_id', 'type', 'invoice_payment_state',
+                            'invoice_date_due'])
+
+    def post(self):
+        res = super(DashBoard, self).post()
+        self._dashboard_moves_changed()
+        return res
+
+    def button_cancel(self):
+        res = super(DashBoard, self).button_cancel()
+        self._dashboard_moves_changed()
+        return res
+
+    def button_draft(self):
+        res = super(DashBoard, self).button_draft()
+        self._dashboard_moves_changed()
+        return res
+
+    def unlink(self):
+        company_ids = set(self.mapped('company_id').ids)
+        res = super(DashBoard, self).unlink()
+        self._dashboard_invalidate(company_ids)
+        return res
+
+    def _dashboard_moves_changed(self):
+        """ Bring the dashboard figures of the companies of these moves up
+        to date after their state or their content changed. Draft entries
+        matter to the 'posted' dashboard as well, as some of its widgets
+        read posted and draft entries."""
+        self._dashboard_invalidate(set(self.mapped('company_id').ids))
+
+    @api.model
+    def _dashboard_invalidate(self, company_ids):
+        if not company_ids:
+            return
+        dbname = self._cr.dbname
+        self.env['account.dashboard.bundle']._invalidate(company_ids)
+        dashboard_cache.invalidate(dbname, company_ids)
+        # entries computed by concurrent requests before this transaction
+        # is committed would still hold the old figures
+        self._cr.after('commit', lambda: dashboard_cache.invalidate(
+            dbname, company_ids))
+
+    @api.model
+    def _dashboard_states(self, post):
+        """ Move states selected by the 'posted' filter of the dashboard."""
+        if post == ('posted',):
+            return ('posted',)
+        return ('posted', 'draft')
+
+    @api.model
+    def _dashboard_query(self, alias, states=('posted',), period=None,
+                         date_column='date', state_column='state'):
+        """ Return a :class:`DashboardQuery` filtering ``alias`` on the
+        current company, the given move states and period."""
+        return DashboardQuery(alias, self.env.company.id, states,
+                              period=period, date_column=date_column,
+                              state_column=state_column)
+
+    @api.model
+    def get_dashboard_cache_stats(self):
+        """ Hit/miss counters of the dashboard cache of this worker."""
+        return dashboard_cache.stats()
+
     # function to getting expenses
 
     @api.model
+    @cached_widget
     def get_expense_details(self):
 
-        self._cr.execute('''select sum(debit)-sum(credit) as expense ,to_char(account_move_line.date, 'Month')  as month ,
-        internal_group from account_move_line ,
-        account_account
-         where account_move_line.account_id=account_account.id AND internal_group = 'expense' AND
-         to_char(DATE(NOW()), 'YY') = to_char(account_move_line.date, 'YY')
-         AND account_move_line.parent_state = 'posted'
-         group by internal_group,month 
-         order by month desc               
-         ''')
+        query = self._dashboard_query('account_dashboard_aggregate', ('posted',), period='this_year',
+                                      state_column='parent_state')
+        query.where("account_dashboard_aggregate.internal_group = %s", 'expense')
+        self._cr.execute('''select sum(debit)-sum(credit) as expense, to_char(date, 'Month') as month, internal_group
+                            from account_dashboard_aggregate
+                            where ''' + query.clause + '''
+                            group by internal_group, month
+                            order by month desc''', query.params)
         result = self._cr.dictfetchall()
         month = list(sorted(set([item['month'] for item in result])))
         incomes = list(filter(lambda i: i['internal_group'] == 'income', result))
@@ -40,6 +380,7 @@ class DashBoard(models.Model):
     # function to getting expense of this year
 
     @api.model
+    @cached_widget
     def get_ex_this_year(self):
         month_list = []
         for i in range(11, -1, -1):
@@ -47,13 +388,13 @@ class DashBoard(models.Model):
             text = format(l_month, '%B')
             month_list.append(text)
 
-        self._cr.execute('''select sum(debit)-sum(credit) as expense ,to_char(account_move_line.date, 'Month')  as month ,
-        internal_group from account_move_line ,
-        account_account
-         where account_move_line.account_id=account_account.id AND internal_group = 'expense' AND
-         to_char(DATE(NOW()), 'YY') = to_char(account_move_line.date, 'YY')  AND account_move_line.parent_state='posted'
-         group by internal_group,month                  
-         ''')
+        query = self._dashboard_query('account_dashboard_aggregate', ('posted',), period='this_year',
+                                      state_column='parent_state')
+        query.where("account_dashboard_aggregate.internal_group = %s", 'expense')
+        self._cr.execute('''select sum(debit)-sum(credit) as expense, to_char(date, 'Month') as month, internal_group
+                            from account_dashboard_aggregate
+                            where ''' + query.clause + '''
+                            group by internal_group, month''', query.params)
 
         record = self._cr.dictfetchall()
         records = []
@@ -77,6 +418,7 @@ class DashBoard(models.Model):
     # function to getting expense of last year
 
     @api.model
+    @cached_widget
     def get_ex_last_year(self):
         month_list = []
         for i in range(11, -1, -1):
@@ -84,16 +426,13 @@ class DashBoard(models.Model):
             text = format(l_month, '%B')
             month_list.append(text)
 
-        self._cr.execute('''
-
-             select sum(debit)-sum(credit) as expense,to_char(account_move_line.date, 'Month')  as month ,
-            internal_group from account_move_line ,
-            account_account
-             where  Extract(year FROM account_move_line.date) = Extract(year FROM DATE(NOW())) -1 AND
-              account_move_line.account_id=account_account.id AND internal_group = 'expense' 
-              AND account_move_line.parent_state='posted'
-             group by month, internal_group               
-             ''')
+        query = self._dashboard_query('account_dashboard_aggregate', ('posted',), period='last_year',
+                                      state_column='parent_state')
+        query.where("account_dashboard_aggregate.internal_group = %s", 'expense')
+        self._cr.execute('''select sum(debit)-sum(credit) as expense, to_char(date, 'Month') as month, internal_group
+                            from account_dashboard_aggregate
+                            where ''' + query.clause + '''
+                            group by internal_group, month''', query.params)
         record = self._cr.dictfetchall()
         records = []
         for month in month_list:
@@ -116,6 +455,7 @@ class DashBoard(models.Model):
     # function to getting expense of this month
 
     @api.model
+    @cached_widget
     def get_ex_this_month(self):
 
         day_list = []
@@ -123,16 +463,13 @@ class DashBoard(models.Model):
         day = calendar.monthrange(now.year, now.month)[1]
         for x in range(1, day + 1):
             day_list.append(x)
-        self._cr.execute('''select sum(debit)-sum(credit) as expense ,cast(to_char(account_move_line.date, 'DD')as int)
-            as date ,
-            internal_group from account_move_line ,
-            account_account
-             where  Extract(month FROM account_move_line.date) = Extract(month FROM DATE(NOW()))  AND
-              Extract(year FROM account_move_line.date) = Extract(year FROM DATE(NOW()))  AND
-              account_move_line.account_id=account_account.id AND internal_group='expense'  
-              AND account_move_line.parent_state='posted'
-             group by internal_group,date                 
-             ''')
+        query = self._dashboard_query('account_dashboard_aggregate', ('posted',), period='this_month',
+                                      state_column='parent_state')
+        query.where("account_dashboard_aggregate.internal_group = %s", 'expense')
+        self._cr.execute('''select sum(debit)-sum(credit) as expense, cast(to_char(date, 'DD') as int) as date, internal_group
+                            from account_dashboard_aggregate
+                            where ''' + query.clause + '''
+                            group by internal_group, date''', query.params)
 
         record = self._cr.dictfetchall()
         records = []
@@ -156,6 +493,7 @@ class DashBoard(models.Model):
     # function to getting expense of last month
 
     @api.model
+    @cached_widget
     def get_ex_last_month(self):
         day_list = []
         now = datetime.now()
@@ -166,17 +504,13 @@ class DashBoard(models.Model):
         for x in range(1, day + 1):
             day_list.append(x)
 
-        one_month_ago = (datetime.now() - relativedelta(months=1)).month
-
-        self._cr.execute('''select sum(debit)-sum(credit) as expense ,cast(to_char(account_move_line.date, 'DD')as int)
-            as date ,
-            internal_group from account_move_line ,
-            account_account
-             where  Extract(month FROM account_move_line.date) = ''' + str(one_month_ago) + ''' AND
-              account_move_line.account_id=account_account.id AND internal_group='expense' 
-              AND account_move_line.parent_state='posted'
-             group by internal_group,date                 
-             ''')
+        query = self._dashboard_query('account_dashboard_aggregate', ('posted',), period='last_month',
+                                      state_column='parent_state')
+        query.where("account_dashboard_aggregate.internal_group = %s", 'expense')
+        self._cr.execute('''select sum(debit)-sum(credit) as expense, cast(to_char(date, 'DD') as int) as date, internal_group
+                            from account_dashboard_aggregate
+                            where ''' + query.clause + '''
+                            group by internal_group, date''', query.params)
         record = self._cr.dictfetchall()
         records = []
         for date in day_list:
@@ -199,40 +533,31 @@ class DashBoard(models.Model):
     # function to getting income of this year
 
     @api.model
+    @cached_widget
     def get_income_this_year(self, *post):
 
-        company_id = self.env.company.id
-
         month_list = []
         for i in range(11, -1, -1):
             l_month = datetime.now() - relativedelta(months=i)
             text = format(l_month, '%B')
             month_list.append(text)
 
-        states_arg = ""
-        if post != ('posted',):
-            states_arg = """ parent_state in ('posted', 'draft')"""
-        else:
-            states_arg = """ parent_state = 'posted'"""
-
-        self._cr.execute(('''select sum(debit)-sum(credit) as income ,to_char(account_move_line.date, 'Month')  as month ,
-                             internal_group from account_move_line ,account_account where 
-                             account_move_line.account_id=account_account.id AND internal_group = 'income' 
-                             AND to_char(DATE(NOW()), 'YY') = to_char(account_move_line.date, 'YY')
-                             AND account_move_line.company_id = ''' + str(company_id) + '''
-                             AND %s 
-                             group by internal_group,month                  
-                        ''') % (states_arg))
+        query = self._dashboard_query('account_dashboard_aggregate', self._dashboard_states(post), period='this_year',
+                                      state_column='parent_state')
+        query.where("account_dashboard_aggregate.internal_group = %s", 'income')
+        self._cr.execute('''select sum(debit)-sum(credit) as income, to_char(date, 'Month') as month, internal_group
+                            from account_dashboard_aggregate
+                            where ''' + query.clause + '''
+                            group by internal_group, month''', query.params)
         record = self._cr.dictfetchall()
 
-        self._cr.execute(('''select sum(debit)-sum(credit) as expense ,to_char(account_move_line.date, 'Month')  as month ,
-                            internal_group from account_move_line ,account_account where 
-                            account_move_line.account_id=account_account.id AND internal_group = 'expense' 
-                            AND to_char(DATE(NOW()), 'YY') = to_char(account_move_line.date, 'YY')
-                            AND account_move_line.company_id = ''' + str(company_id) + '''
-                            AND %s 
-                            group by internal_group,month                  
-                        ''') % (states_arg))
+        query = self._dashboard_query('account_dashboard_aggregate', self._dashboard_states(post), period='this_year',
+                                      state_column='parent_state')
+        query.where("account_dashboard_aggregate.internal_group = %s", 'expense')
+        self._cr.execute('''select sum(debit)-sum(credit) as expense, to_char(date, 'Month') as month, internal_group
+                            from account_dashboard_aggregate
+                            where ''' + query.clause + '''
+                            group by internal_group, month''', query.params)
 
         result = self._cr.dictfetchall()
         records = []
@@ -296,40 +621,31 @@ class DashBoard(models.Model):
     # function to getting income of last year
 
     @api.model
+    @cached_widget
     def get_income_last_year(self, *post):
 
-        company_id = self.env.company.id
-
         month_list = []
         for i in range(11, -1, -1):
             l_month = datetime.now() - relativedelta(months=i)
             text = format(l_month, '%B')
             month_list.append(text)
 
-        states_arg = ""
-        if post != ('posted',):
-            states_arg = """ parent_state in ('posted', 'draft')"""
-        else:
-            states_arg = """ parent_state = 'posted'"""
-
-        self._cr.execute(('''select sum(debit)-sum(credit) as income ,to_char(account_move_line.date, 'Month')  as month ,
-                            internal_group from account_move_line ,account_account
-                            where account_move_line.account_id=account_account.id AND internal_group = 'income' 
-                            AND Extract(year FROM account_move_line.date) = Extract(year FROM DATE(NOW())) -1 
-                            AND account_move_line.company_id = ''' + str(company_id) + '''
-                            AND %s
-                            group by internal_group,month                  
-                 ''') % (states_arg))
+        query = self._dashboard_query('account_dashboard_aggregate', self._dashboard_states(post), period='last_year',
+                                      state_column='parent_state')
+        query.where("account_dashboard_aggregate.internal_group = %s", 'income')
+        self._cr.execute('''select sum(debit)-sum(credit) as income, to_char(date, 'Month') as month, internal_group
+                            from account_dashboard_aggregate
+                            where ''' + query.clause + '''
+                            group by internal_group, month''', query.params)
         record = self._cr.dictfetchall()
 
-        self._cr.execute(('''select sum(debit)-sum(credit) as expense ,to_char(account_move_line.date, 'Month')  as month ,
-                            internal_group from account_move_line , account_account where 
-                            account_move_line.account_id=account_account.id AND internal_group = 'expense' 
-                            AND Extract(year FROM account_move_line.date) = Extract(year FROM DATE(NOW())) -1 
-                            AND account_move_line.company_id = ''' + str(company_id) + '''
-                            AND %s 
-                            group by internal_group,month                  
-                         ''') % (states_arg))
+        query = self._dashboard_query('account_dashboard_aggregate', self._dashboard_states(post), period='last_year',
+                                      state_column='parent_state')
+        query.where("account_dashboard_aggregate.internal_group = %s", 'expense')
+        self._cr.execute('''select sum(debit)-sum(credit) as expense, to_char(date, 'Month') as month, internal_group
+                            from account_dashboard_aggregate
+                            where ''' + query.clause + '''
+                            group by internal_group, month''', query.params)
 
         result = self._cr.dictfetchall()
         records = []
@@ -393,9 +709,9 @@ class DashBoard(models.Model):
     # function to getting income of last month
 
     @api.model
+    @cached_widget
     def get_income_last_month(self, *post):
 
-        company_id = self.env.company.id
         day_list = []
         now = datetime.now()
         day = \
@@ -406,33 +722,23 @@ class DashBoard(models.Model):
         for x in range(1, day + 1):
             day_list.append(x)
 
-        one_month_ago = (datetime.now() - relativedelta(months=1)).month
-
-        states_arg = ""
-        if post != ('posted',):
-            states_arg = """ parent_state in ('posted', 'draft')"""
-        else:
-            states_arg = """ parent_state = 'posted'"""
-
-        self._cr.execute(('''select sum(debit)-sum(credit) as income ,cast(to_char(account_move_line.date, 'DD')as int)
-                            as date , internal_group from account_move_line , account_account where   
-                            Extract(month FROM account_move_line.date) = ''' + str(one_month_ago) + ''' 
-                            AND %s
-                            AND account_move_line.company_id = ''' + str(company_id) + ''' 
-                            AND account_move_line.account_id=account_account.id AND internal_group='income'   
-                            group by internal_group,date                 
-                             ''') % (states_arg))
+        query = self._dashboard_query('account_dashboard_aggregate', self._dashboard_states(post), period='last_month',
+                                      state_column='parent_state')
+        query.where("account_dashboard_aggregate.internal_group = %s", 'income')
+        self._cr.execute('''select sum(debit)-sum(credit) as income, cast(to_char(date, 'DD') as int) as date, internal_group
+                            from account_dashboard_aggregate
+                            where ''' + query.clause + '''
+                            group by internal_group, date''', query.params)
 
         record = self._cr.dictfetchall()
 
-        self._cr.execute(('''select sum(debit)-sum(credit) as expense ,cast(to_char(account_move_line.date, 'DD')as int)
-                            as date ,internal_group from account_move_line ,account_account where  
-                            Extract(month FROM account_move_line.date) = ''' + str(one_month_ago) + ''' 
-                            AND %s
-                            AND account_move_line.company_id = ''' + str(company_id) + ''' 
-                            AND account_move_line.account_id=account_account.id AND internal_group='expense'
-                            group by internal_group,date                 
-                                 ''') % (states_arg))
+        query = self._dashboard_query('account_dashboard_aggregate', self._dashboard_states(post), period='last_month',
+                                      state_column='parent_state')
+        query.where("account_dashboard_aggregate.internal_group = %s", 'expense')
+        self._cr.execute('''select sum(debit)-sum(credit) as expense, cast(to_char(date, 'DD') as int) as date, internal_group
+                            from account_dashboard_aggregate
+                            where ''' + query.clause + '''
+                            group by internal_group, date''', query.params)
         result = self._cr.dictfetchall()
         records = []
         for date in day_list:
@@ -496,43 +802,32 @@ class DashBoard(models.Model):
     # function to getting income of this month
 
     @api.model
+    @cached_widget
     def get_income_this_month(self, *post):
 
-        company_id = self.env.company.id
-
-        states_arg = ""
-        if post != ('posted',):
-            states_arg = """ parent_state in ('posted', 'draft')"""
-        else:
-            states_arg = """ parent_state = 'posted'"""
-
         day_list = []
         now = datetime.now()
         day = calendar.monthrange(now.year, now.month)[1]
         for x in range(1, day + 1):
             day_list.append(x)
 
-        self._cr.execute(('''select sum(debit)-sum(credit) as income ,cast(to_char(account_move_line.date, 'DD')as int)
-                            as date , internal_group from account_move_line , account_account
-                            where   Extract(month FROM account_move_line.date) = Extract(month FROM DATE(NOW()))  
-                            AND Extract(YEAR FROM account_move_line.date) = Extract(YEAR FROM DATE(NOW()))  
-                            AND %s
-                            AND account_move_line.company_id = ''' + str(company_id) + ''' 
-                            AND account_move_line.account_id=account_account.id AND internal_group='income'
-                            group by internal_group,date                 
-                        ''') % (states_arg))
+        query = self._dashboard_query('account_dashboard_aggregate', self._dashboard_states(post), period='this_month',
+                                      state_column='parent_state')
+        query.where("account_dashboard_aggregate.internal_group = %s", 'income')
+        self._cr.execute('''select sum(debit)-sum(credit) as income, cast(to_char(date, 'DD') as int) as date, internal_group
+                            from account_dashboard_aggregate
+                            where ''' + query.clause + '''
+                            group by internal_group, date''', query.params)
 
         record = self._cr.dictfetchall()
 
-        self._cr.execute(('''select sum(debit)-sum(credit) as expense ,cast(to_char(account_move_line.date, 'DD')as int)
-                            as date , internal_group from account_move_line , account_account where  
-                            Extract(month FROM account_move_line.date) = Extract(month FROM DATE(NOW()))  
-                            AND Extract(YEAR FROM account_move_line.date) = Extract(YEAR FROM DATE(NOW()))  
-                            AND %s
-                            AND account_move_line.company_id = ''' + str(company_id) + ''' 
-                            AND account_move_line.account_id=account_account.id AND internal_group='expense'
-                            group by internal_group,date                 
-                         ''') % (states_arg))
+        query = self._dashboard_query('account_dashboard_aggregate', self._dashboard_states(post), period='this_month',
+                                      state_column='parent_state')
+        query.where("account_dashboard_aggregate.internal_group = %s", 'expense')
+        self._cr.execute('''select sum(debit)-sum(credit) as expense, cast(to_char(date, 'DD') as int) as date, internal_group
+                            from account_dashboard_aggregate
+                            where ''' + query.clause + '''
+                            group by internal_group, date''', query.params)
         result = self._cr.dictfetchall()
         records = []
         for date in day_list:
@@ -593,89 +888,121 @@ class DashBoard(models.Model):
 
         }
 
-    # function to getting late bills
-
     @api.model
-    def get_latebills(self, *post):
-
-        company_id = self.env.company.id
-
-        states_arg = ""
-        if post != ('posted',):
-            states_arg = """ state in ('posted', 'draft')"""
-        else:
-            states_arg = """ state = 'posted'"""
-
-        self._cr.execute(('''  select res_partner.name as partner, res_partner.commercial_partner_id as res  ,
-                            account_move.commercial_partner_id as parent, sum(account_move.amount_total) as amount
-                            from account_move,res_partner where 
-                            account_move.partner_id=res_partner.id AND account_move.type = 'in_invoice' AND
-                            invoice_payment_state = 'not_paid' AND 
-                              account_move.company_id = ''' + str(company_id) + ''' AND
-                            %s 
-                            AND  account_move.commercial_partner_id=res_partner.commercial_partner_id 
-                            group by parent,partner,res
-                            order by amount desc ''') % (states_arg))
-
-        record = self._cr.dictfetchall()
+    def _dashboard_top_n(self):
+        """ Number of rows of the partner rankings of the dashboard, read
+        from the system parameter ``base_accounting_kit.dashboard_top_n``."""
+        return max(int(self.env['ir.config_parameter'].sudo().get_param(
+            'base_accounting_kit.dashboard_top_n', DEFAULT_TOP_N)), 1)
 
-        bill_partner = [item['partner'] for item in record]
+    @api.model
+    def _top_partners(self, query, partner_condition, partner_column):
+        """ Rank the partners of the invoices matching ``query`` by amount
+        in SQL, folding all the partners beyond the first N - 1 into a
+        single "Others" row, so that only N rows are fetched.
+
+        :param partner_condition: condition joining the invoice with the
+            partners it is grouped on
+        :param partner_column: invoice column the amounts are grouped by
+        :return: (partner names, amounts), the last ones being "Others"
+        """
+        limit = self._dashboard_top_n()
+        self._cr.execute('''select least(rank, %s) as position,
+                                   (array_agg(partner order by rank))[1] as partner,
+                                   sum(amount) as amount
+                            from (select res_partner.name as partner,
+                                         sum(account_move.amount_total) as amount,
+                                         row_number() over (order by sum(account_move.amount_total) desc) as rank
+                                  from account_move
+                                  join res_partner on account_move.partner_id = res_partner.id
+                                  where ''' + partner_condition + '''
+                                  AND ''' + query.clause + '''
+                                  group by ''' + partner_column + ''', res_partner.name) ranked
+                            group by position
+                            order by position''', [limit] + query.params)
+        ranking = self._cr.dictfetchall()
+        partners = [item['partner'] for item in ranking
+                    if item['position'] < limit]
+        amounts = [item['amount'] for item in ranking
+                   if item['position'] < limit]
+        partners.append("Others")
+        amounts.append(sum(item['amount'] for item in ranking
+                           if item['position'] == limit))
+        return partners, amounts
 
-        bill_amount = [item['amount'] for item in record]
+    @api.model
+    def _top_customers(self, query):
+        """ Return the N customers with the highest invoiced amount, with
+        their amount net of credit notes, computed in a single query."""
+        query.where("account_move.type IN %s", ('out_invoice', 'out_refund'))
+        self._cr.execute('''select res_partner.name as customers, account_move.commercial_partner_id as parent,
+                            sum(account_move.amount_total) filter (where account_move.type = 'out_invoice') as invoiced,
+                            coalesce(sum(account_move.amount_total) filter (where account_move.type = 'out_refund'), 0.0) as refunded
+                            from account_move
+                            join res_partner on account_move.commercial_partner_id = res_partner.id
+                            where ''' + query.clause + '''
+                            group by parent, customers
+                            having bool_or(account_move.type = 'out_invoice')
+                            order by invoiced desc
+                            limit %s''', query.params + [self._dashboard_top_n()])
+        return [{
+            'customers': item['customers'],
+            'amount': item['invoiced'] - item['refunded'],
+            'parent': item['parent'],
+        } for item in self._cr.dictfetchall()]
 
-        amounts = sum(bill_amount[9:])
-        name = bill_partner[9:]
-        results = []
-        pre_partner = []
+    # function to getting late bills
 
-        bill_amount = bill_amount[:9]
-        bill_amount.append(amounts)
-        bill_partner = bill_partner[:9]
-        bill_partner.append("Others")
-        records = {
-            'bill_partner': bill_partner,
-            'bill_amount': bill_amount,
-            'result': results,
+    @api.model
+    @cached_widget
+    def get_latebills(self, *post):
 
+        query = self._dashboard_query('account_move', self._dashboard_states(post))
+        query.where("account_move.type = %s", 'in_invoice')
+        query.where("account_move.invoice_payment_state = %s", 'not_paid')
+        partners, amounts = self._top_partners(
+            query, "account_move.commercial_partner_id = res_partner.commercial_partner_id",
+            "account_move.commercial_partner_id")
+        return {
+            'bill_partner': partners,
+            'bill_amount': amounts,
+            'result': [],
         }
-        return records
-
-        # return record
 
     @api.model
+    @cached_widget
     def get_latebills_last_month(self):
 
-        # company_id = self.env.company.id
-
-        one_month_ago = (datetime.now() - relativedelta(months=1)).month
-
-        self._cr.execute(''' select to_char(account_move.date, 'Month') as month, res_partner.name as partner, account_move.partner_id as parent,
-                                sum(account_move.amount_total) as amount from account_move, res_partner where account_move.partner_id = res_partner.id
-                                AND account_move.type = 'in_invoice'
-                                AND invoice_payment_state = 'not_paid'
-                                AND state = 'posted' AND Extract(month FROM account_move.invoice_date_due) = ''' + str(
-            one_month_ago) + '''
-                                AND Extract(YEAR FROM account_move.invoice_date_due) = Extract(YEAR FROM DATE(NOW()))
-                                AND account_move.partner_id = res_partner.commercial_partner_id
-                                group by parent, partner, month
-                                order by amount desc ''')
+        query = self._dashboard_query('account_move', ('posted',), period='last_month',
+                                      date_column='invoice_date_due')
+        query.where("account_move.type = %s", 'in_invoice')
+        query.where("account_move.invoice_payment_state = %s", 'not_paid')
+        self._cr.execute('''select to_char(account_move.date, 'Month') as month, res_partner.name as partner, account_move.partner_id as parent, sum(account_move.amount_total) as amount
+                            from account_move
+                            join res_partner on account_move.partner_id = res_partner.id
+                            where account_move.partner_id = res_partner.commercial_partner_id
+                            AND ''' + query.clause + '''
+                            group by parent, partner, month
+                            order by amount desc''', query.params)
 
         record = self._cr.dictfetchall()
         return record
 
     @api.model
+    @cached_widget
     def get_latebills_last_year(self):
 
-        # company_id = self.env.company.id
-
-        self._cr.execute(''' select to_char(account_move.date, 'Month') as month, res_partner.name as partner, account_move.partner_id as parent,
-                            sum(account_move.amount_total) as amount from account_move, res_partner where account_move.partner_id = res_partner.id
-                            AND account_move.type = 'in_invoice'
-                            AND invoice_payment_state = 'not_paid'
-                            AND state = 'posted' AND Extract(YEAR FROM account_move.invoice_date_due) = Extract(YEAR FROM DATE(NOW())) - 1
-                            AND account_move.partner_id = res_partner.commercial_partner_id
+        query = self._dashboard_query('account_move', ('posted',), period='last_year',
+                                      date_column='invoice_date_due')
+        query.where("account_move.type = %s", 'in_invoice')
+        query.where("account_move.invoice_payment_state = %s", 'not_paid')
+        self._cr.execute('''select to_char(account_move.date, 'Month') as month, res_partner.name as partner, account_move.partner_id as parent, sum(account_move.amount_total) as amount
+                            from account_move
+                            join res_partner on account_move.partner_id = res_partner.id
+                            where account_move.partner_id = res_partner.commercial_partner_id
+                            AND ''' + query.clause + '''
                             group by parent, partner, month
-                            order by amount desc ''')
+                            order by amount desc''', query.params)
 
         record = self._cr.dictfetchall()
         return record
@@ -683,1014 +1010,380 @@ class DashBoard(models.Model):
     # function to getting over dues
 
     @api.model
+    @cached_widget
     def get_overdues(self, *post):
 
-        company_id = self.env.company.id
-
-        states_arg = ""
-        if post != ('posted',):
-            states_arg = """ state in ('posted', 'draft')"""
-        else:
-            states_arg = """ state = 'posted'"""
-
-        self._cr.execute((''' select res_partner.name as partner, res_partner.commercial_partner_id as res  ,
-                             account_move.commercial_partner_id as parent, sum(account_move.amount_total) as amount
-                            from account_move, account_move_line ,res_partner where 
-                            account_move.partner_id=res_partner.id AND account_move.type = 'out_invoice' AND
-                            invoice_payment_state = 'not_paid' AND 
-                            %s
-                            AND   account_move.company_id = ''' + str(company_id) + ''' AND
-			                 account_move_line.account_internal_type = 'payable' AND
-                             account_move.commercial_partner_id=res_partner.commercial_partner_id 
-                            group by parent,partner,res
-                            order by amount desc
-                            ''') % (states_arg))
-
-        record = self._cr.dictfetchall()
-        due_partner = [item['partner'] for item in record]
-        due_amount = [item['amount'] for item in record]
-
-        amounts = sum(due_amount[9:])
-        name = due_partner[9:]
-        result = []
-        pre_partner = []
-
-        due_amount = due_amount[:9]
-        due_amount.append(amounts)
-        due_partner = due_partner[:9]
-        due_partner.append("Others")
-        records = {
-            'due_partner': due_partner,
-            'due_amount': due_amount,
-            'result': result,
-
+        query = self._dashboard_query('account_move', self._dashboard_states(post))
+        query.where("account_move.type = %s", 'out_invoice')
+        query.where("account_move.invoice_payment_state = %s", 'not_paid')
+        partners, amounts = self._top_partners(
+            query, "account_move.commercial_partner_id = res_partner.commercial_partner_id",
+            "account_move.commercial_partner_id")
+        return {
+            'due_partner': partners,
+            'due_amount': amounts,
+            'result': [],
         }
-        return records
 
     @api.model
+    @cached_widget
     def get_overdues_this_month(self, *post):
 
-        states_arg = ""
-        if post != ('posted',):
-            states_arg = """ state in ('posted', 'draft')"""
-        else:
-            states_arg = """ state = 'posted'"""
-
-        company_id = self.env.company.id
-        self._cr.execute((''' 
-                           select to_char(account_move.date, 'Month') as month, res_partner.name as due_partner, account_move.partner_id as parent,
-                           sum(account_move.amount_total) as amount from account_move, res_partner where account_move.partner_id = res_partner.id
-                           AND account_move.type = 'out_invoice'
-                           AND invoice_payment_state = 'not_paid'
-                           AND %s 
-                           AND Extract(month FROM account_move.invoice_date_due) = Extract(month FROM DATE(NOW()))
-                           AND Extract(YEAR FROM account_move.invoice_date_due) = Extract(YEAR FROM DATE(NOW()))
-                           AND account_move.partner_id = res_partner.commercial_partner_id
-                           AND account_move.company_id = ''' + str(company_id) + '''
-                           group by parent, due_partner, month
-                           order by amount desc ''') % (states_arg))
-
-        record = self._cr.dictfetchall()
-        due_partner = [item['due_partner'] for item in record]
-        due_amount = [item['amount'] for item in record]
-
-        amounts = sum(due_amount[9:])
-        name = due_partner[9:]
-        result = []
-        pre_partner = []
-
-        due_amount = due_amount[:9]
-        due_amount.append(amounts)
-        due_partner = due_partner[:9]
-        due_partner.append("Others")
-        records = {
-            'due_partner': due_partner,
-            'due_amount': due_amount,
-            'result': result,
-
+        query = self._dashboard_query('account_move', self._dashboard_states(post), period='this_month',
+                                      date_column='invoice_date_due')
+        query.where("account_move.type = %s", 'out_invoice')
+        query.where("account_move.invoice_payment_state = %s", 'not_paid')
+        partners, amounts = self._top_partners(
+            query, "account_move.partner_id = res_partner.commercial_partner_id",
+            "account_move.partner_id")
+        return {
+            'due_partner': partners,
+            'due_amount': amounts,
+            'result': [],
         }
-        return records
 
     @api.model
+    @cached_widget
     def get_latebills_this_month(self, *post):
 
-        company_id = self.env.company.id
-
-        partners = self.env['res.partner'].search([('active', '=', True)])
-
-        states_arg = ""
-        if post != ('posted',):
-            states_arg = """ state in ('posted', 'draft')"""
-        else:
-            states_arg = """ state = 'posted'"""
-
-        self._cr.execute((''' 
-                            select to_char(account_move.date, 'Month') as month, res_partner.name as bill_partner, account_move.partner_id as parent,
-                            sum(account_move.amount_total) as amount from account_move, res_partner where account_move.partner_id = res_partner.id
-                            AND account_move.type = 'in_invoice'
-                            AND invoice_payment_state = 'not_paid'
-                            AND %s 
-                            AND Extract(month FROM account_move.invoice_date_due) = Extract(month FROM DATE(NOW()))
-                            AND Extract(YEAR FROM account_move.invoice_date_due) = Extract(YEAR FROM DATE(NOW()))
-                            AND account_move.company_id = ''' + str(company_id) + '''
-                            AND account_move.partner_id = res_partner.commercial_partner_id
-                            group by parent, bill_partner, month
-                            order by amount desc ''') % (states_arg))
-
-        result = self._cr.dictfetchall()
-        bill_partner = [item['bill_partner'] for item in result]
-
-        bill_amount = [item['amount'] for item in result]
-
-        amounts = sum(bill_amount[9:])
-        name = bill_partner[9:]
-        results = []
-        pre_partner = []
-
-        bill_amount = bill_amount[:9]
-        bill_amount.append(amounts)
-        bill_partner = bill_partner[:9]
-        bill_partner.append("Others")
-        records = {
-            'bill_partner': bill_partner,
-            'bill_amount': bill_amount,
-            'result': results,
-
+        query = self._dashboard_query('account_move', self._dashboard_states(post), period='this_month',
+                                      date_column='invoice_date_due')
+        query.where("account_move.type = %s", 'in_invoice')
+        query.where("account_move.invoice_payment_state = %s", 'not_paid')
+        partners, amounts = self._top_partners(
+            query, "account_move.partner_id = res_partner.commercial_partner_id",
+            "account_move.partner_id")
+        return {
+            'bill_partner': partners,
+            'bill_amount': amounts,
+            'result': [],
         }
-        return records
 
     @api.model
+    @cached_widget
     def get_overdues_last_month(self):
 
-        # company_id = self.env.company.id
-
-        one_month_ago = (datetime.now() - relativedelta(months=1)).month
-
-        self._cr.execute(''' select to_char(account_move.date, 'Month') as month, res_partner.name as partner, account_move.partner_id as parent,
-                                    sum(account_move.amount_total) as amount from account_move, res_partner where account_move.partner_id = res_partner.id
-                                    AND account_move.type = 'out_invoice'
-                                    AND invoice_payment_state = 'not_paid'
-                                    AND state = 'posted' AND Extract(month FROM account_move.invoice_date_due) = ''' + str(
-            one_month_ago) + '''
-                                    AND Extract(YEAR FROM account_move.invoice_date_due) = Extract(YEAR FROM DATE(NOW()))
-                                    AND account_move.partner_id = res_partner.commercial_partner_id
-                                    group by parent, partner, month
-                                    order by amount desc ''')
+        query = self._dashboard_query('account_move', ('posted',), period='last_month',
+                                      date_column='invoice_date_due')
+        query.where("account_move.type = %s", 'out_invoice')
+        query.where("account_move.invoice_payment_state = %s", 'not_paid')
+        self._cr.execute('''select to_char(account_move.date, 'Month') as month, res_partner.name as partner, account_move.partner_id as parent, sum(account_move.amount_total) as amount
+                            from account_move
+                            join res_partner on account_move.partner_id = res_partner.id
+                            where account_move.partner_id = res_partner.commercial_partner_id
+                            AND ''' + query.clause + '''
+                            group by parent, partner, month
+                            order by amount desc''', query.params)
 
         record = self._cr.dictfetchall()
         return record
 
     @api.model
+    @cached_widget
     def get_top_10_customers(self, *post):
 
-        company_id = self.env.company.id
-
-        states_arg = ""
-        if post != ('posted',):
-            states_arg = """ state in ('posted', 'draft')"""
-        else:
-            states_arg = """ state = 'posted'"""
-
-
-        self._cr.execute((''' select res_partner.name as customers, account_move.commercial_partner_id as parent, 
-                                sum(account_move.amount_total) as amount from account_move, res_partner
-                                where account_move.commercial_partner_id = res_partner.id
-                                AND account_move.type = 'out_invoice' 
-                                AND %s                         
-                                group by parent, customers
-                                order by amount desc 
-                                limit 10
-                        ''') % (states_arg))
-
-        record_invoice = self._cr.dictfetchall()
-
-        self._cr.execute((''' select res_partner.commercial_company_name as customers, account_move.commercial_partner_id as parent, 
-                                sum(account_move.amount_total) as amount from account_move, res_partner
-                                where account_move.commercial_partner_id = res_partner.id
-                                AND account_move.type = 'out_refund' 
-                                AND %s                         
-                                group by parent, customers
-                                order by amount desc 
-                                limit 10
-                        ''') % (states_arg))
-
-        record_refund = self._cr.dictfetchall()
-
-        summed = []
-        for out_sum in record_invoice:
-            parent = out_sum['parent']
-            su = out_sum['amount'] - \
-                 (list(filter(lambda refund: refund['parent'] == out_sum['parent'], record_refund))[0][
-                      'amount'] if len(
-                     list(filter(lambda refund: refund['parent'] == out_sum['parent'], record_refund))) > 0 else 0.0)
-            summed.append({
-                'customers': out_sum['customers'],
-                'amount': su,
-                'parent': parent
-            })
-
-        return summed
+        query = self._dashboard_query('account_move', self._dashboard_states(post))
+        return self._top_customers(query)
 
     @api.model
+    @cached_widget
     def get_top_10_customers_this_month(self, *post):
 
-        company_id = self.env.company.id
-
-        states_arg = ""
-        if post != ('posted',):
-            states_arg = """ state in ('posted', 'draft')"""
-        else:
-            states_arg = """ state = 'posted'"""
-
-        self._cr.execute((''' select res_partner.name as customers, account_move.commercial_partner_id as parent, 
-                                sum(account_move.amount_total) as amount from account_move, res_partner
-                                where account_move.commercial_partner_id = res_partner.id
-                                AND account_move.type = 'out_invoice' 
-                                AND %s   
-                                AND Extract(month FROM account_move.invoice_date_due) = Extract(month FROM DATE(NOW()))
-                                AND Extract(YEAR FROM account_move.invoice_date_due) = Extract(YEAR FROM DATE(NOW()))                      
-                                group by parent, customers
-                                order by amount desc 
-                                limit 10
-                                ''') % (states_arg))
-
-        record_invoice = self._cr.dictfetchall()
-
-        self._cr.execute((''' select res_partner.name as customers, account_move.commercial_partner_id as parent, 
-                                sum(account_move.amount_total) as amount from account_move, res_partner
-                                where account_move.commercial_partner_id = res_partner.id
-                                AND account_move.type = 'out_refund' 
-                                AND %s      
-                                AND Extract(month FROM account_move.invoice_date_due) = Extract(month FROM DATE(NOW()))
-                                AND Extract(YEAR FROM account_move.invoice_date_due) = Extract(YEAR FROM DATE(NOW()))                   
-                                group by parent, customers
-                                order by amount desc 
-                                limit 10
-                                ''') % (states_arg))
-
-        record_refund = self._cr.dictfetchall()
-
-        summed = []
-        for out_sum in record_invoice:
-            parent = out_sum['parent']
-            su = out_sum['amount'] - \
-                 (list(filter(lambda refund: refund['parent'] == out_sum['parent'], record_refund))[0][
-                      'amount'] if len(
-                     list(filter(lambda refund: refund['parent'] == out_sum['parent'], record_refund))) > 0 else 0.0)
-            summed.append({
-                'customers': out_sum['customers'],
-                'amount': su,
-                'parent': parent
-            })
-
-        return summed
+        query = self._dashboard_query('account_move', self._dashboard_states(post), period='this_month',
+                                      date_column='invoice_date_due')
+        return self._top_customers(query)
 
     @api.model
+    @cached_widget
     def get_top_10_customers_last_month(self, *post):
 
-        company_id = self.env.company.id
-        one_month_ago = (datetime.now() - relativedelta(months=1)).month
-
-        if post != ('posted',):
-            states_arg = """ state in ('posted', 'draft')"""
-        else:
-            states_arg = """ state = 'posted'"""
-
-        self._cr.execute((''' select res_partner.name as customers, account_move.commercial_partner_id as parent, 
-                                sum(account_move.amount_total) as amount from account_move, res_partner
-                                where account_move.commercial_partner_id = res_partner.id
-                                AND account_move.type = 'out_invoice' 
-                                AND %s            
-                                AND Extract(month FROM account_move.invoice_date_due) = ''' + str(one_month_ago) + '''
-                                group by parent, customers
-                                order by amount desc 
-                                limit 10
-                                ''') % (states_arg))
-
-        record_invoice = self._cr.dictfetchall()
-
-        self._cr.execute((''' select res_partner.name as customers, account_move.commercial_partner_id as parent, 
-                                sum(account_move.amount_total) as amount from account_move, res_partner
-                                where account_move.commercial_partner_id = res_partner.id
-                                AND account_move.type = 'out_refund' 
-                                AND %s       
-                                AND Extract(month FROM account_move.invoice_date_due) = ''' + str(one_month_ago) + '''                  
-                                group by parent, customers
-                                order by amount desc 
-                                limit 10
-                                ''') % (states_arg))
-
-        record_refund = self._cr.dictfetchall()
-
-        summed = []
-        for out_sum in record_invoice:
-            parent = out_sum['parent']
-            su = out_sum['amount'] - \
-                 (list(filter(lambda refund: refund['parent'] == out_sum['parent'], record_refund))[0][
-                      'amount'] if len(
-                     list(filter(lambda refund: refund['parent'] == out_sum['parent'], record_refund))) > 0 else 0.0)
-            summed.append({
-                'customers': out_sum['customers'],
-                'amount': su,
-                'parent': parent
-            })
-
-        return summed
+        query = self._dashboard_query('account_move', self._dashboard_states(post), period='last_month',
+                                      date_column='invoice_date_due')
+        return self._top_customers(query)
 
     @api.model
+    @cached_widget
     def get_overdues_this_year(self, *post):
 
-        company_id = self.env.company.id
-        partners = self.env['res.partner'].search([('active', '=', True)])
-
-        states_arg = ""
-        if post != ('posted',):
-            states_arg = """ state in ('posted', 'draft')"""
-        else:
-            states_arg = """ state = 'posted'"""
-
-        self._cr.execute((''' select  res_partner.name as due_partner, account_move.partner_id as parent,
-                                sum(account_move.amount_total) as amount from account_move, res_partner where account_move.partner_id = res_partner.id
-                                AND account_move.type = 'out_invoice'
-                                AND invoice_payment_state = 'not_paid'
-                                AND %s
-                                AND Extract(YEAR FROM account_move.invoice_date_due) = Extract(YEAR FROM DATE(NOW()))
-                                AND account_move.partner_id = res_partner.commercial_partner_id
-                                AND account_move.company_id = ''' + str(company_id) + '''
-
-                                group by parent, due_partner
-                                order by amount desc ''') % (states_arg))
-
-        record = self._cr.dictfetchall()
-        due_partner = [item['due_partner'] for item in record]
-        due_amount = [item['amount'] for item in record]
-
-        amounts = sum(due_amount[9:])
-        name = due_partner[9:]
-        result = []
-        pre_partner = []
-
-        due_amount = due_amount[:9]
-        due_amount.append(amounts)
-        due_partner = due_partner[:9]
-        due_partner.append("Others")
-        records = {
-            'due_partner': due_partner,
-            'due_amount': due_amount,
-            'result': result,
-
+        query = self._dashboard_query('account_move', self._dashboard_states(post), period='this_year',
+                                      date_column='invoice_date_due')
+        query.where("account_move.type = %s", 'out_invoice')
+        query.where("account_move.invoice_payment_state = %s", 'not_paid')
+        partners, amounts = self._top_partners(
+            query, "account_move.partner_id = res_partner.commercial_partner_id",
+            "account_move.partner_id")
+        return {
+            'due_partner': partners,
+            'due_amount': amounts,
+            'result': [],
         }
-        return records
 
     @api.model
+    @cached_widget
     def get_latebills_this_year(self, *post):
 
-        company_id = self.env.company.id
-
-        states_arg = ""
-        if post != ('posted',):
-            states_arg = """ state in ('posted', 'draft')"""
-        else:
-            states_arg = """ state = 'posted'"""
-
-        self._cr.execute((''' select res_partner.name as bill_partner, account_move.partner_id as parent,
-                                sum(account_move.amount_total) as amount from account_move, res_partner where account_move.partner_id = res_partner.id
-                                AND account_move.type = 'in_invoice'
-                                AND invoice_payment_state = 'not_paid'
-                                AND %s
-                                AND Extract(YEAR FROM account_move.invoice_date_due) = Extract(YEAR FROM DATE(NOW()))
-                                AND account_move.partner_id = res_partner.commercial_partner_id
-                                AND account_move.company_id = ''' + str(company_id) + '''
-                                group by parent, bill_partner
-                                order by amount desc ''') % (states_arg))
-
-        result = self._cr.dictfetchall()
-
-        bill_partner = [item['bill_partner'] for item in result]
-
-        bill_amount = [item['amount'] for item in result]
-        amounts = sum(bill_amount[9:])
-        name = bill_partner[9:]
-        results = []
-        pre_partner = []
-
-        bill_amount = bill_amount[:9]
-        bill_amount.append(amounts)
-        bill_partner = bill_partner[:9]
-        bill_partner.append("Others")
-        records = {
-            'bill_partner': bill_partner,
-            'bill_amount': bill_amount,
-            'result': results,
-
+        query = self._dashboard_query('account_move', self._dashboard_states(post), period='this_year',
+                                      date_column='invoice_date_due')
+        query.where("account_move.type = %s", 'in_invoice')
+        query.where("account_move.invoice_payment_state = %s", 'not_paid')
+        partners, amounts = self._top_partners(
+            query, "account_move.partner_id = res_partner.commercial_partner_id",
+            "account_move.partner_id")
+        return {
+            'bill_partner': partners,
+            'bill_amount': amounts,
+            'result': [],
         }
-        return records
 
     @api.model
+    @cached_widget
     def get_overdues_last_year(self):
 
-        # company_id = self.env.company.id
-
-        self._cr.execute(''' select to_char(account_move.date, 'Month') as month, res_partner.name as partner, account_move.partner_id as parent,
-                                sum(account_move.amount_total) as amount from account_move, res_partner where account_move.partner_id = res_partner.id
-                                AND account_move.type = 'out_invoice'
-                                AND invoice_payment_state = 'not_paid'
-                                AND state = 'posted' AND Extract(YEAR FROM account_move.invoice_date_due) = Extract(YEAR FROM DATE(NOW())) - 1
-                                AND account_move.partner_id = res_partner.commercial_partner_id
-                                group by parent, partner, month
-                                order by amount desc ''')
+        query = self._dashboard_query('account_move', ('posted',), period='last_year',
+                                      date_column='invoice_date_due')
+        query.where("account_move.type = %s", 'out_invoice')
+        query.where("account_move.invoice_payment_state = %s", 'not_paid')
+        self._cr.execute('''select to_char(account_move.date, 'Month') as month, res_partner.name as partner, account_move.partner_id as parent, sum(account_move.amount_total) as amount
+                            from account_move
+                            join res_partner on account_move.partner_id = res_partner.id
+                            where account_move.partner_id = res_partner.commercial_partner_id
+                            AND ''' + query.clause + '''
+                            group by parent, partner, month
+                            order by amount desc''', query.params)
 
         record = self._cr.dictfetchall()
         return record
 
-    # function to get total invoice
+    # function to compute dashboard metrics
 
     @api.model
-    def get_total_invoice(self, *post):
-
-        company_id = self.env.company.id
+    def _compute_metrics(self, names, period=None, states=('posted',)):
+        """ Compute the given metrics of DASHBOARD_METRICS for a period and
+        move states, with a single query per source: each metric becomes a
+        ``FILTER (WHERE ...)`` aggregate over the same scan.
+
+        :return: dict mapping each metric name to its value
+        """
+        by_source = {}
+        for name in names:
+            by_source.setdefault(DASHBOARD_METRICS[name][0], []).append(name)
+        result = {}
+        for source, metric_names in by_source.items():
+            spec = DASHBOARD_METRIC_SOURCES[source]
+            query = self._dashboard_query(spec['alias'], states, period=period,
+                                          state_column=spec['state_column'])
+            for condition in spec['where']:
+                query.where(*condition)
+            columns = []
+            params = []
+            matches = []
+            narrow = True
+            for name in metric_names:
+                aggregate, expression, filters = DASHBOARD_METRICS[name][1:]
+                column = '%s(%s)' % (aggregate, expression)
+                if filters:
+                    match = ' AND '.join('%s = %%s' % field
+                                         for field, value in filters)
+                    column += ' FILTER (WHERE %s)' % match
+                    params.extend(value for field, value in filters)
+                    matches.append((match, [value for field, value in filters]))
+                else:
+                    narrow = False
+                columns.append('%s AS %s' % (column, name))
+            # only scan the rows at least one of the metrics aggregates
+            if narrow:
+                query.where('(%s)' % ' OR '.join('(%s)' % match
+                                                 for match, values in matches),
+                            *[value for match, values in matches
+                              for value in values])
+            self._cr.execute('select ' + ', '.join(columns) +
+                             ' from ' + spec['from'] +
+                             ' where ' + query.clause, params + query.params)
+            result.update(self._cr.dictfetchone())
+        return result
 
-        states_arg = ""
-        if post != ('posted',):
-            states_arg = """ state in ('posted', 'draft')"""
-        else:
-            states_arg = """ state = 'posted'"""
+    @api.model
+    def _invoice_totals(self, period, states):
+        metrics = self._compute_metrics([
+            'customer_invoice', 'credit_note', 'supplier_invoice', 'refund',
+            'customer_invoice_paid', 'supplier_invoice_paid',
+            'customer_credit_paid', 'supplier_refund_paid'],
+            period=period, states=states)
+        return (
+            [metrics['customer_invoice']], [metrics['credit_note']],
+            [metrics['supplier_invoice']], [metrics['refund']],
+            [metrics['customer_invoice_paid']],
+            [metrics['supplier_invoice_paid']],
+            [metrics['customer_credit_paid']],
+            [metrics['supplier_refund_paid']],
+        )
 
-        self._cr.execute(('''select sum(amount_total) as customer_invoice from account_move where type ='out_invoice'
-                            AND  %s  AND account_move.company_id = ''' + str(company_id) + '''           
-                        ''') % (states_arg))
-        record_customer = self._cr.dictfetchall()
+    @api.model
+    def _customer_invoice_amount(self, period, states):
+        metrics = self._compute_metrics(['customer_invoice_amount'],
+                                        period=period, states=states)
+        return [{'sum': metrics['customer_invoice_amount']}]
 
-        self._cr.execute(('''select sum(amount_total) as supplier_invoice from account_move where type ='in_invoice' 
-                          AND  %s  AND account_move.company_id = ''' + str(company_id) + '''      
-                        ''') % (states_arg))
-        record_supplier = self._cr.dictfetchall()
+    @api.model
+    def _debit_credit(self, group, period, states):
+        metrics = self._compute_metrics(
+            ['%s_debit' % group, '%s_credit' % group],
+            period=period, states=states)
+        return [{'debit': metrics['%s_debit' % group],
+                 'credit': metrics['%s_credit' % group]}]
 
-        self._cr.execute(('''select sum(amount_total) as credit_note from account_move where type ='out_refund'
-                          AND  %s  AND account_move.company_id = ''' + str(company_id) + '''      
-                        ''') % (states_arg))
-        result_credit_note = self._cr.dictfetchall()
+    @api.model
+    def _profit(self, period, states):
+        metrics = self._compute_metrics(['income_balance', 'expense_balance'],
+                                        period=period, states=states)
+        return [metrics[name] for name in ('income_balance', 'expense_balance')
+                if metrics[name] is not None]
 
-        self._cr.execute(('''select sum(amount_total) as refund from account_move where type ='in_refund'
-                          AND  %s  AND account_move.company_id = ''' + str(company_id) + '''   
-                        ''') % (states_arg))
-        result_refund = self._cr.dictfetchall()
+    @api.model
+    def _unreconciled_count(self, period, states):
+        metrics = self._compute_metrics(['unreconciled_count'],
+                                        period=period, states=states)
+        return [{'count': metrics['unreconciled_count']}]
 
-        customer_invoice = [item['customer_invoice'] for item in record_customer]
-        supplier_invoice = [item['supplier_invoice'] for item in record_supplier]
-        credit_note = [item['credit_note'] for item in result_credit_note]
-        refund = [item['refund'] for item in result_refund]
+    # function to get total invoice
 
-        return customer_invoice, credit_note, supplier_invoice, refund
+    @api.model
+    @cached_widget
+    def get_total_invoice(self, *post):
+        metrics = self._compute_metrics([
+            'customer_invoice_amount', 'credit_note_amount',
+            'supplier_invoice_amount', 'refund_amount'],
+            states=self._dashboard_states(post))
+        return ([metrics['customer_invoice_amount']],
+                [metrics['credit_note_amount']],
+                [metrics['supplier_invoice_amount']],
+                [metrics['refund_amount']])
 
     @api.model
+    @cached_widget
     def get_total_invoice_current_year(self, *post):
-
-        company_id = self.env.company.id
-
-        states_arg = ""
-        if post != ('posted',):
-            states_arg = """ state in ('posted', 'draft')"""
-        else:
-            states_arg = """ state = 'posted'"""
-
-        self._cr.execute(('''select sum(amount_total_signed) as customer_invoice from account_move where type ='out_invoice'
-                            AND   %s                               
-                            AND Extract(YEAR FROM account_move.date) = Extract(YEAR FROM DATE(NOW()))     
-                            AND account_move.company_id = ''' + str(company_id) + '''           
-                        ''') % (states_arg))
-        record_customer_current_year = self._cr.dictfetchall()
-
-        self._cr.execute(('''select sum(-(amount_total_signed)) as supplier_invoice from account_move where type ='in_invoice'
-                            AND  %s                              
-                            AND Extract(YEAR FROM account_move.date) = Extract(YEAR FROM DATE(NOW()))     
-                            AND account_move.company_id = ''' + str(company_id) + '''      
-                        ''') % (states_arg))
-        record_supplier_current_year = self._cr.dictfetchall()
-
-
-        self._cr.execute(('''select sum(-(amount_total_signed)) - sum(-(amount_residual_signed)) as credit_note from account_move where type ='out_refund'
-                            AND  %s                               
-                            AND Extract(YEAR FROM account_move.date) = Extract(YEAR FROM DATE(NOW()))     
-                            AND account_move.company_id = ''' + str(company_id) + '''      
-                        ''') % (states_arg))
-        result_credit_note_current_year = self._cr.dictfetchall()
-
-
-        self._cr.execute(('''select sum(-(amount_total_signed)) as refund from account_move where type ='in_refund'
-                            AND %s                               
-                            AND Extract(YEAR FROM account_move.date) = Extract(YEAR FROM DATE(NOW()))     
-                            AND account_move.company_id = ''' + str(company_id) + '''   
-                        ''') % (states_arg))
-        result_refund_current_year = self._cr.dictfetchall()
-
-
-
-        self._cr.execute(('''select sum(amount_total_signed) - sum(amount_residual_signed)  as customer_invoice_paid from account_move where type ='out_invoice'
-                                    AND   %s
-                                    AND invoice_payment_state = 'paid'
-                                    AND Extract(YEAR FROM account_move.date) = Extract(YEAR FROM DATE(NOW()))
-                                    AND account_move.company_id = ''' + str(company_id) + '''
-                                ''') % (states_arg))
-        record_paid_customer_invoice_current_year = self._cr.dictfetchall()
-
-
-
-
-        self._cr.execute(('''select sum(-(amount_total_signed)) - sum(-(amount_residual_signed))  as supplier_invoice_paid from account_move where type ='in_invoice'
-                                    AND   %s
-                                    AND  invoice_payment_state = 'paid'
-                                    AND Extract(YEAR FROM account_move.date) = Extract(YEAR FROM DATE(NOW()))
-                                    AND account_move.company_id = ''' + str(company_id) + '''
-                                ''') % (states_arg))
-        result_paid_supplier_invoice_current_year = self._cr.dictfetchall()
-
-
-
-        self._cr.execute(('''select sum(-(amount_total_signed)) - sum(-(amount_residual_signed))  as customer_credit_paid from account_move where type ='out_refund'
-                                            AND   %s
-                                            AND invoice_payment_state = 'paid'
-                                            AND Extract(YEAR FROM account_move.date) = Extract(YEAR FROM DATE(NOW()))
-                                            AND account_move.company_id = ''' + str(company_id) + '''
-                                        ''') % (states_arg))
-        record_paid_customer_credit_current_year = self._cr.dictfetchall()
-
-
-
-        self._cr.execute(('''select sum(amount_total_signed) - sum(amount_residual_signed)  as supplier_refund_paid from account_move where type ='in_refund'
-                                            AND   %s
-                                            AND  invoice_payment_state = 'paid'
-                                            AND Extract(YEAR FROM account_move.date) = Extract(YEAR FROM DATE(NOW()))
-                                            AND account_move.company_id = ''' + str(company_id) + '''
-                                        ''') % (states_arg))
-        result_paid_supplier_refund_current_year = self._cr.dictfetchall()
-
-
-
-        customer_invoice_current_year = [item['customer_invoice'] for item in record_customer_current_year]
-        supplier_invoice_current_year = [item['supplier_invoice'] for item in record_supplier_current_year]
-
-        credit_note_current_year = [item['credit_note'] for item in result_credit_note_current_year]
-        refund_current_year = [item['refund'] for item in result_refund_current_year]
-
-        paid_customer_invoice_current_year = [item['customer_invoice_paid'] for item in record_paid_customer_invoice_current_year]
-        paid_supplier_invoice_current_year = [item['supplier_invoice_paid'] for item in result_paid_supplier_invoice_current_year]
-
-        paid_customer_credit_current_year = [item['customer_credit_paid'] for item in record_paid_customer_credit_current_year]
-        paid_supplier_refund_current_year = [item['supplier_refund_paid'] for item in result_paid_supplier_refund_current_year]
-
-
-
-        return customer_invoice_current_year, credit_note_current_year, supplier_invoice_current_year, refund_current_year, paid_customer_invoice_current_year,paid_supplier_invoice_current_year, paid_customer_credit_current_year, paid_supplier_refund_current_year
+        return self._invoice_totals('this_year', self._dashboard_states(post))
 
     @api.model
+    @cached_widget
     def get_total_invoice_current_month(self, *post):
-
-        company_id = self.env.company.id
-
-        states_arg = ""
-        if post != ('posted',):
-            states_arg = """ state in ('posted', 'draft')"""
-        else:
-            states_arg = """ state = 'posted'"""
-
-        self._cr.execute(('''select sum(amount_total_signed) as customer_invoice from account_move where type ='out_invoice'
-                                    AND   %s                               
-                                    AND Extract(month FROM account_move.date) = Extract(month FROM DATE(NOW()))
-                                    AND Extract(YEAR FROM account_move.date) = Extract(YEAR FROM DATE(NOW()))     
-                                    AND account_move.company_id = ''' + str(company_id) + '''           
-                                ''') % (states_arg))
-        record_customer_current_month = self._cr.dictfetchall()
-
-        self._cr.execute(('''select sum(-(amount_total_signed)) as supplier_invoice from account_move where type ='in_invoice'
-                                    AND  %s                              
-                                    AND Extract(month FROM account_move.date) = Extract(month FROM DATE(NOW()))
-                                    AND Extract(YEAR FROM account_move.date) = Extract(YEAR FROM DATE(NOW()))     
-                                    AND account_move.company_id = ''' + str(company_id) + '''      
-                                ''') % (states_arg))
-        record_supplier_current_month = self._cr.dictfetchall()
-
-        self._cr.execute(('''select sum(-(amount_total_signed)) - sum(-(amount_residual_signed)) as credit_note from account_move where type ='out_refund'
-                                    AND  %s                               
-                                    AND Extract(month FROM account_move.date) = Extract(month FROM DATE(NOW()))
-                                    AND Extract(YEAR FROM account_move.date) = Extract(YEAR FROM DATE(NOW()))     
-                                    AND account_move.company_id = ''' + str(company_id) + '''      
-                                ''') % (states_arg))
-        result_credit_note_current_month = self._cr.dictfetchall()
-
-        self._cr.execute(('''select sum(-(amount_total_signed)) as refund from account_move where type ='in_refund'
-                                    AND %s                               
-                                    AND Extract(month FROM account_move.date) = Extract(month FROM DATE(NOW()))
-                                    AND Extract(YEAR FROM account_move.date) = Extract(YEAR FROM DATE(NOW()))     
-                                    AND account_move.company_id = ''' + str(company_id) + '''   
-                                ''') % (states_arg))
-        result_refund_current_month = self._cr.dictfetchall()
-
-        self._cr.execute(('''select sum(amount_total_signed) - sum(amount_residual_signed)  as customer_invoice_paid from account_move where type ='out_invoice'
-                                            AND   %s
-                                            AND Extract(month FROM account_move.date) = Extract(month FROM DATE(NOW()))
-                                            AND Extract(YEAR FROM account_move.date) = Extract(YEAR FROM DATE(NOW()))
-                                            AND account_move.company_id = ''' + str(company_id) + '''
-                                        ''') % (states_arg))
-        record_paid_customer_invoice_current_month = self._cr.dictfetchall()
-
-        self._cr.execute(('''select sum(-(amount_total_signed)) - sum(-(amount_residual_signed))  as supplier_invoice_paid from account_move where type ='in_invoice'
-                                            AND   %s
-                                            AND Extract(month FROM account_move.date) = Extract(month FROM DATE(NOW()))
-                                            AND Extract(YEAR FROM account_move.date) = Extract(YEAR FROM DATE(NOW()))
-                                            AND account_move.company_id = ''' + str(company_id) + '''
-                                        ''') % (states_arg))
-        result_paid_supplier_invoice_current_month = self._cr.dictfetchall()
-
-        self._cr.execute(('''select sum(-(amount_total_signed)) - sum(-(amount_residual_signed))  as customer_credit_paid from account_move where type ='out_refund'
-                                                    AND   %s
-                                                    AND invoice_payment_state = 'paid'
-                                                    AND Extract(month FROM account_move.date) = Extract(month FROM DATE(NOW()))
-                                                    AND Extract(YEAR FROM account_move.date) = Extract(YEAR FROM DATE(NOW()))
-                                                    AND account_move.company_id = ''' + str(company_id) + '''
-                                                ''') % (states_arg))
-        record_paid_customer_credit_current_month = self._cr.dictfetchall()
-
-        self._cr.execute(('''select sum(amount_total_signed) - sum(amount_residual_signed)  as supplier_refund_paid from account_move where type ='in_refund'
-                                                    AND   %s
-                                                    AND  invoice_payment_state = 'paid'
-                                                    AND Extract(month FROM account_move.date) = Extract(month FROM DATE(NOW()))
-                                                    AND Extract(YEAR FROM account_move.date) = Extract(YEAR FROM DATE(NOW()))
-                                                    AND account_move.company_id = ''' + str(company_id) + '''
-                                                ''') % (states_arg))
-        result_paid_supplier_refund_current_month = self._cr.dictfetchall()
-
-        customer_invoice_current_month = [item['customer_invoice'] for item in record_customer_current_month]
-        supplier_invoice_current_month = [item['supplier_invoice'] for item in record_supplier_current_month]
-        credit_note_current_month = [item['credit_note'] for item in result_credit_note_current_month]
-        refund_current_month = [item['refund'] for item in result_refund_current_month]
-        paid_customer_invoice_current_month = [item['customer_invoice_paid'] for item in record_paid_customer_invoice_current_month]
-        paid_supplier_invoice_current_month = [item['supplier_invoice_paid'] for item in result_paid_supplier_invoice_current_month]
-
-        paid_customer_credit_current_month = [item['customer_credit_paid'] for item in record_paid_customer_credit_current_month]
-        paid_supplier_refund_current_month = [item['supplier_refund_paid'] for item in result_paid_supplier_refund_current_month]
-
-        return customer_invoice_current_month, credit_note_current_month, supplier_invoice_current_month, refund_current_month, paid_customer_invoice_current_month, paid_supplier_invoice_current_month, paid_customer_credit_current_month, paid_supplier_refund_current_month
+        return self._invoice_totals('this_month', self._dashboard_states(post))
 
     @api.model
+    @cached_widget
     def get_total_invoice_this_month(self, *post):
-
-        company_id = self.env.company.id
-
-        states_arg = ""
-        if post != ('posted',):
-            states_arg = """ state in ('posted', 'draft')"""
-        else:
-            states_arg = """ state = 'posted'"""
-
-        self._cr.execute(('''select sum(amount_total) from account_move where type = 'out_invoice' 
-                            AND %s
-                            AND Extract(month FROM account_move.date) = Extract(month FROM DATE(NOW()))      
-                            AND Extract(YEAR FROM account_move.date) = Extract(YEAR FROM DATE(NOW()))   
-                            AND account_move.company_id = ''' + str(company_id) + '''
-                            ''') % (states_arg))
-        record = self._cr.dictfetchall()
-        return record
+        return self._customer_invoice_amount('this_month',
+                                             self._dashboard_states(post))
 
     # function to get total invoice last month
 
     @api.model
+    @cached_widget
     def get_total_invoice_last_month(self):
-
-        one_month_ago = (datetime.now() - relativedelta(months=1)).month
-
-        self._cr.execute('''select sum(amount_total) from account_move where type = 'out_invoice' AND
-                               account_move.state = 'posted'
-                            AND Extract(month FROM account_move.date) = ''' + str(one_month_ago) + ''' 
-                            ''')
-        record = self._cr.dictfetchall()
-        return record
+        return self._customer_invoice_amount('last_month', ('posted',))
 
     # function to get total invoice last year
 
     @api.model
+    @cached_widget
     def get_total_invoice_last_year(self):
-
-        self._cr.execute(''' select sum(amount_total) from account_move where type = 'out_invoice' 
-                            AND account_move.state = 'posted'
-                            AND Extract(YEAR FROM account_move.date) = Extract(YEAR FROM DATE(NOW())) - 1    
-                                ''')
-        record = self._cr.dictfetchall()
-        return record
+        return self._customer_invoice_amount('last_year', ('posted',))
 
     # function to get total invoice this year
 
     @api.model
+    @cached_widget
     def get_total_invoice_this_year(self):
-
-        company_id = self.env.company.id
-
-        self._cr.execute(''' select sum(amount_total) from account_move where type = 'out_invoice'
-                            AND Extract(YEAR FROM account_move.date) = Extract(YEAR FROM DATE(NOW())) AND
-                               account_move.state = 'posted'   AND
-                                account_move.company_id = ''' + str(company_id) + '''
-                                    ''')
-        record = self._cr.dictfetchall()
-        return record
+        return self._customer_invoice_amount('this_year', ('posted',))
 
     # function to get unreconcile items
 
     @api.model
+    @cached_widget
     def unreconcile_items(self):
-        self._cr.execute('''
-                            select count(*) FROM account_move_line l,account_account a
-                            where L.account_id=a.id AND l.full_reconcile_id IS NULL AND 
-                            l.balance != 0 AND a.reconcile IS TRUE ''')
-        record = self._cr.dictfetchall()
-        return record
+        return self._unreconciled_count(None, ('posted', 'draft'))
 
     # function to get unreconcile items this month
 
     @api.model
+    @cached_widget
     def unreconcile_items_this_month(self, *post):
-
-        company_id = self.env.company.id
-
-        states_arg = ""
-        if post != ('posted',):
-            states_arg = """ parent_state in ('posted', 'draft')"""
-        else:
-            states_arg = """ parent_state = 'posted'"""
-
-        qry = ''' select count(*) FROM account_move_line l,account_account a
-                              where Extract(month FROM l.date) = Extract(month FROM DATE(NOW())) AND
-                              Extract(YEAR FROM l.date) = Extract(YEAR FROM DATE(NOW())) AND
-                              L.account_id=a.id AND l.full_reconcile_id IS NULL AND 
-                              l.balance != 0 AND a.reconcile IS F 
-                              AND l.'''+states_arg+'''
-                              AND  l.company_id = ''' + str(company_id) + '''                              
-                               '''
-
-
-        self._cr.execute((''' select count(*) FROM account_move_line l,account_account a
-                              where Extract(month FROM l.date) = Extract(month FROM DATE(NOW())) AND
-                              Extract(YEAR FROM l.date) = Extract(YEAR FROM DATE(NOW())) AND
-                              L.account_id=a.id AND l.full_reconcile_id IS NULL AND 
-                              l.balance != 0 AND a.reconcile IS TRUE 
-                              AND l.%s
-                              AND  l.company_id = ''' + str(company_id) + '''                              
-                               ''') % (states_arg))
-        record = self._cr.dictfetchall()
-        return record
-
+        return self._unreconciled_count('this_month',
+                                        self._dashboard_states(post))
 
     # function to get unreconcile items last month
 
     @api.model
+    @cached_widget
     def unreconcile_items_last_month(self):
-
-        one_month_ago = (datetime.now() - relativedelta(months=1)).month
-
-        self._cr.execute('''  select count(*) FROM account_move_line l,account_account a 
-                              where Extract(month FROM l.date) = ''' + str(one_month_ago) + ''' AND
-                              L.account_id=a.id AND l.full_reconcile_id IS NULL AND l.balance != 0 AND a.reconcile IS TRUE 
-                         ''')
-        record = self._cr.dictfetchall()
-        return record
+        return self._unreconciled_count('last_month', ('posted',))
 
     # function to get unreconcile items this year
 
     @api.model
+    @cached_widget
     def unreconcile_items_this_year(self, *post):
-
-        company_id = self.env.company.id
-
-        states_arg = ""
-        if post != ('posted',):
-            states_arg = """ parent_state in ('posted', 'draft')"""
-        else:
-            states_arg = """ parent_state = 'posted'"""
-
-        self._cr.execute(('''  select count(*) FROM account_move_line l,account_account a
-                                  where Extract(year FROM l.date) = Extract(year FROM DATE(NOW())) AND
-                                  L.account_id=a.id AND l.full_reconcile_id IS NULL AND 
-                                  l.balance != 0 AND a.reconcile IS TRUE  
-                                  AND l.%s
-                                  AND  l.company_id = ''' + str(company_id) + '''       
-                                  ''') % (states_arg))
-        record = self._cr.dictfetchall()
-        return record
+        return self._unreconciled_count('this_year',
+                                        self._dashboard_states(post))
 
     # function to get unreconcile items last year
 
     @api.model
+    @cached_widget
     def unreconcile_items_last_year(self):
-
-        self._cr.execute('''  select count(*) FROM account_move_line l,account_account a
-                                      where Extract(year FROM l.date) = Extract(year FROM DATE(NOW())) - 1 AND
-                                      L.account_id=a.id AND l.full_reconcile_id IS NULL AND 
-                                      l.balance != 0 AND a.reconcile IS TRUE
-                                      ''')
-        record = self._cr.dictfetchall()
-        return record
+        return self._unreconciled_count('last_year', ('posted',))
 
     # function to get total income
 
     @api.model
+    @cached_widget
     def month_income(self):
-
-        self._cr.execute(''' select sum(debit) as debit , sum(credit) as credit  from account_move, account_account,account_move_line
-                            where  account_move.type = 'entry'  AND account_move.state = 'posted' AND  account_move_line.account_id=account_account.id AND
-                             account_account.internal_group='income'
-                              AND to_char(DATE(NOW()), 'MM') = to_char(account_move_line.date, 'MM')
-                              ''')
-        record = self._cr.dictfetchall()
-        return record
+        return self._debit_credit('entry_income', 'this_month', ('posted',))
 
     # function to get total income this month
 
     @api.model
+    @cached_widget
     def month_income_this_month(self, *post):
-
-        company_id = self.env.company.id
-
-        states_arg = ""
-        if post != ('posted',):
-            states_arg = """ parent_state in ('posted', 'draft')"""
-        else:
-            states_arg = """ parent_state = 'posted'"""
-
-        self._cr.execute(('''select sum(debit) as debit, sum(credit) as credit from account_account, account_move_line where
-                            account_move_line.account_id = account_account.id AND account_account.internal_group = 'income'
-                           AND %s
-                           AND Extract(month FROM account_move_line.date) = Extract(month FROM DATE(NOW())) 
-                           AND Extract(year FROM account_move_line.date) = Extract(year FROM DATE(NOW())) 
-                           AND account_move_line.company_id = ''' + str(company_id) + ''' 
-
-                                 ''') % (states_arg))
-        record = self._cr.dictfetchall()
-        return record
+        return self._debit_credit('income', 'this_month',
+                                  self._dashboard_states(post))
 
     @api.model
+    @cached_widget
     def profit_income_this_month(self, *post):
-
-        company_id = self.env.company.id
-
-        states_arg = ""
-        if post != ('posted',):
-            states_arg = """ parent_state in ('posted', 'draft')"""
-        else:
-            states_arg = """ parent_state = 'posted'"""
-
-        self._cr.execute(('''select sum(debit) - sum(credit) as profit, account_account.internal_group from  account_account, account_move_line where 
-                                  
-                                    account_move_line.account_id = account_account.id AND
-                                    %s AND
-                                    (account_account.internal_group = 'income' or    
-                                    account_account.internal_group = 'expense' ) 
-                                    AND Extract(month FROM account_move_line.date) = Extract(month FROM DATE(NOW())) 
-                                    AND Extract(year FROM account_move_line.date) = Extract(year FROM DATE(NOW()))   
-                                    AND account_move_line.company_id = ''' + str(company_id) + '''        
-                                    group by internal_group 
-                                     ''') %(states_arg))
-        income = self._cr.dictfetchall()
-        profit = [item['profit'] for item in income]
-        internal_group = [item['internal_group'] for item in income]
-        net_profit = True
-        loss = True
-        if profit and profit == 0:
-            if (-profit[1]) > (profit[0]):
-                net_profit = -profit[1] - profit[0]
-            elif (profit[1]) > (profit[0]):
-                net_profit = -profit[1] - profit[0]
-            else:
-                net_profit = -profit[1] - profit[0]
-
-        return profit
+        return self._profit('this_month', self._dashboard_states(post))
 
     @api.model
+    @cached_widget
     def profit_income_this_year(self, *post):
-
-        company_id = self.env.company.id
-
-        states_arg = ""
-        if post != ('posted',):
-            states_arg = """ parent_state in ('posted', 'draft')"""
-        else:
-            states_arg = """ parent_state = 'posted'"""
-
-        self._cr.execute(('''select sum(debit) - sum(credit) as profit, account_account.internal_group from  account_account, account_move_line where 
-                                        
-                                         account_move_line.account_id = account_account.id AND
-                                         %s AND
-                                        (account_account.internal_group = 'income' or    
-                                        account_account.internal_group = 'expense' )                                       
-                                        AND Extract(year FROM account_move_line.date) = Extract(year FROM DATE(NOW()))  
-                                        AND account_move_line.company_id = ''' + str(company_id) + '''           
-                                        group by internal_group 
-                                         ''') %(states_arg))
-        income = self._cr.dictfetchall()
-        profit = [item['profit'] for item in income]
-        internal_group = [item['internal_group'] for item in income]
-        net_profit = True
-        loss = True
-
-        if profit and profit == 0:
-            if (-profit[1]) > (profit[0]):
-                net_profit = -profit[1] - profit[0]
-            elif (profit[1]) > (profit[0]):
-                net_profit = -profit[1] - profit[0]
-            else:
-                net_profit = -profit[1] - profit[0]
-
-        return profit
+        return self._profit('this_year', self._dashboard_states(post))
 
     @api.model
+    @cached_widget
     def profit_income_last_year(self, *post):
-
-        company_id = self.env.company.id
-
-        states_arg = ""
-        if post != ('posted',):
-            states_arg = """ parent_state in ('posted', 'draft')"""
-        else:
-            states_arg = """ parent_state = 'posted'"""
-
-        self._cr.execute('''select sum(debit) - sum(credit) as profit, account_account.internal_group from  account_account, account_move_line where 
-                            
-                            account_move_line.account_id = account_account.id AND
-                            %s AND
-                            (account_account.internal_group = 'income' or    
-                            account_account.internal_group = 'expense' )                                       
-                            AND Extract(year FROM account_move_line.date) = Extract(year FROM DATE(NOW())) - 1
-                            AND account_move_line.company_id = ''' + str(company_id) + '''           
-                            group by internal_group 
-                             ''')
-        income = self._cr.dictfetchall()
-        profit = [item['profit'] for item in income]
-        internal_group = [item['internal_group'] for item in income]
-        net_profit = True
-        loss = True
-
-        if profit and profit == 0:
-            if (-profit[1]) > (profit[0]):
-                net_profit = -profit[1] - profit[0]
-            elif (profit[1]) > (profit[0]):
-                net_profit = -profit[1] - profit[0]
-            else:
-                net_profit = -profit[1] - profit[0]
-
-        return profit
+        return self._profit('last_year', self._dashboard_states(post))
 
     # function to get total income last month
 
     @api.model
+    @cached_widget
     def month_income_last_month(self):
-
-        one_month_ago = (datetime.now() - relativedelta(months=1)).month
-
-        self._cr.execute('''
-                            select sum(debit) as debit, sum(credit) as credit from  account_account, 
-        account_move_line where 
-         account_move_line.account_id = account_account.id 
-        AND account_account.internal_group = 'income' AND 
-        account_move_line.parent_state = 'posted'  
-        AND Extract(month FROM account_move_line.date) = ''' + str(one_month_ago) + '''
-        ''')
-
-        record = self._cr.dictfetchall()
-
-        return record
+        return self._debit_credit('income', 'last_month', ('posted',))
 
     # function to get total income this year
 
     @api.model
+    @cached_widget
     def month_income_this_year(self, *post):
-
-        company_id = self.env.company.id
-
-        states_arg = ""
-        if post != ('posted',):
-            states_arg = """ parent_state in ('posted', 'draft')"""
-        else:
-            states_arg = """ parent_state = 'posted'"""
-
-        self._cr.execute((''' select sum(debit) as debit, sum(credit) as credit from account_account, account_move_line where                           
-                             account_move_line.account_id = account_account.id AND account_account.internal_group = 'income'
-                             AND %s
-                          AND Extract(YEAR FROM account_move_line.date) = Extract(YEAR FROM DATE(NOW())) 
-                          AND account_move_line.company_id = ''' + str(company_id) + '''
-                        ''') % (states_arg))
-        record = self._cr.dictfetchall()
-        return record
+        return self._debit_credit('income', 'this_year',
+                                  self._dashboard_states(post))
 
     # function to get total income last year
 
     @api.model
+    @cached_widget
     def month_income_last_year(self):
-
-        self._cr.execute(''' select sum(debit) as debit, sum(credit) as credit from  account_account, account_move_line where
-                            account_move_line.parent_state = 'posted' 
-                            AND  account_move_line.account_id = account_account.id AND account_account.internal_group = 'income'
-                            AND Extract(YEAR FROM account_move_line.date) = Extract(YEAR FROM DATE(NOW())) - 1
-                         ''')
-        record = self._cr.dictfetchall()
-        return record
+        return self._debit_credit('income', 'last_year', ('posted',))
 
     # function to get currency
 
@@ -1703,91 +1396,41 @@ class DashBoard(models.Model):
     # function to get total expense
 
     @api.model
+    @cached_widget
     def month_expense(self):
-
-        self._cr.execute(''' select sum(debit) as debit , sum(credit) as credit from account_move, account_account,account_move_line
-                            where account_move.type = 'entry'  AND account_move.state = 'posted' AND   account_move_line.account_id=account_account.id AND
-                             account_account.internal_group='expense' 
-                             AND to_char(DATE(NOW()), 'MM') = to_char(account_move_line.date, 'MM')
-                             ''')
-        record = self._cr.dictfetchall()
-        return record
+        return self._debit_credit('entry_expense', 'this_month', ('posted',))
 
     # function to get total expense this month
 
     @api.model
+    @cached_widget
     def month_expense_this_month(self, *post):
-
-        company_id = self.env.company.id
-
-        states_arg = ""
-        if post != ('posted',):
-            states_arg = """ parent_state in ('posted', 'draft')"""
-        else:
-            states_arg = """ parent_state = 'posted'"""
-
-        self._cr.execute((''' select sum(debit) as debit, sum(credit) as credit from  account_account, account_move_line where 
-                        
-                            account_move_line.account_id = account_account.id AND account_account.internal_group = 'expense' AND  
-                            %s                
-                            AND Extract(month FROM account_move_line.date) = Extract(month FROM DATE(NOW()))
-                            AND Extract(year FROM account_move_line.date) = Extract(year FROM DATE(NOW())) 
-                            AND account_move_line.company_id = ''' + str(company_id) + '''
-
-
-                                 ''') %(states_arg))
-        record = self._cr.dictfetchall()
-        return record
-
-
+        return self._debit_credit('expense', 'this_month',
+                                  self._dashboard_states(post))
 
     # function to get total expense this year
 
     @api.model
+    @cached_widget
     def month_expense_this_year(self, *post):
-
-        company_id = self.env.company.id
-
-
-        states_arg = ""
-        if post != ('posted',):
-            states_arg = """ parent_state in ('posted', 'draft')"""
-        else:
-            states_arg = """ parent_state = 'posted'"""
-
-        self._cr.execute((''' select sum(debit) as debit, sum(credit) as credit from  account_account, account_move_line where
-                        
-                            account_move_line.account_id = account_account.id AND account_account.internal_group = 'expense' AND  
-                            %s                         
-                            AND Extract(YEAR FROM account_move_line.date) = Extract(YEAR FROM DATE(NOW())) 
-                            AND account_move_line.company_id = ''' + str(company_id) + '''
-
-
-
-                            ''') % (states_arg))
-        record = self._cr.dictfetchall()
-        return record
+        return self._debit_credit('expense', 'this_year',
+                                  self._dashboard_states(post))
 
     @api.model
+    @cached_widget
     def bank_balance(self, *post):
 
-        company_id = self.env.company.id
-
-        states_arg = ""
-        if post != ('posted',):
-            states_arg = """ parent_state = 'posted'"""
-        else:
-            states_arg = """ parent_state in ('posted', 'draft')"""
-
-        self._cr.execute((''' select account_account.name as name, sum(balance) as balance from account_move_line left join
-                            account_account on account_account.id = account_move_line.account_id join
-                            account_account_type on account_account_type.id = account_account.user_type_id
-                            where account_account_type.name = 'Bank and Cash'
-                            AND %s
-                            AND account_move_line.company_id = ''' + str(company_id) + '''
-                            group by account_account.name
-                                                   
-                            ''') % (states_arg))
+        # unlike the other widgets, the bank balances include the draft
+        # entries when the 'posted' filter is given
+        states = ('posted', 'draft') if post == ('posted',) else ('posted',)
+        query = self._dashboard_query('account_move_line', states,
+                                      state_column='parent_state')
+        query.where("account_account_type.name = %s", 'Bank and Cash')
+        self._cr.execute('''select account_account.name as name, sum(balance) as balance from account_move_line
+                            left join account_account on account_account.id = account_move_line.account_id
+                            join account_account_type on account_account_type.id = account_account.user_type_id
+                            where ''' + query.clause + '''
+                            group by account_account.name''', query.params)
 
         record = self._cr.dictfetchall()
 
@@ -1802,5 +1445,175 @@ class DashBoard(models.Model):
         }
         return records
 
+    # function to get every widget of the dashboard in a single call
+
+    @api.model
+    def get_dashboard_bundle(self, period='this_month', states=False):
+        """ Compute all the widgets shown by the dashboard for the given
+        period in one request, so that the client needs a single round
+        trip (and the server a single transaction) instead of one rpc per
+        widget. The result is keyed by the name of the widget method.
+
+        The bundle stored by the pre-warming cron is returned when there is
+        one for the current company."""
+        bundle = self.env['account.dashboard.bundle']._fetch(
+            self.env.company.id, period, self._dashboard_states((states,)))
+        if bundle is None:
+            bundle = self._compute_dashboard_bundle(period, states)
+        return bundle
+
+    @api.model
+    def _compute_dashboard_bundle(self, period, states, profile=None):
+        """ Compute the widgets of the dashboard for the given period.
+
+        :param profile: optional dict, filled with the statistics of
+            :func:`profile_dashboard` of each widget, keyed by method
+        """
+        if profile is None and self.env['ir.config_parameter'].sudo().get_param(
+                'base_accounting_kit.dashboard_profile'):
+            profile = {}
+        widgets = DASHBOARD_WIDGETS + DASHBOARD_PERIOD_WIDGETS.get(period, [])
+        bundle = {}
+        for method, takes_states in widgets:
+            args = (states,) if takes_states else ()
+            if profile is None:
+                bundle[method] = getattr(self, method)(*args)
+                continue
+            with profile_dashboard(self.env) as stats:
+                bundle[method] = getattr(self, method)(*args)
+            profile[method] = stats
+            _logger.info("dashboard %s: %s queries, %s rows, %s records, "
+                         "%s ms", method, stats['queries'], stats['rows'],
+                         stats['records'], stats['time'])
+        return bundle
+
+    @api.model
+    def get_dashboard_profile(self, period='this_month', states=False):
+        """ Profiling mode of the dashboard: compute every widget without
+        the widget cache and return, per widget method, the number of SQL
+        queries, the rows they fetched, the records loaded in the ORM cache
+        and the time spent."""
+        profile = {}
+        self.with_context(dashboard_no_cache=True)._compute_dashboard_bundle(
+            period, states, profile=profile)
+        return profile
+
+    @api.model
+    def _prewarm_dashboard(self):
+        """ Compute and store the dashboard bundles of the current company,
+        for every period and both state filters of the dashboard."""
+        company_id = self.env.company.id
+        # the widget cache of this process may predate postings made by
+        # other workers
+        dashboard_cache.invalidate(self._cr.dbname, [company_id])
+        stored = self.env['account.dashboard.bundle']
+        for states in ('posted', False):
+            for period in DASHBOARD_PERIOD_WIDGETS:
+                bundle = self._compute_dashboard_bundle(period, states)
+                stored._store(company_id, period,
+                              self._dashboard_states((states,)), bundle)
+
+    # function to export the series behind the dashboard charts
 
+    @api.model
+    def _check_dashboard_export(self, series, file_format, company_ids):
+        """ Validate an export request and return the companies it covers,
+        restricted to the companies of the current user."""
+        if not self.env.user.has_group('account.group_account_user'):
+            raise AccessError(_("Only accountants can export the dashboard "
+                                "series."))
+        if series not in DASHBOARD_EXPORT_SERIES:
+            raise UserError(_("Unknown dashboard series %s.") % series)
+        if file_format not in ('csv', 'xlsx'):
+            raise UserError(_("Unsupported export format %s.") % file_format)
+        allowed = self.env.user.company_ids.ids
+        company_ids = [company_id for company_id in company_ids or allowed
+                       if company_id in allowed]
+        if not company_ids:
+            raise AccessError(_("You have no access to these companies."))
+        return company_ids
+
+    @api.model
+    def _dashboard_export_rows(self, series, company_ids, date_from, date_to):
+        """ Yield the rows of a dashboard series, read through a server
+        side cursor so that only EXPORT_ITERSIZE rows are held in memory
+        at any time."""
+        query = DASHBOARD_EXPORT_SERIES[series][1]
+        cursor = self._cr._cnx.cursor('dashboard_export_%s' % uuid.uuid4().hex)
+        cursor.itersize = EXPORT_ITERSIZE
+        try:
+            cursor.execute(query, [tuple(company_ids), date_from, date_to])
+            for row in cursor:
+                yield row
+        finally:
+            cursor.close()
 
+    @api.model
+    def _dashboard_export_stream(self, series, file_format, company_ids,
+                                 date_from, date_to):
+        """ Yield the export of a dashboard series as chunks of bytes.
+
+        CSV chunks are written as the rows come from the cursor. An XLSX
+        file can only be produced once complete, so it is written row by
+        row to a temporary file by xlsxwriter in constant memory mode and
+        then streamed from disk.
+        """
+        header = DASHBOARD_EXPORT_SERIES[series][0]
+        rows = self._dashboard_export_rows(series, company_ids, date_from,
+                                           date_to)
+        if file_format == 'csv':
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            writer.writerow(header)
+            for index, row in enumerate(rows, 1):
+                writer.writerow(row)
+                if index % EXPORT_ITERSIZE == 0:
+                    yield buffer.getvalue().encode('utf-8')
+                    buffer.seek(0)
+                    buffer.truncate()
+            yield buffer.getvalue().encode('utf-8')
+            return
+        handle, path = tempfile.mkstemp(suffix='.xlsx')
+        os.close(handle)
+        try:
+            workbook = xlsxwriter.Workbook(path, {'constant_memory': True,
+                                                  'default_date_format':
+                                                      'yyyy-mm-dd'})
+            sheet = workbook.add_worksheet(series)
+            bold = workbook.add_format({'bold': True})
+            sheet.write_row(0, 0, header, bold)
+            for index, row in enumerate(rows, 1):
+                sheet.write_row(index, 0, row)
+            workbook.close()
+            with open(path, 'rb') as export:
+                chunk = export.read(io.DEFAULT_BUFFER_SIZE * 8)
+                while chunk:
+                    yield chunk
+                    chunk = export.read(io.DEFAULT_BUFFER_SIZE * 8)
+        finally:
+            os.unlink(path)
+
+
+class DashboardMoveLine(models.Model):
+    _inherit = 'account.move.line'
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        lines = super(DashboardMoveLine, self).create(vals_list)
+        lines._dashboard_lines_changed()
+        return lines
+
+    def write(self, vals):
+        res = super(DashboardMoveLine, self).write(vals)
+        if DASHBOARD_LINE_FIELDS.intersection(vals):
+            self._dashboard_lines_changed()
+        return res
+
+    def unlink(self):
+        company_ids = set(self.mapped('company_id').ids)
+        res = super(DashboardMoveLine, self).unlink()
+        self.env['account.move']._dashboard_invalidate(company_ids)
+        return res
+
+    def _dashboard_lines_changed(self):
+        self.mapped('move_id')._dashboard_moves_changed()
@@ -0,0 +1,228 @@
+# -*- coding: utf-8 -*-
+#############################################################################
+#
+#    Cybrosys Technologies Pvt. Ltd.
+#
+#    Copyright (C) 2019-TODAY Cybrosys Technologies(<https://www.cybrosys.com>)
+#    Author: Cybrosys Techno Solutions(<https://www.cybrosys.com>)
+#
+#    You can modify it under the terms of the GNU LESSER
+#    GENERAL PUBLIC LICENSE (LGPL v3), Version 3.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU LESSER GENERAL PUBLIC LICENSE (LGPL v3) for more details.
+#
+#    You should have received a copy of the GNU LESSER GENERAL PUBLIC LICENSE
+#    (LGPL v3) along with this program.
+#    If not, see <http://www.gnu.org/licenses/>.
+#
+#############################################################################
+
+import logging
+import weakref
+from contextlib import contextmanager
+
+from odoo import api, fields, models, tools
+
+_logger = logging.getLogger(__name__)
+
+# fields of the journal items and of the journal entries the aggregate
+# rows are computed from
+AGGREGATE_LINE_FIELDS = {'company_id', 'account_id', 'move_id', 'date',
+                         'parent_state', 'debit', 'credit', 'balance'}
+AGGREGATE_MOVE_FIELDS = {'company_id', 'date', 'state'}
+
+# journal items whose contribution has been taken out of the aggregate by a
+# change still in progress, per cursor: nested changes of the same items
+# (e.g. the writes made by post()) leave them to the outermost one
+_pending_lines = weakref.WeakKeyDictionary()
+
+
+class AccountDashboardAggregate(models.Model):
+    """ Daily debit/credit totals of the income and expense accounts, per
+    company and move state. The dashboard income/expense series read from
+    this table instead of scanning account_move_line, so their cost does
+    not grow with the number of journal items.
+
+    The rows are kept up to date with signed deltas: a change of journal
+    items takes their old contribution out of the rows of their old day
+    and state and adds the new one to the rows of their new day and state,
+    with upserts that only touch these rows. Draft entries are thus counted
+    as soon as they are saved."""
+    _name = 'account.dashboard.aggregate'
+    _description = 'Dashboard Income/Expense Aggregate'
+    _order = 'date'
+
+    company_id = fields.Many2one('res.company', string='Company',
+                                 index=True, readonly=True)
+    internal_group = fields.Char(string='Internal Group', index=True,
+                                 readonly=True)
+    date = fields.Date(string='Date', index=True, readonly=True)
+    parent_state = fields.Char(string='Status', readonly=True)
+    debit = fields.Float(string='Debit', readonly=True)
+    credit = fields.Float(string='Credit', readonly=True)
+
+    _sql_constraints = [
+        ('bucket_uniq',
+         'unique(company_id, internal_group, date, parent_state)',
+         'A dashboard aggregate already exists for this company, group, '
+         'date and state.'),
+    ]
+
+    def init(self):
+        tools.create_index(self._cr, 'account_dashboard_aggregate_lookup_index',
+                           self._table,
+                           ['company_id', 'internal_group', 'parent_state',
+                            'date'])
+
+    def _flush_lines(self):
+        self.env['account.account'].flush(['internal_group'])
+        self.env['account.move.line'].flush(
+            ['company_id', 'date', 'parent_state', 'debit', 'credit',
+             'account_id'])
+
+    @api.model
+    def _apply(self, line_ids, sign):
+        """ Add (``sign`` = 1) or take out (``sign`` = -1) the current
+        contribution of the given journal items."""
+        if not line_ids:
+            return
+        self._flush_lines()
+        # the buckets are locked in a fixed order, so that concurrent
+        # postings wait for each other instead of deadlocking
+        self._cr.execute('''
+            INSERT INTO account_dashboard_aggregate
+                (company_id, internal_group, date, parent_state,
+                 debit, credit)
+            SELECT l.company_id, a.internal_group, l.date, l.parent_state,
+                   %s * SUM(l.debit), %s * SUM(l.credit)
+            FROM account_move_line l
+            JOIN account_account a ON a.id = l.account_id
+            WHERE l.id IN %s
+              AND a.internal_group IN ('income', 'expense')
+              AND l.parent_state IS NOT NULL
+            GROUP BY l.company_id, a.internal_group, l.date, l.parent_state
+            ORDER BY l.company_id, a.internal_group, l.date, l.parent_state
+            ON CONFLICT (company_id, internal_group, date, parent_state)
+            DO UPDATE SET
+                debit = account_dashboard_aggregate.debit + EXCLUDED.debit,
+                credit = account_dashboard_aggregate.credit + EXCLUDED.credit
+        ''', [sign, sign, tuple(line_ids)])
+        self.invalidate_cache()
+
+    @contextmanager
+    def _track_lines(self, lines):
+        """ Context manager moving the contribution of ``lines`` from their
+        day and state before the block to their day and state after it.
+        Lines deleted by the block are only taken out."""
+        pending = _pending_lines.setdefault(self._cr, set())
+        owned = set(lines.ids) - pending
+        self._apply(owned, -1)
+        pending |= owned
+        try:
+            yield
+        finally:
+            pending -= owned
+        self._apply(owned, 1)
+
+    @api.model
+    def _reconcile(self):
+        """ Compare the aggregate with the journal items and rewrite the
+        buckets that differ, one by one; the buckets that agree are not
+        touched, so that the check does not conflict with concurrent
+        postings. Return the number of buckets rewritten."""
+        self._flush_lines()
+        self._cr.execute('''
+            WITH expected AS (
+                SELECT l.company_id, a.internal_group, l.date,
+                       l.parent_state, SUM(l.debit) AS debit,
+                       SUM(l.credit) AS credit
+                FROM account_move_line l
+                JOIN account_account a ON a.id = l.account_id
+                WHERE a.internal_group IN ('income', 'expense')
+                  AND l.parent_state IS NOT NULL
+                GROUP BY l.company_id, a.internal_group, l.date,
+                         l.parent_state
+            )
+            SELECT COALESCE(e.company_id, g.company_id),
+                   COALESCE(e.internal_group, g.internal_group),
+                   COALESCE(e.date, g.date),
+                   COALESCE(e.parent_state, g.parent_state),
+                   e.debit, e.credit
+            FROM expected e
+            FULL JOIN account_dashboard_aggregate g
+                   ON g.company_id = e.company_id
+                  AND g.internal_group = e.internal_group
+                  AND g.date = e.date
+                  AND g.parent_state = e.parent_state
+            WHERE g.id IS NULL OR e.company_id IS NULL
+               OR ABS(g.debit - e.debit) > 0.000001
+               OR ABS(g.credit - e.credit) > 0.000001
+        ''')
+        buckets = self._cr.fetchall()
+        for company_id, group, date, state, debit, credit in buckets:
+            if debit is None:
+                self._cr.execute('''
+                    DELETE FROM account_dashboard_aggregate
+                    WHERE company_id = %s AND internal_group = %s
+                      AND date = %s AND parent_state = %s
+                ''', [company_id, group, date, state])
+                continue
+            self._cr.execute('''
+                INSERT INTO account_dashboard_aggregate
+                    (company_id, internal_group, date, parent_state,
+                     debit, credit)
+                VALUES (%s, %s, %s, %s, %s, %s)
+                ON CONFLICT (company_id, internal_group, date, parent_state)
+                DO UPDATE SET debit = EXCLUDED.debit,
+                              credit = EXCLUDED.credit
+            ''', [company_id, group, date, state, debit, credit])
+        if buckets:
+            _logger.info("Rewrote %s dashboard aggregate buckets",
+                         len(buckets))
+        self.invalidate_cache()
+        return len(buckets)
+
+    @api.model
+    def _cron_refresh(self):
+        """ Reconciliation pass, which picks up the changes made outside of
+        the ORM or to the account types."""
+        self._reconcile()
+
+
+class AccountMove(models.Model):
+    _inherit = 'account.move'
+
+    def write(self, vals):
+        if not AGGREGATE_MOVE_FIELDS.intersection(vals):
+            return super(AccountMove, self).write(vals)
+        with self.env['account.dashboard.aggregate']._track_lines(
+                self.mapped('line_ids')):
+            return super(AccountMove, self).write(vals)
+
+    def unlink(self):
+        with self.env['account.dashboard.aggregate']._track_lines(
+                self.mapped('line_ids')):
+            return super(AccountMove, self).unlink()
+
+
+class AccountMoveLine(models.Model):
+    _inherit = 'account.move.line'
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        lines = super(AccountMoveLine, self).create(vals_list)
+        self.env['account.dashboard.aggregate']._apply(lines.ids, 1)
+        return lines
+
+    def write(self, vals):
+        if not AGGREGATE_LINE_FIELDS.intersection(vals):
+            return super(AccountMoveLine, self).write(vals)
+        with self.env['account.dashboard.aggregate']._track_lines(self):
+            return super(AccountMoveLine, self).write(vals)
+
+    def unlink(self):
+        with self.env['account.dashboard.aggregate']._track_lines(self):
+            return super(AccountMoveLine, self).unlink()
@@ -0,0 +1,161 @@
+# -*- coding: utf-8 -*-
+#############################################################################
+#
+#    Cybrosys Technologies Pvt. Ltd.
+#
+#    Copyright (C) 2019-TODAY Cybrosys Technologies(<https://www.cybrosys.com>)
+#    Author: Cybrosys Techno Solutions(<https://www.cybrosys.com>)
+#
+#    You can modify it under the terms of the GNU LESSER
+#    GENERAL PUBLIC LICENSE (LGPL v3), Version 3.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU LESSER GENERAL PUBLIC LICENSE (LGPL v3) for more details.
+#
+#    You should have received a copy of the GNU LESSER GENERAL PUBLIC LICENSE
+#    (LGPL v3) along with this program.
+#    If not, see <http://www.gnu.org/licenses/>.
+#
+#############################################################################
+
+import json
+import logging
+from datetime import timedelta
+
+from odoo import SUPERUSER_ID, api, fields, models
+
+from .account_dashboard import get_period_bounds
+
+_logger = logging.getLogger(__name__)
+
+DEFAULT_PREWARM_TTL = 86400
+
+
+class AccountDashboardBundle(models.Model):
+    """ Dashboard bundles pre-computed by the pre-warming cron, per company,
+    period and move states. Unlike the widget cache, which is local to each
+    worker process, the stored bundles are shared by every worker, so the
+    first load of the day is served without running the widget queries.
+    A bundle is only served in the month it was computed in: besides the
+    bounds of its own period, every bundle holds the widgets of the current
+    month. The bundles of a company are dropped when one of its entries or
+    journal items changes, draft ones included, as some widgets of the
+    'posted' dashboard read draft entries too."""
+    _name = 'account.dashboard.bundle'
+    _description = 'Pre-computed Dashboard Bundle'
+
+    company_id = fields.Many2one('res.company', string='Company',
+                                 required=True, ondelete='cascade',
+                                 readonly=True)
+    period = fields.Char(string='Period', required=True, readonly=True)
+    states = fields.Char(string='States', required=True, readonly=True)
+    date_from = fields.Date(string='Start Date', readonly=True)
+    date_to = fields.Date(string='End Date', readonly=True)
+    month = fields.Date(string='Computed In', readonly=True,
+                        help='First day of the month the bundle was '
+                             'computed in.')
+    data = fields.Text(string='Data', readonly=True)
+
+    _sql_constraints = [
+        ('company_period_states_uniq', 'unique(company_id, period, states)',
+         'A dashboard bundle already exists for this company, period and '
+         'states.'),
+    ]
+
+    @api.model
+    def _fetch(self, company_id, period, states):
+        """ Return the stored bundle, or None when there is none, it was
+        computed in another month than the current one, or it is older than
+        ``base_accounting_kit.dashboard_prewarm_ttl`` seconds."""
+        ttl = int(self.env['ir.config_parameter'].sudo().get_param(
+            'base_accounting_kit.dashboard_prewarm_ttl', DEFAULT_PREWARM_TTL))
+        date_from, date_to = get_period_bounds(period)
+        self._cr.execute("""
+            SELECT data FROM account_dashboard_bundle
+            WHERE company_id = %s AND period = %s AND states = %s
+              AND date_from = %s AND date_to = %s AND month = %s
+              AND write_date >= %s
+        """, [company_id, period, ','.join(states), date_from, date_to,
+              get_period_bounds('this_month')[0],
+              fields.Datetime.now() - timedelta(seconds=ttl)])
+        row = self._cr.fetchone()
+        return json.loads(row[0]) if row else None
+
+    @api.model
+    def _store(self, company_id, period, states, bundle, today=None):
+        """ Store the bundle computed on ``today`` (by default the current
+        date) for the given period."""
+        date_from, date_to = get_period_bounds(period, today)
+        month = get_period_bounds('this_month', today)[0]
+        self._cr.execute("""
+            INSERT INTO account_dashboard_bundle
+                (company_id, period, states, date_from, date_to, month, data,
+                 create_uid, create_date, write_uid, write_date)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s,
+                    now() at time zone 'UTC', %s, now() at time zone 'UTC')
+            ON CONFLICT (company_id, period, states) DO UPDATE
+            SET date_from = EXCLUDED.date_from, date_to = EXCLUDED.date_to,
+                month = EXCLUDED.month, data = EXCLUDED.data,
+                write_uid = EXCLUDED.write_uid,
+                write_date = EXCLUDED.write_date
+        """, [company_id, period, ','.join(states), date_from, date_to, month,
+              json.dumps(bundle, default=str), self.env.uid, self.env.uid])
+
+    @api.model
+    def _invalidate(self, company_ids):
+        self._cr.execute(
+            "DELETE FROM account_dashboard_bundle WHERE company_id IN %s",
+            [tuple(company_ids)])
+
+    @api.model
+    def _cron_prewarm(self, company_ids=None):
+        """ Pre-compute the dashboard bundle of every period for both state
+        filters of the given companies (all of them by default).
+
+        Each company is computed and committed in its own cursor, so that a
+        failure only loses the bundles of that company. The daily cron runs
+        :meth:`_cron_dispatch_prewarm` instead, which gives each company its
+        own job so that they are computed in parallel by the cron workers.
+        """
+        if company_ids is None:
+            company_ids = self.env['res.company'].search([]).ids
+        for company_id in company_ids:
+            try:
+                with self.pool.cursor() as cr:
+                    env = api.Environment(cr, SUPERUSER_ID, {
+                        'allowed_company_ids': [company_id],
+                    })
+                    env['account.move']._prewarm_dashboard()
+            except Exception:
+                _logger.exception("Failed to pre-warm the accounting "
+                                  "dashboard of company %s", company_id)
+
+    @api.model
+    def _cron_dispatch_prewarm(self):
+        """ Schedule a one-off pre-warming job per company, to be picked up
+        by the cron workers in parallel. The jobs of the previous runs are
+        removed once done, and a company whose job has not run yet does not
+        get another one."""
+        Cron = self.env['ir.cron'].sudo().with_context(active_test=False)
+        model = self.env['ir.model']._get(self._name)
+        jobs = Cron.search([('model_id', '=', model.id),
+                            ('code', '=like', 'model._cron_prewarm([%])')])
+        jobs.filtered(lambda job: not job.active).unlink()
+        pending = set(jobs.filtered('active').mapped('code'))
+        for company in self.env['res.company'].search([]):
+            code = 'model._cron_prewarm([%d])' % company.id
+            if code in pending:
+                continue
+            Cron.create({
+                'name': 'Pre-warm Accounting Dashboard: %s' % company.name,
+                'model_id': model.id,
+                'state': 'code',
+                'code': code,
+                'interval_number': 1,
+                'interval_type': 'days',
+                'numbercall': 1,
+                'nextcall': fields.Datetime.now(),
+                'doall': True,
+            })
@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+#############################################################################
+#
+#    Cybrosys Technologies Pvt. Ltd.
+#
+#    Copyright (C) 2019-TODAY Cybrosys Technologies(<https://www.cybrosys.com>)
+#    Author: Cybrosys Techno Solutions(<https://www.cybrosys.com>)
+#
+#    You can modify it under the terms of the GNU LESSER
+#    GENERAL PUBLIC LICENSE (LGPL v3), Version 3.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU LESSER GENERAL PUBLIC LICENSE (LGPL v3) for more details.
+#
+#    You should have received a copy of the GNU LESSER GENERAL PUBLIC LICENSE
+#    (LGPL v3) along with this program.
+#    If not, see <http://www.gnu.org/licenses/>.
+#
+#############################################################################
+
+import copy
+import functools
+import threading
+import time
+from collections import OrderedDict
+
+DEFAULT_TTL = 300
+DEFAULT_SIZE = 1024
+
+
+class DashboardCache(object):
+    """ In-memory LRU cache of dashboard widget results with a time to live.
+
+    Entries are keyed by ``(dbname, company_id, method, args)``, the move
+    state filter being part of ``args``. The cache is local to the worker
+    process: postings invalidate the entries of their company in the
+    worker that handled them, while the other workers see the new figures
+    at the latest when their entries expire.
+    """
+
+    def __init__(self):
+        self._entries = OrderedDict()
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        """ Return ``(found, value)`` for ``key``."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return False, None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return True, copy.deepcopy(entry[1])
+
+    def put(self, key, value, ttl=DEFAULT_TTL, size=DEFAULT_SIZE):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl,
+                                  copy.deepcopy(value))
+            self._entries.move_to_end(key)
+            while len(self._entries) > max(size, 0):
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, dbname, company_ids=None):
+        """ Drop the entries of the given companies, or of the whole
+        database when ``company_ids`` is None."""
+        with self._lock:
+            for key in list(self._entries):
+                if key[0] == dbname and (company_ids is None or
+                                         key[1] in company_ids):
+                    del self._entries[key]
+
+    def stats(self):
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'size': len(self._entries),
+            }
+
+
+dashboard_cache = DashboardCache()
+
+
+def cached_widget(method):
+    """ Decorate a dashboard widget method so that its result is served
+    from :data:`dashboard_cache`. The time to live (in seconds) and the
+    maximum number of entries are read from the system parameters
+    ``base_accounting_kit.dashboard_cache_ttl`` and
+    ``base_accounting_kit.dashboard_cache_size``; a time to live of 0
+    disables the cache, as does the ``dashboard_no_cache`` context key."""
+
+    @functools.wraps(method)
+    def wrapper(self, *args):
+        if self.env.context.get('dashboard_no_cache'):
+            return method(self, *args)
+        params = self.env['ir.config_parameter'].sudo()
+        ttl = int(params.get_param('base_accounting_kit.dashboard_cache_ttl',
+                                   DEFAULT_TTL))
+        if ttl <= 0:
+            return method(self, *args)
+        size = int(params.get_param(
+            'base_accounting_kit.dashboard_cache_size', DEFAULT_SIZE))
+        key = (self._cr.dbname, self.env.company.id, method.__name__, args)
+        found, value = dashboard_cache.get(key)
+        if found:
+            return value
+        value = method(self, *args)
+        dashboard_cache.put(key, value, ttl=ttl, size=size)
+        return value
+
+    return wrapper
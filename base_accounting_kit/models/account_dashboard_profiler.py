@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+#############################################################################
+#
+#    Cybrosys Technologies Pvt. Ltd.
+#
+#    Copyright (C) 2019-TODAY Cybrosys Technologies(<https://www.cybrosys.com>)
+#    Author: Cybrosys Techno Solutions(<https://www.cybrosys.com>)
+#
+#    You can modify it under the terms of the GNU LESSER
+#    GENERAL PUBLIC LICENSE (LGPL v3), Version 3.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU LESSER GENERAL PUBLIC LICENSE (LGPL v3) for more details.
+#
+#    You should have received a copy of the GNU LESSER GENERAL PUBLIC LICENSE
+#    (LGPL v3) along with this program.
+#    If not, see <http://www.gnu.org/licenses/>.
+#
+#############################################################################
+
+import time
+from contextlib import contextmanager
+
+
+def _cached_records(env):
+    """ Return the (model, id) pairs present in the record cache of
+    ``env``."""
+    records = set()
+    for field, values in env.cache._data.items():
+        records.update((field.model_name, record_id) for record_id in values
+                       if isinstance(record_id, int))
+    return records
+
+
+@contextmanager
+def profile_dashboard(env):
+    """ Measure the work done by the dashboard code run in the block.
+
+    Yields a dict filled on exit with the number of SQL queries executed on
+    the cursor of ``env``, the number of rows they returned to the worker,
+    the number of records loaded in the ORM cache and the elapsed time (in
+    milliseconds). Only the cursor of ``env`` is instrumented, so other
+    requests served by the worker are not affected.
+    """
+    cr = env.cr
+    stats = {'queries': 0, 'rows': 0, 'records': 0, 'time': 0.0}
+    execute = cr.execute
+
+    def counting_execute(query, params=None, log_exceptions=None):
+        result = execute(query, params, log_exceptions)
+        stats['queries'] += 1
+        if cr.description:
+            stats['rows'] += max(cr.rowcount, 0)
+        return result
+
+    patched = 'execute' in vars(cr)
+    records = _cached_records(env)
+    start = time.perf_counter()
+    cr.execute = counting_execute
+    try:
+        yield stats
+    finally:
+        if patched:
+            cr.execute = execute
+        else:
+            del cr.execute
+        stats['time'] = round((time.perf_counter() - start) * 1000, 2)
+        stats['records'] = len(_cached_records(env) - records)
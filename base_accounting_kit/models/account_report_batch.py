@@ -0,0 +1,319 @@
+# -*- coding: utf-8 -*-
+#############################################################################
+#
+#    Cybrosys Technologies Pvt. Ltd.
+#
+#    Copyright (C) 2019-TODAY Cybrosys Technologies(<https://www.cybrosys.com>)
+#    Author: Cybrosys Techno Solutions(<https://www.cybrosys.com>)
+#
+#    You can modify it under the terms of the GNU LESSER
+#    GENERAL PUBLIC LICENSE (LGPL v3), Version 3.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU LESSER GENERAL PUBLIC LICENSE (LGPL v3) for more details.
+#
+#    You should have received a copy of the GNU LESSER GENERAL PUBLIC LICENSE
+#    (LGPL v3) along with this program.
+#    If not, see <http://www.gnu.org/licenses/>.
+#
+#############################################################################
+
+import base64
+import functools
+import io
+import json
+import logging
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+import odoo
+from odoo import api, fields, models, _
+from odoo.exceptions import UserError
+
+from .account_report_job import MAX_ATTEMPTS
+
+_logger = logging.getLogger(__name__)
+
+DEFAULT_WORKERS = 4
+
+# report of a batch: (wizard model, label)
+BATCH_REPORTS = {
+    'trial_balance': ('account.balance.report', 'Trial Balance'),
+    'general_ledger': ('account.report.general.ledger', 'General Ledger'),
+    'aged_balance': ('account.aged.trial.balance', 'Aged Partner Balance'),
+}
+
+
+def _render_batch_line(dbname, uid, context, line_id):
+    """ Render a batch line in its own cursor, committed when done."""
+    with api.Environment.manage(), odoo.registry(dbname).cursor() as cr:
+        env = api.Environment(cr, uid, context)
+        env['account.report.batch.line'].browse(line_id)._render()
+
+
+class AccountReportBatch(models.Model):
+    """ Close pack: the selected reports of several companies, rendered
+    in parallel by the report batch cron and collected in one archive.
+
+    Each report is rendered and committed in its own cursor, by up to
+    ``base_accounting_kit.report_batch_workers`` threads; the PDFs are
+    produced by wkhtmltopdf processes, which run concurrently. A new run
+    of a batch only renders the reports that failed or were not rendered.
+    A batch still running after the run timeout was left behind by a dead
+    worker: the cron queues it again, or fails it once it was attempted
+    ``MAX_ATTEMPTS`` times, as it does for the report jobs.
+    """
+    _name = 'account.report.batch'
+    _description = 'Accounting Report Batch'
+    _order = 'id desc'
+
+    name = fields.Char(string='Name', required=True,
+                       default=lambda self: _('Close Pack'))
+    user_id = fields.Many2one('res.users', string='Requested By',
+                              default=lambda self: self.env.user,
+                              readonly=True)
+    company_ids = fields.Many2many(
+        'res.company', string='Companies', required=True,
+        default=lambda self: self.env.companies,
+        domain=lambda self: [('id', 'in', self.env.user.company_ids.ids)])
+    date_from = fields.Date(string='Start Date')
+    date_to = fields.Date(string='End Date', required=True,
+                          default=fields.Date.context_today)
+    target_move = fields.Selection([('posted', 'All Posted Entries'),
+                                    ('all', 'All Entries')],
+                                   string='Target Moves', required=True,
+                                   default='posted')
+    trial_balance = fields.Boolean(string='Trial Balance', default=True)
+    general_ledger = fields.Boolean(string='General Ledger', default=True)
+    aged_balance = fields.Boolean(string='Aged Partner Balance',
+                                  default=True)
+    ledger_format = fields.Selection([('pdf', 'PDF'), ('xlsx', 'XLSX')],
+                                     string='General Ledger Format',
+                                     required=True, default='xlsx')
+    state = fields.Selection([('draft', 'Draft'), ('queued', 'Queued'),
+                              ('running', 'Running'), ('done', 'Done'),
+                              ('failed', 'Failed')],
+                             string='Status', required=True, default='draft',
+                             readonly=True, copy=False)
+    date_started = fields.Datetime(string='Started On', readonly=True,
+                                   copy=False)
+    attempts = fields.Integer(string='Attempts', default=0, readonly=True,
+                              copy=False)
+    line_ids = fields.One2many('account.report.batch.line', 'batch_id',
+                               string='Reports', readonly=True, copy=False)
+    progress = fields.Float(string='Progress', compute='_compute_progress')
+    attachment_id = fields.Many2one('ir.attachment', string='Archive',
+                                    readonly=True, copy=False)
+
+    @api.depends('line_ids.state')
+    def _compute_progress(self):
+        for batch in self:
+            finished = batch.line_ids.filtered(
+                lambda line: line.state != 'pending')
+            batch.progress = 100.0 * len(finished) / len(batch.line_ids) \
+                if batch.line_ids else 0.0
+
+    def action_run(self):
+        """ Queue the batches for the report batch cron."""
+        for batch in self:
+            if not any(batch[report] for report in BATCH_REPORTS):
+                raise UserError(_("Select at least one report to print."))
+        self.write({'state': 'queued', 'attempts': 0})
+
+    def action_download(self):
+        self.ensure_one()
+        return {
+            'type': 'ir.actions.act_url',
+            'url': '/web/content/%s?download=true' % self.attachment_id.id,
+            'target': 'self',
+        }
+
+    def _prepare_lines(self):
+        """ Create a pending line per company and report, and reset the
+        lines that failed in a previous run."""
+        self.ensure_one()
+        self.line_ids.filtered(lambda line: line.state == 'failed').write(
+            {'state': 'pending', 'error': False})
+        existing = {(line.company_id.id, line.report)
+                    for line in self.line_ids}
+        self.env['account.report.batch.line'].create([
+            {'batch_id': self.id, 'company_id': company.id, 'report': report}
+            for company in self.company_ids
+            for report in BATCH_REPORTS
+            if self[report] and (company.id, report) not in existing
+        ])
+
+    def _run(self):
+        """ Render the pending lines of the batch in parallel, then build
+        its archive. Return False when another worker is running it.
+
+        Each step works in a cursor of its own, committed when done: the
+        workers see the lines and the progress is visible while the batch
+        runs, without committing the transaction of the caller, e.g. the
+        one of the cron."""
+        self.ensure_one()
+        with self.pool.cursor() as cr:
+            cr.execute("""
+                SELECT id FROM account_report_batch
+                WHERE id = %s AND state != 'running'
+                FOR UPDATE SKIP LOCKED
+            """, [self.id])
+            if not cr.fetchone():
+                return False
+            batch = self.with_env(self.env(cr=cr))
+            batch.write({'state': 'running',
+                         'date_started': fields.Datetime.now(),
+                         'attempts': batch.attempts + 1})
+            batch._prepare_lines()
+            line_ids = batch.line_ids.filtered(
+                lambda line: line.state == 'pending').ids
+            render = functools.partial(
+                _render_batch_line, cr.dbname, batch.user_id.id,
+                {'lang': batch.user_id.lang, 'tz': batch.user_id.tz})
+            workers = int(self.env['ir.config_parameter'].sudo().get_param(
+                'base_accounting_kit.report_batch_workers', DEFAULT_WORKERS))
+        with ThreadPoolExecutor(max_workers=max(workers, 1)) as executor:
+            list(executor.map(render, line_ids))
+        with self.pool.cursor() as cr:
+            batch = self.with_env(self.env(cr=cr))
+            batch._build_archive()
+            batch.state = 'failed' if any(
+                line.state == 'failed' for line in batch.line_ids) else 'done'
+        self.invalidate_cache()
+        self.env['account.report.batch.line'].invalidate_cache()
+        return True
+
+    def _build_archive(self):
+        """ Collect the rendered reports in a zip attachment."""
+        self.ensure_one()
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as archive:
+            for line in self.line_ids.filtered('attachment_id'):
+                archive.writestr(line.attachment_id.name,
+                                 base64.b64decode(line.attachment_id.datas))
+        self.attachment_id.unlink()
+        self.attachment_id = self.env['ir.attachment'].create({
+            'name': '%s.zip' % self.name,
+            'datas': base64.b64encode(buffer.getvalue()),
+            'res_model': self._name,
+            'res_id': self.id,
+        })
+
+    @api.model
+    def _get_run_timeout(self):
+        """ Seconds after which a running batch is deemed abandoned: the
+        ``base_accounting_kit.report_batch_timeout`` parameter, or else the
+        run timeout of the report jobs."""
+        timeout = self.env['ir.config_parameter'].sudo().get_param(
+            'base_accounting_kit.report_batch_timeout')
+        if timeout:
+            return int(timeout)
+        return self.env['account.report.job']._get_run_timeout()
+
+    @api.model
+    def _recover_stale(self):
+        """ Queue again the batches left running by a dead worker, or fail
+        them when they already used all their attempts."""
+        stale = self.search([
+            ('state', '=', 'running'), '|', ('date_started', '=', False),
+            ('date_started', '<', fields.Datetime.now() - timedelta(
+                seconds=self._get_run_timeout())),
+        ])
+        retry = stale.filtered(lambda batch: batch.attempts < MAX_ATTEMPTS)
+        retry.write({'state': 'queued'})
+        for batch in stale - retry:
+            _logger.warning("The report batch %s timed out", batch.id)
+            batch.state = 'failed'
+
+    @api.model
+    def _cron_run(self):
+        """ Run the queued batches. The batches commit their own cursors,
+        the one of the cron is left alone."""
+        self._recover_stale()
+        for batch in self.search([('state', '=', 'queued')], order='id'):
+            batch._run()
+
+
+class AccountReportBatchLine(models.Model):
+    _name = 'account.report.batch.line'
+    _description = 'Accounting Report Batch Line'
+    _order = 'company_id, report'
+
+    batch_id = fields.Many2one('account.report.batch', string='Batch',
+                               required=True, ondelete='cascade')
+    company_id = fields.Many2one('res.company', string='Company',
+                                 required=True)
+    report = fields.Selection(
+        [(report, label) for report, (__, label) in BATCH_REPORTS.items()],
+        string='Report', required=True)
+    state = fields.Selection([('pending', 'Pending'), ('done', 'Done'),
+                              ('failed', 'Failed')],
+                             string='Status', required=True,
+                             default='pending')
+    error = fields.Text(string='Error', readonly=True)
+    duration = fields.Float(string='Duration (s)', readonly=True)
+    attachment_id = fields.Many2one('ir.attachment', string='File',
+                                    readonly=True)
+
+    def _render(self):
+        """ Render the report of the line and store it as an attachment,
+        or record the error."""
+        self.ensure_one()
+        start = time.time()
+        try:
+            with self.env.cr.savepoint():
+                content, extension = self.with_context(
+                    allowed_company_ids=[self.company_id.id])._render_report()
+                attachment = self.env['ir.attachment'].create({
+                    'name': '%s - %s.%s' % (
+                        self.company_id.name,
+                        dict(self._fields['report'].selection)[self.report],
+                        extension),
+                    'datas': base64.b64encode(content),
+                    'res_model': self._name,
+                    'res_id': self.id,
+                })
+        except Exception as e:
+            _logger.exception("Failed to render the %s of company %s",
+                              self.report, self.company_id.name)
+            self.write({'state': 'failed', 'error': str(e),
+                        'duration': time.time() - start})
+            return
+        self.write({'state': 'done', 'attachment_id': attachment.id,
+                    'duration': time.time() - start})
+
+    def _get_wizard_values(self):
+        batch = self.batch_id
+        values = {
+            'date_from': batch.date_from,
+            'date_to': batch.date_to,
+            'target_move': batch.target_move,
+            'journal_ids': [(6, 0, self.env['account.journal'].search(
+                [('company_id', '=', self.company_id.id)]).ids)],
+        }
+        if self.report == 'aged_balance':
+            # the aged balance is computed at the end of the period
+            values.update(date_from=batch.date_to, date_to=False,
+                          result_selection='customer_supplier')
+        return values
+
+    def _render_report(self):
+        """ Return the content and the file extension of the report."""
+        wizard = self.env[BATCH_REPORTS[self.report][0]].create(
+            self._get_wizard_values())
+        if self.report == 'general_ledger' and \
+                self.batch_id.ledger_format == 'xlsx':
+            wizard.with_context(ledger_export='xlsx').check_report()
+            return b''.join(wizard._get_ledger_report()._export_ledger(
+                json.loads(wizard.export_data), 'xlsx')), 'xlsx'
+        action = wizard.check_report()
+        report = self.env['ir.actions.report']._get_report_from_name(
+            action['report_name'])
+        return report.with_context(
+            active_model=wizard._name, active_id=wizard.id,
+            active_ids=wizard.ids).render_qweb_pdf(wizard.ids,
+                                                   data=action['data'])
@@ -0,0 +1,247 @@
+# -*- coding: utf-8 -*-
+#############################################################################
+#
+#    Cybrosys Technologies Pvt. Ltd.
+#
+#    Copyright (C) 2019-TODAY Cybrosys Technologies(<https://www.cybrosys.com>)
+#    Author: Cybrosys Techno Solutions(<https://www.cybrosys.com>)
+#
+#    You can modify it under the terms of the GNU LESSER
+#    GENERAL PUBLIC LICENSE (LGPL v3), Version 3.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU LESSER GENERAL PUBLIC LICENSE (LGPL v3) for more details.
+#
+#    You should have received a copy of the GNU LESSER GENERAL PUBLIC LICENSE
+#    (LGPL v3) along with this program.
+#    If not, see <http://www.gnu.org/licenses/>.
+#
+#############################################################################
+
+import base64
+import hashlib
+import json
+import logging
+import weakref
+from datetime import timedelta
+
+from odoo import api, fields, models, tools
+
+_logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_TTL = 3600
+
+# companies whose journal entries or accounts were changed by the current
+# transaction of a cursor, whose cache entries are purged once it commits
+_changed_companies = weakref.WeakKeyDictionary()
+
+
+def _purge(registry, company_ids):
+    """ Delete the cache entries of the given companies, in a cursor of
+    their own. Entries locked by another purge are left to it."""
+    try:
+        with registry.cursor() as cr:
+            cr.execute('''
+                DELETE FROM account_report_cache WHERE id IN (
+                    SELECT id FROM account_report_cache
+                    WHERE company_ids LIKE ANY(%s)
+                    FOR UPDATE SKIP LOCKED)
+            ''', [['%%,%s,%%' % company_id for company_id in company_ids]])
+    except Exception:
+        _logger.warning("Failed to purge the report cache of companies %s",
+                        sorted(company_ids), exc_info=True)
+
+
+class AccountReportCache(models.Model):
+    """ Rendered accounting reports, served again to identical requests.
+
+    An entry is keyed by the report, its form data and context, the
+    companies, and the last id and last write date of the journal entries
+    and items and the accounts of the companies, which indexes answer
+    without scanning the tables. As a write date is the start of its
+    transaction, and a deletion leaves these figures as they were,
+    changing journal entries, journal items or accounts also purges the
+    entries of their companies once the change is committed, while a
+    transaction that changed them renders its reports without the cache.
+    Entries are kept for ``base_accounting_kit.report_cache_ttl`` seconds
+    at most.
+    """
+    _name = 'account.report.cache'
+    _description = 'Accounting Report Cache'
+
+    report_name = fields.Char(string='Report', required=True, readonly=True)
+    key = fields.Char(string='Key', required=True, index=True, readonly=True)
+    content = fields.Binary(string='Content', attachment=True, readonly=True)
+    file_format = fields.Char(string='Format', readonly=True)
+    company_ids = fields.Char(string='Companies', readonly=True,
+                              help='Ids of the companies of the entry, as '
+                                   '",1,2,".')
+
+    def init(self):
+        # the last ids and write dates are read on every cached report
+        for table in ('account_move', 'account_move_line'):
+            tools.create_index(self._cr, '%s_company_write_date_index' % table,
+                               table, ['company_id', 'write_date'])
+            tools.create_index(self._cr, '%s_company_id_id_index' % table,
+                               table, ['company_id', 'id'])
+
+    @api.model
+    def _get_ttl(self):
+        return int(self.env['ir.config_parameter'].sudo().get_param(
+            'base_accounting_kit.report_cache_ttl', DEFAULT_CACHE_TTL))
+
+    @api.model
+    def _get_key(self, report_name, res_ids, data):
+        """ Hash the parameters of a report rendering."""
+        company_ids = sorted(self.env.companies.ids)
+        # pending writes would not have updated the write dates yet
+        self.env['account.move'].flush()
+        self.env['account.move.line'].flush()
+        self._cr.execute('''
+            SELECT (SELECT MAX(id) FROM account_move
+                    WHERE company_id IN %s),
+                   (SELECT MAX(write_date) FROM account_move
+                    WHERE company_id IN %s),
+                   (SELECT MAX(id) FROM account_move_line
+                    WHERE company_id IN %s),
+                   (SELECT MAX(write_date) FROM account_move_line
+                    WHERE company_id IN %s),
+                   (SELECT MAX(write_date) FROM account_account
+                    WHERE company_id IN %s)
+        ''', [tuple(company_ids)] * 5)
+        write_dates = self._cr.fetchone()
+        form = dict(data.get('form') or {})
+        # the wizard record does not change the report
+        form.pop('id', None)
+        context = self.env.context
+        return hashlib.sha1(json.dumps([
+            report_name, sorted(res_ids or []), form,
+            {key: value for key, value in data.items() if key != 'form'},
+            context.get('active_model'), context.get('lang'), company_ids,
+            write_dates,
+        ], sort_keys=True, default=str).encode()).hexdigest()
+
+    @api.model
+    def _fetch(self, report_name, key):
+        """ Return the cached (content, format) for ``key``, or None."""
+        entry = self.sudo().search([
+            ('report_name', '=', report_name), ('key', '=', key),
+            ('create_date', '>=',
+             fields.Datetime.now() - timedelta(seconds=self._get_ttl())),
+        ], limit=1)
+        if not entry:
+            return None
+        return base64.b64decode(entry.content), entry.file_format
+
+    @api.model
+    def _store(self, report_name, key, content, file_format):
+        """ Store a rendering, dropping the expired entries of the
+        report."""
+        cache = self.sudo()
+        cache.search([
+            ('report_name', '=', report_name), '|', ('key', '=', key),
+            ('create_date', '<',
+             fields.Datetime.now() - timedelta(seconds=self._get_ttl())),
+        ]).unlink()
+        cache.create({
+            'report_name': report_name,
+            'key': key,
+            'content': base64.b64encode(content),
+            'file_format': file_format,
+            'company_ids': ',%s,' % ','.join(
+                str(company_id) for company_id in self.env.companies.ids),
+        })
+
+    @api.model
+    def _is_changed(self):
+        """ Whether the current transaction changed journal entries, journal
+        items or accounts."""
+        return bool(_changed_companies.get(self._cr))
+
+    @api.model
+    def _invalidate(self, company_ids):
+        """ Purge the entries of the given companies once the current
+        transaction commits."""
+        company_ids = set(company_ids)
+        if not company_ids:
+            return
+        cr = self._cr
+        changed = _changed_companies.get(cr)
+        if changed is None:
+            changed = _changed_companies[cr] = set()
+            registry = self.pool
+
+            def purge():
+                companies = _changed_companies.pop(cr, None)
+                if companies:
+                    _purge(registry, companies)
+
+            cr.after('commit', purge)
+            cr.after('rollback', lambda: _changed_companies.pop(cr, None))
+        changed |= company_ids
+
+
+class IrActionsReport(models.Model):
+    _inherit = 'ir.actions.report'
+
+    def render_qweb_pdf(self, res_ids=None, data=None):
+        """ Serve the reports whose model sets ``_cache_results`` from the
+        report cache."""
+        report_model = self.env.get('report.%s' % self.report_name)
+        if self.env.context.get('report_no_cache') or not data or \
+                not getattr(report_model, '_cache_results', False) or \
+                self.env['account.report.cache']._get_ttl() <= 0 or \
+                self.env['account.report.cache']._is_changed():
+            return super(IrActionsReport, self).render_qweb_pdf(
+                res_ids, data=data)
+        Cache = self.env['account.report.cache']
+        key = Cache._get_key(self.report_name, res_ids, data)
+        cached = Cache._fetch(self.report_name, key)
+        if cached:
+            return cached
+        content, file_format = super(IrActionsReport, self).render_qweb_pdf(
+            res_ids, data=data)
+        Cache._store(self.report_name, key, content, file_format)
+        return content, file_format
+
+
+class AccountReportCacheInvalidation(models.AbstractModel):
+    """ Purge the report cache of the companies of the changed records."""
+    _name = 'account.report.cache.invalidation'
+    _description = 'Accounting Report Cache Invalidation'
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        records = super(AccountReportCacheInvalidation, self).create(
+            vals_list)
+        records._invalidate_report_cache()
+        return records
+
+    def write(self, vals):
+        self._invalidate_report_cache()
+        return super(AccountReportCacheInvalidation, self).write(vals)
+
+    def unlink(self):
+        self._invalidate_report_cache()
+        return super(AccountReportCacheInvalidation, self).unlink()
+
+    def _invalidate_report_cache(self):
+        self.env['account.report.cache']._invalidate(
+            self.mapped('company_id').ids)
+
+
+class AccountMove(models.Model):
+    _name = 'account.move'
+    _inherit = ['account.move', 'account.report.cache.invalidation']
+
+
+class AccountMoveLine(models.Model):
+    _name = 'account.move.line'
+    _inherit = ['account.move.line', 'account.report.cache.invalidation']
+
+
+class AccountAccount(models.Model):
+    _name = 'account.account'
+    _inherit = ['account.account', 'account.report.cache.invalidation']
@@ -0,0 +1,255 @@
+# -*- coding: utf-8 -*-
+#############################################################################
+#
+#    Cybrosys Technologies Pvt. Ltd.
+#
+#    Copyright (C) 2019-TODAY Cybrosys Technologies(<https://www.cybrosys.com>)
+#    Author: Cybrosys Techno Solutions(<https://www.cybrosys.com>)
+#
+#    You can modify it under the terms of the GNU LESSER
+#    GENERAL PUBLIC LICENSE (LGPL v3), Version 3.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU LESSER GENERAL PUBLIC LICENSE (LGPL v3) for more details.
+#
+#    You should have received a copy of the GNU LESSER GENERAL PUBLIC LICENSE
+#    (LGPL v3) along with this program.
+#    If not, see <http://www.gnu.org/licenses/>.
+#
+#############################################################################
+
+import base64
+import hashlib
+import json
+import logging
+from datetime import timedelta
+
+from odoo import api, fields, models, _
+from odoo.exceptions import UserError
+from odoo.tools import config
+
+_logger = logging.getLogger(__name__)
+
+DEFAULT_REUSE_DELAY = 600
+DEFAULT_RUN_TIMEOUT = 3600
+# times a job left running by a dead worker is queued again
+MAX_ATTEMPTS = 2
+
+# context keys the reports read, kept to render a job as it was queued
+JOB_CONTEXT_KEYS = ('active_model', 'active_id', 'active_ids',
+                    'allowed_company_ids', 'lang', 'tz')
+
+
+class AccountReportJob(models.Model):
+    """ PDF report rendered by the report job cron instead of inside the
+    HTTP request of its wizard.
+
+    A job calls the print method of its wizard again in the cron worker
+    and stores the rendered report as an attachment. Queuing a report
+    that is identical to a queued or running job, or to a job finished
+    less than ``base_accounting_kit.report_job_reuse_delay`` seconds ago,
+    returns that job instead of rendering the report twice.
+
+    A job still running after the run timeout was left behind by a worker
+    that was killed while rendering it: it is not reused, and the cron
+    queues it again, or fails it once it was attempted ``MAX_ATTEMPTS``
+    times.
+    """
+    _name = 'account.report.job'
+    _description = 'Accounting Report Job'
+    _order = 'id desc'
+
+    name = fields.Char(string='Report', required=True, readonly=True)
+    user_id = fields.Many2one('res.users', string='User', required=True,
+                              readonly=True,
+                              default=lambda self: self.env.user)
+    company_id = fields.Many2one('res.company', string='Company',
+                                 readonly=True,
+                                 default=lambda self: self.env.company)
+    wizard_model = fields.Char(string='Wizard Model', required=True,
+                               readonly=True)
+    wizard_id = fields.Integer(string='Wizard', required=True, readonly=True)
+    method = fields.Char(string='Method', required=True, readonly=True)
+    context = fields.Text(string='Context', readonly=True)
+    key = fields.Char(string='Key', index=True, readonly=True)
+    state = fields.Selection([('queued', 'Queued'), ('running', 'Running'),
+                              ('done', 'Done'), ('failed', 'Failed')],
+                             string='Status', required=True, default='queued',
+                             readonly=True)
+    date_started = fields.Datetime(string='Started On', readonly=True)
+    date_done = fields.Datetime(string='Finished On', readonly=True)
+    attempts = fields.Integer(string='Attempts', default=0, readonly=True)
+    attachment_id = fields.Many2one('ir.attachment', string='File',
+                                    readonly=True)
+    error = fields.Text(string='Error', readonly=True)
+
+    @api.model
+    def _queue(self, wizard, method):
+        """ Return the job rendering the report printed by ``method`` of
+        ``wizard``, reusing an identical job when there is one."""
+        context = {key: self.env.context[key] for key in JOB_CONTEXT_KEYS
+                   if key in self.env.context}
+        values = wizard.read([name for name, field in wizard._fields.items()
+                              if field.store and name not in models.MAGIC_COLUMNS
+                              and name != 'id'])[0]
+        key = hashlib.sha1(json.dumps(
+            [wizard._name, method, values, context, self.env.uid],
+            sort_keys=True, default=str).encode()).hexdigest()
+        reuse_delay = int(self.env['ir.config_parameter'].sudo().get_param(
+            'base_accounting_kit.report_job_reuse_delay', DEFAULT_REUSE_DELAY))
+        now = fields.Datetime.now()
+        job = self.search([
+            ('key', '=', key), '|', '|', ('state', '=', 'queued'),
+            '&', ('state', '=', 'running'),
+            ('date_started', '>=', now - timedelta(
+                seconds=self._get_run_timeout())),
+            '&', ('state', '=', 'done'),
+            ('date_done', '>=', now - timedelta(seconds=reuse_delay)),
+        ], limit=1)
+        return job or self.create({
+            'name': wizard._description,
+            'wizard_model': wizard._name,
+            'wizard_id': wizard.id,
+            'method': method,
+            'context': json.dumps(context),
+            'key': key,
+        })
+
+    @api.model
+    def _get_run_timeout(self):
+        """ Seconds after which a running job is deemed abandoned: the
+        ``base_accounting_kit.report_job_timeout`` parameter, or else the
+        real time limit of the cron workers."""
+        timeout = self.env['ir.config_parameter'].sudo().get_param(
+            'base_accounting_kit.report_job_timeout')
+        if timeout:
+            return int(timeout)
+        if config['workers']:
+            limit = config['limit_time_real_cron']
+            if limit is None or limit < 0:
+                limit = config['limit_time_real']
+            if limit and limit > 0:
+                return limit
+        return DEFAULT_RUN_TIMEOUT
+
+    def action_download(self):
+        self.ensure_one()
+        return {
+            'type': 'ir.actions.act_url',
+            'url': '/web/content/%s?download=true' % self.attachment_id.id,
+            'target': 'self',
+        }
+
+    def _render_report(self):
+        """ Call the print method of the wizard and return the rendered
+        report and its name."""
+        wizard = self.env[self.wizard_model].browse(self.wizard_id).exists()
+        if not wizard:
+            raise UserError(_("The report options have expired, please "
+                              "print the report again."))
+        action = getattr(wizard, self.method)()
+        if not action or action.get('type') != 'ir.actions.report':
+            raise UserError(_("This report cannot be generated in the "
+                              "background."))
+        report = self.env['ir.actions.report']._get_report_from_name(
+            action['report_name'])
+        # the web client prints with the wizard as active record
+        context = {'active_model': wizard._name, 'active_id': wizard.id,
+                   'active_ids': wizard.ids}
+        context.update(action.get('context') or {})
+        content, __ = report.with_context(context).render_qweb_pdf(
+            context['active_ids'], data=action.get('data'))
+        return content, report.name
+
+    def _run(self):
+        """ Render the report of the job, store it and notify the user."""
+        self.ensure_one()
+        try:
+            with self.env.cr.savepoint():
+                content, name = self.with_context(
+                    json.loads(self.context or '{}'))._render_report()
+                attachment = self.env['ir.attachment'].create({
+                    'name': '%s.pdf' % name,
+                    'datas': base64.b64encode(content),
+                    'res_model': self._name,
+                    'res_id': self.id,
+                })
+        except Exception as e:
+            _logger.exception("Failed to render the report job %s", self.id)
+            self.write({'state': 'failed', 'error': str(e),
+                        'date_done': fields.Datetime.now()})
+            self._notify(_("%s could not be generated: %s") % (self.name, e))
+            return
+        self.write({'state': 'done', 'attachment_id': attachment.id,
+                    'date_done': fields.Datetime.now()})
+        self._notify(_("%s is ready, download it from Background "
+                       "Reports.") % self.name)
+
+    def _notify(self, message):
+        self.env['bus.bus'].sendone(
+            (self._cr.dbname, 'res.partner', self.user_id.partner_id.id),
+            {'type': 'simple_notification', 'title': _('Background Report'),
+             'message': message, 'sticky': False})
+
+    @api.model
+    def _recover_stale(self):
+        """ Queue again the jobs left running by a dead worker, or fail
+        them when they already used all their attempts."""
+        stale = self.search([
+            ('state', '=', 'running'), '|', ('date_started', '=', False),
+            ('date_started', '<', fields.Datetime.now() - timedelta(
+                seconds=self._get_run_timeout())),
+        ])
+        retry = stale.filtered(lambda job: job.attempts < MAX_ATTEMPTS)
+        retry.write({'state': 'queued'})
+        for job in stale - retry:
+            _logger.warning("The report job %s timed out", job.id)
+            job.write({'state': 'failed', 'date_done': fields.Datetime.now(),
+                       'error': _("The report took too long to generate.")})
+            job._notify(_("%s could not be generated: it took too long.")
+                        % job.name)
+
+    @api.model
+    def _claim(self, cr):
+        """ Mark the oldest queued job that no other worker is claiming
+        as running, and return its id and user, or None."""
+        cr.execute("""
+            SELECT id, user_id FROM account_report_job
+            WHERE state = 'queued'
+            ORDER BY id
+            LIMIT 1
+            FOR UPDATE SKIP LOCKED
+        """)
+        row = cr.fetchone()
+        if row:
+            cr.execute("""
+                UPDATE account_report_job
+                SET state = 'running', attempts = COALESCE(attempts, 0) + 1,
+                    date_started = now() at time zone 'UTC'
+                WHERE id = %s
+            """, [row[0]])
+        return row
+
+    @api.model
+    def _cron_run(self):
+        """ Render the queued jobs, each one in its own cursor and as the
+        user who queued it."""
+        self._recover_stale()
+        while True:
+            job_id = None
+            try:
+                with self.pool.cursor() as cr:
+                    row = self._claim(cr)
+                    if not row:
+                        break
+                    job_id, user_id = row
+                    # show the job as running while it renders
+                    cr.commit()
+                    env = api.Environment(cr, user_id, {})
+                    env[self._name].browse(job_id)._run()
+            except Exception:
+                _logger.exception("Failed to run the report job %s", job_id)
+                if job_id is None:
+                    break
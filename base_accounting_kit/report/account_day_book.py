@@ -20,7 +20,6 @@
 #
 #############################################################################
 import time
-from datetime import timedelta, datetime
 
 from odoo import models, api, _
 from odoo.exceptions import UserError
@@ -30,13 +29,15 @@ class DayBookPdfReport(models.AbstractModel):
     _name = 'report.base_accounting_kit.day_book_report_template'
     _description = 'Day Book Report'
 
-    def _get_account_move_entry(self, accounts, form_data, pass_date):
+    def _get_account_move_entry(self, accounts, form_data):
+        """ Return the days between ``date_from`` and ``date_to`` of the
+        form with move lines, in date order, each with its lines and their
+        debit, credit and balance subtotals.
+
+        The whole range is read by a single query, the daily subtotals
+        being computed by window functions.
+        """
         cr = self.env.cr
-        move_line = self.env['account.move.line']
-        tables, where_clause, where_params = move_line._query_get()
-        wheres = [""]
-        if where_clause.strip():
-            wheres.append(where_clause.strip())
         if form_data['target_move'] == 'posted':
             target_move = "AND m.state = 'posted'"
         else:
@@ -44,34 +45,35 @@ class DayBookPdfReport(models.AbstractModel):
         sql = ('''
                 SELECT l.id AS lid, acc.name as accname, l.account_id AS account_id, l.date AS ldate, j.code AS lcode, l.currency_id, 
                 l.amount_currency, l.ref AS lref, l.name AS lname, COALESCE(l.debit,0) AS debit, COALESCE(l.credit,0) AS credit, 
-                COALESCE(SUM(l.debit),0) - COALESCE(SUM(l.credit), 0) AS balance,
-                m.name AS move_name, c.symbol AS currency_code, p.name AS partner_name
+                COALESCE(l.debit,0) - COALESCE(l.credit, 0) AS balance,
+                m.name AS move_name, c.symbol AS currency_code, p.name AS partner_name,
+                SUM(COALESCE(l.debit,0)) OVER (PARTITION BY l.date) AS day_debit,
+                SUM(COALESCE(l.credit,0)) OVER (PARTITION BY l.date) AS day_credit
                 FROM account_move_line l
                 JOIN account_move m ON (l.move_id=m.id)
                 LEFT JOIN res_currency c ON (l.currency_id=c.id)
                 LEFT JOIN res_partner p ON (l.partner_id=p.id)
                 JOIN account_journal j ON (l.journal_id=j.id)
                 JOIN account_account acc ON (l.account_id = acc.id) 
-                WHERE l.account_id IN %s AND l.journal_id IN %s ''' + target_move + ''' AND l.date = %s
-                GROUP BY l.id, l.account_id, l.date,
-                     j.code, l.currency_id, l.amount_currency, l.ref, l.name, m.name, c.symbol, p.name , acc.name
-                     ORDER BY l.date DESC
+                WHERE l.account_id IN %s AND l.journal_id IN %s ''' + target_move + '''
+                    AND l.date >= %s AND l.date <= %s
+                ORDER BY l.date, l.id
         ''')
-        params = (
-        tuple(accounts.ids), tuple(form_data['journal_ids']), pass_date)
+        params = (tuple(accounts.ids), tuple(form_data['journal_ids']),
+                  form_data['date_from'], form_data['date_to'])
         cr.execute(sql, params)
-        data = cr.dictfetchall()
-        res = {}
-        debit = credit = balance = 0.00
-        for line in data:
-            debit += line['debit']
-            credit += line['credit']
-            balance += line['balance']
-        res['debit'] = debit
-        res['credit'] = credit
-        res['balance'] = balance
-        res['lines'] = data
-        return res
+        record = []
+        for line in cr.dictfetchall():
+            if not record or record[-1]['date'] != line['ldate']:
+                record.append({
+                    'date': line['ldate'],
+                    'debit': line['day_debit'],
+                    'credit': line['day_credit'],
+                    'balance': line['day_debit'] - line['day_credit'],
+                    'child_lines': [],
+                })
+            record[-1]['child_lines'].append(line)
+        return record
 
     @api.model
     def _get_report_values(self, docids, data=None):
@@ -93,27 +95,9 @@ class DayBookPdfReport(models.AbstractModel):
             [('id', 'in', active_acc)]) if data['form']['account_ids'] else \
             self.env['account.account'].search([])
 
-        date_start = datetime.strptime(form_data['date_from'],
-                                       '%Y-%m-%d').date()
-        date_end = datetime.strptime(form_data['date_to'], '%Y-%m-%d').date()
-        days = date_end - date_start
-        dates = []
-        record = []
-        for i in range(days.days + 1):
-            dates.append(date_start + timedelta(days=i))
-        for head in dates:
-            pass_date = str(head)
-            accounts_res = self.with_context(
-                data['form'].get('used_context', {}))._get_account_move_entry(
-                accounts, form_data, pass_date)
-            if accounts_res['lines']:
-                record.append({
-                    'date': head,
-                    'debit': accounts_res['debit'],
-                    'credit': accounts_res['credit'],
-                    'balance': accounts_res['balance'],
-                    'child_lines': accounts_res['lines']
-                })
+        record = self.with_context(
+            data['form'].get('used_context', {}))._get_account_move_entry(
+            accounts, form_data)
         return {
             'doc_ids': docids,
             'doc_model': self.model,
@@ -0,0 +1,315 @@
+# -*- coding: utf-8 -*-
+#############################################################################
+#
+#    Cybrosys Technologies Pvt. Ltd.
+#
+#    Copyright (C) 2019-TODAY Cybrosys Technologies(<https://www.cybrosys.com>)
+#    Author: Cybrosys Techno Solutions(<https://www.cybrosys.com>)
+#
+#    You can modify it under the terms of the GNU LESSER
+#    GENERAL PUBLIC LICENSE (LGPL v3), Version 3.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU LESSER GENERAL PUBLIC LICENSE (LGPL v3) for more details.
+#
+#    You should have received a copy of the GNU LESSER GENERAL PUBLIC LICENSE
+#    (LGPL v3) along with this program.
+#    If not, see <http://www.gnu.org/licenses/>.
+#
+#############################################################################
+
+import csv
+import io
+import os
+import tempfile
+import time
+import uuid
+
+import psycopg2.extras
+
+from odoo import api, models, _
+from odoo.exceptions import UserError
+
+try:
+    from odoo.tools.misc import xlsxwriter
+except ImportError:
+    import xlsxwriter
+
+# number of move lines fetched at once from the server side cursor
+LEDGER_ITERSIZE = 5000
+# size of the chunks of the CSV and XLSX exports
+EXPORT_CHUNK_SIZE = 64 * 1024
+
+
+class AccountLedgerEngine(models.AbstractModel):
+    """ Computation of the ledger reports (general ledger, bank book and
+    cash book): the move lines of a set of accounts with their running
+    balance, streamed account by account. The reports inherit from it and
+    select their accounts by overriding :meth:`_get_ledger_accounts`."""
+    _name = 'account.ledger.engine'
+    _description = 'Ledger Report Engine'
+
+    def _get_account_move_entry(self, accounts, init_balance, sortby,
+                                display_account):
+        """
+        :param:
+                accounts: the recordset of accounts
+                init_balance: boolean value of initial_balance
+                sortby: sorting by date or partner and journal
+                display_account: type of account(receivable, payable and both)
+
+        Returns a list of dictionaries of accounts with following key and value {
+                'code': account code,
+                'name': account name,
+                'debit': sum of total debit amount,
+                'credit': sum of total credit amount,
+                'balance': total balance,
+                'amount_currency': sum of amount_currency,
+                'move_lines': list of move line
+        }
+        """
+        return list(self._iter_account_move_entry(
+            accounts, init_balance, sortby, display_account))
+
+    def _get_initial_balances(self, accounts):
+        """ Return the initial balance line of each account, keyed by
+        account id, from the balance snapshots when they cover the period
+        and from a scan of every earlier line otherwise."""
+        balances = self.env['account.balance.snapshot']._get_initial_balances(
+            accounts)
+        if balances is not None:
+            return {account_id: self._initial_balance_line(debit, credit)
+                    for account_id, (debit, credit) in balances.items()}
+        MoveLine = self.env['account.move.line']
+        init_tables, init_where_clause, init_where_params = MoveLine.with_context(
+            date_from=self.env.context.get('date_from'), date_to=False,
+            initial_bal=True)._query_get()
+        init_wheres = [""]
+        if init_where_clause.strip():
+            init_wheres.append(init_where_clause.strip())
+        init_filters = " AND ".join(init_wheres)
+        filters = init_filters.replace('account_move_line__move_id',
+                                       'm').replace('account_move_line',
+                                                    'l')
+        sql = ("""SELECT 0 AS lid, l.account_id AS account_id, '' AS ldate, '' AS lcode, 0.0 AS amount_currency, '' AS lref, 'Initial Balance' AS lname, COALESCE(SUM(l.debit),0.0) AS debit, COALESCE(SUM(l.credit),0.0) AS credit, COALESCE(SUM(l.debit),0) - COALESCE(SUM(l.credit), 0) as balance, '' AS lpartner_id,\
+            '' AS move_name, '' AS mmove_id, '' AS currency_code,\
+            NULL AS currency_id,\
+            '' AS invoice_id, '' AS invoice_type, '' AS invoice_number,\
+            '' AS partner_name\
+            FROM account_move_line l\
+            LEFT JOIN account_move m ON (l.move_id=m.id)\
+            LEFT JOIN res_currency c ON (l.currency_id=c.id)\
+            LEFT JOIN res_partner p ON (l.partner_id=p.id)\
+            LEFT JOIN account_move i ON (m.id =i.id)\
+            JOIN account_journal j ON (l.journal_id=j.id)\
+            WHERE l.account_id IN %s""" + filters + ' GROUP BY l.account_id')
+        params = (tuple(accounts.ids),) + tuple(init_where_params)
+        self.env.cr.execute(sql, params)
+        return {row.pop('account_id'): row
+                for row in self.env.cr.dictfetchall()}
+
+    @api.model
+    def _initial_balance_line(self, debit, credit):
+        """ Build an initial balance line shaped like the rows of the
+        initial balance query."""
+        return {
+            'lid': 0, 'ldate': '', 'lcode': '', 'amount_currency': 0.0,
+            'lref': '', 'lname': 'Initial Balance', 'debit': debit,
+            'credit': credit, 'balance': debit - credit, 'lpartner_id': '',
+            'move_name': '', 'mmove_id': '', 'currency_code': '',
+            'currency_id': None, 'invoice_id': '', 'invoice_type': '',
+            'invoice_number': '', 'partner_name': '',
+        }
+
+    def _iter_move_lines(self, accounts, sortby, init_lines=None):
+        """ Yield the move lines of the accounts, in the order of
+        ``accounts``, read through a server side cursor so that only
+        LEDGER_ITERSIZE lines are held in memory at any time.
+
+        The ``balance`` of each line is the running balance of its account,
+        starting from the initial balance given in ``init_lines``."""
+        MoveLine = self.env['account.move.line']
+        sql_sort = 'l.date, l.move_id'
+        if sortby == 'sort_journal_partner':
+            sql_sort = 'j.code, p.name, l.move_id'
+
+        # Prepare sql query base on selected parameters from wizard
+        tables, where_clause, where_params = MoveLine._query_get()
+        wheres = [""]
+        if where_clause.strip():
+            wheres.append(where_clause.strip())
+        filters = " AND ".join(wheres)
+        filters = filters.replace('account_move_line__move_id', 'm').replace(
+            'account_move_line', 'l')
+
+        sql = ('''SELECT l.id AS lid, l.account_id AS account_id, l.date AS ldate, j.code AS lcode, l.currency_id, l.amount_currency, l.ref AS lref, l.name AS lname, COALESCE(l.debit,0) AS debit, COALESCE(l.credit,0) AS credit,\
+            COALESCE(ib.balance, 0) + SUM(COALESCE(l.debit,0) - COALESCE(l.credit, 0)) OVER (PARTITION BY l.account_id ORDER BY ''' + sql_sort + ''', l.id) AS balance,\
+            m.name AS move_name, c.symbol AS currency_code, p.name AS partner_name\
+            FROM account_move_line l\
+            LEFT JOIN unnest(%s::int[], %s::numeric[]) AS ib(account_id, balance) ON (ib.account_id = l.account_id)\
+            JOIN account_move m ON (l.move_id=m.id)\
+            LEFT JOIN res_currency c ON (l.currency_id=c.id)\
+            LEFT JOIN res_partner p ON (l.partner_id=p.id)\
+            JOIN account_journal j ON (l.journal_id=j.id)\
+            JOIN account_account acc ON (l.account_id = acc.id) \
+            WHERE l.account_id IN %s ''' + filters + ''' ORDER BY array_position(%s, l.account_id), ''' + sql_sort + ', l.id')
+        init_lines = init_lines or {}
+        params = (list(init_lines), [line['balance'] for line in init_lines.values()],
+                  tuple(accounts.ids)) + tuple(where_params) + (accounts.ids,)
+        cursor = self.env.cr._cnx.cursor(
+            'ledger_%s' % uuid.uuid4().hex,
+            cursor_factory=psycopg2.extras.RealDictCursor)
+        cursor.itersize = LEDGER_ITERSIZE
+        try:
+            cursor.execute(sql, params)
+            for row in cursor:
+                yield row
+        finally:
+            cursor.close()
+
+    def _iter_account_move_entry(self, accounts, init_balance, sortby,
+                                 display_account):
+        """ Lazy version of :meth:`_get_account_move_entry`: the move lines
+        are streamed in account order and the accounts are yielded one by
+        one, so that only the lines of the current account are in memory.
+        """
+        init_lines = self._get_initial_balances(accounts) if init_balance \
+            else {}
+        move_lines = self._iter_move_lines(accounts, sortby, init_lines)
+        row = next(move_lines, None)
+        for account in accounts:
+            currency = account.currency_id and account.currency_id or account.company_id.currency_id
+            res = dict((fn, 0.0) for fn in ['credit', 'debit', 'balance'])
+            res['code'] = account.code
+            res['name'] = account.name
+            res['move_lines'] = []
+            if account.id in init_lines:
+                res['move_lines'].append(init_lines[account.id])
+            for line in res['move_lines']:
+                res['debit'] += line['debit']
+                res['credit'] += line['credit']
+                res['balance'] = line['balance']
+            while row is not None and row['account_id'] == account.id:
+                row = dict(row)
+                del row['account_id']
+                res['debit'] += row['debit']
+                res['credit'] += row['credit']
+                res['balance'] = row['balance']
+                res['move_lines'].append(row)
+                row = next(move_lines, None)
+            if display_account == 'all':
+                yield res
+            elif display_account == 'movement' and res.get('move_lines'):
+                yield res
+            elif display_account == 'not_zero' and not currency.is_zero(
+                    res['balance']):
+                yield res
+
+    def _get_ledger_accounts(self, data):
+        """ Return the accounts printed for the wizard ``data``. Meant to be
+        overridden by the reports: all the accounts by default."""
+        return self.env['account.account'].search([])
+
+    def _get_ledger_display_account(self, data):
+        """ Return which accounts of :meth:`_get_ledger_accounts` are
+        printed: 'all', 'movement' or 'not_zero'."""
+        return data['form']['display_account']
+
+    def _iter_ledger(self, data):
+        """ Lazily compute the ledger of the wizard ``data``."""
+        form = data['form']
+        return self.with_context(
+            form.get('used_context', {}))._iter_account_move_entry(
+            self._get_ledger_accounts(data), form.get('initial_balance', True),
+            form.get('sortby', 'sort_date'),
+            self._get_ledger_display_account(data))
+
+    def _export_ledger(self, data, file_format):
+        """ Yield the ledger of the wizard ``data`` as chunks of a CSV or
+        XLSX file, account by account. Used instead of the PDF for ledgers
+        too large to be rendered."""
+        entries = self._iter_ledger(data)
+        header = [_('Account'), _('Date'), _('JRNL'), _('Partner'), _('Ref'),
+                  _('Move'), _('Entry Label'), _('Debit'), _('Credit'),
+                  _('Balance'), _('Currency')]
+        if file_format == 'csv':
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            writer.writerow(header)
+            for account in entries:
+                for line in account['move_lines']:
+                    writer.writerow(self._export_line(account, line))
+                writer.writerow([
+                    '%s %s' % (account['code'], account['name']), '', '', '',
+                    '', '', '', account['debit'], account['credit'],
+                    account['balance'], ''])
+                if buffer.tell() >= EXPORT_CHUNK_SIZE:
+                    yield buffer.getvalue().encode('utf-8')
+                    buffer.seek(0)
+                    buffer.truncate()
+            yield buffer.getvalue().encode('utf-8')
+            return
+        handle, path = tempfile.mkstemp(suffix='.xlsx')
+        os.close(handle)
+        try:
+            workbook = xlsxwriter.Workbook(path, {'constant_memory': True,
+                                                  'default_date_format':
+                                                      'yyyy-mm-dd'})
+            sheet = workbook.add_worksheet(self._description[:31])
+            bold = workbook.add_format({'bold': True})
+            sheet.write_row(0, 0, header, bold)
+            index = 1
+            for account in entries:
+                for line in account['move_lines']:
+                    sheet.write_row(index, 0, self._export_line(account, line))
+                    index += 1
+                sheet.write_row(index, 0, [
+                    '%s %s' % (account['code'], account['name']), '', '', '',
+                    '', '', '', account['debit'], account['credit'],
+                    account['balance']], bold)
+                index += 1
+            workbook.close()
+            with open(path, 'rb') as export:
+                chunk = export.read(EXPORT_CHUNK_SIZE)
+                while chunk:
+                    yield chunk
+                    chunk = export.read(EXPORT_CHUNK_SIZE)
+        finally:
+            os.unlink(path)
+
+    def _export_line(self, account, line):
+        return [account['code'], line['ldate'], line['lcode'],
+                line['partner_name'], line['lref'], line['move_name'],
+                line['lname'], line['debit'], line['credit'], line['balance'],
+                line.get('currency_code') or '']
+
+    @api.model
+    def _get_report_values(self, docids, data=None):
+        if not data.get('form') or not self.env.context.get('active_model'):
+            raise UserError(
+                _("Form content is missing, this report cannot be printed."))
+
+        self.model = self.env.context.get('active_model')
+        docs = self.env[self.model].browse(
+            self.env.context.get('active_ids', []))
+
+        codes = []
+        if data['form'].get('journal_ids', False):
+            codes = [journal.code for journal in
+                     self.env['account.journal'].search(
+                         [('id', 'in', data['form']['journal_ids'])])]
+
+        # the accounts are computed while the report is rendered, one at a
+        # time, instead of being all loaded beforehand
+        accounts_res = self._iter_ledger(data)
+        return {
+            'doc_ids': docids,
+            'doc_model': self.model,
+            'data': data['form'],
+            'docs': docs,
+            'time': time,
+            'Accounts': accounts_res,
+            'print_journal': codes,
+        }
@@ -60,73 +60,91 @@ class ReportFinancial(models.AbstractModel):
                 res[row['id']] = row
         return res
 
-    def _compute_report_balance(self, reports):
-
+    def _get_report_accounts(self, reports):
+        """ Return a dictionary with key=the ID of a record reachable from
+        the given reports whose amount comes from accounts, and value=those
+        accounts. The account types are resolved with a single search."""
+        nodes = self.env['account.financial.report']
+        todo = reports
+        while todo:
+            nodes |= todo
+            todo = todo.filtered(lambda r: r.type == 'accounts').mapped(
+                'parent_id') - nodes
+        account_types = nodes.filtered(
+            lambda r: r.type == 'account_type').mapped('account_type_ids')
+        type_accounts = self.env['account.account']
+        if account_types:
+            type_accounts = type_accounts.search(
+                [('user_type_id', 'in', account_types.ids)])
         res = {}
+        for report in nodes:
+            if report.type == 'account_type':
+                res[report.id] = type_accounts.filtered(
+                    lambda a: a.user_type_id in report.account_type_ids)
+            elif report.type == 'sum' or (report.type == 'account_report'
+                                          and report.account_report_id):
+                res[report.id] = report.account_ids
+        return res
+
+    def _compute_report_balance(self, reports, report_accounts=None):
+        """ The leaf account balances are fetched with one query, each
+        record being computed once; ``report_accounts`` is the result of
+        :meth:`_get_report_accounts`, shared by the comparison column."""
+        if report_accounts is None:
+            report_accounts = self._get_report_accounts(reports)
+        balances = self._compute_account_balance(
+            self.env['account.account'].union(*report_accounts.values()))
+        cash_in = self.env.ref(
+            'base_accounting_kit.cash_in_from_operation0') | self.env.ref(
+            'base_accounting_kit.cash_in_financial0') | self.env.ref(
+            'base_accounting_kit.cash_in_investing0')
+        cash_out = self.env.ref(
+            'base_accounting_kit.cash_out_operation1') | self.env.ref(
+            'base_accounting_kit.cash_out_financial1') | self.env.ref(
+            'base_accounting_kit.cash_out_investing1')
         fields = ['credit', 'debit', 'balance']
-        for report in reports:
+        res = {}
+
+        def _compute(report):
             if report.id in res:
-                continue
-            res[report.id] = dict((fn, 0.0) for fn in fields)
+                return res[report.id]
+            values = res[report.id] = dict((fn, 0.0) for fn in fields)
             if report.type == 'accounts':
-                # it's the sum of credit or debit
-                res2 = self._compute_report_balance(report.parent_id)
-                for key, value in res2.items():
-                    cash_in_operation = self.env.ref(
-                        'base_accounting_kit.cash_in_from_operation0')
-                    cash_out_operation = self.env.ref(
-                        'base_accounting_kit.cash_out_operation1')
-                    cash_in_financial = self.env.ref(
-                        'base_accounting_kit.cash_in_financial0')
-                    cash_out_financial = self.env.ref(
-                        'base_accounting_kit.cash_out_financial1')
-                    cash_in_investing = self.env.ref(
-                        'base_accounting_kit.cash_in_investing0')
-                    cash_out_investing = self.env.ref(
-                        'base_accounting_kit.cash_out_investing1')
-                    if report == cash_in_operation or report == cash_in_financial or report == cash_in_investing:
-                        res[report.id]['debit'] += value['debit']
-                        res[report.id]['balance'] += value['debit']
-                    elif report == cash_out_operation or report == cash_out_financial or report == cash_out_investing:
-                        res[report.id]['credit'] += value['credit']
-                        res[report.id]['balance'] += -(value['credit'])
-            elif report.type == 'account_type':
-                # it's the sum the leaf accounts with such an account type
-                accounts = self.env['account.account'].search(
-                    [('user_type_id', 'in', report.account_type_ids.ids)])
-                res[report.id]['account'] = self._compute_account_balance(
-                    accounts)
-                for value in res[report.id]['account'].values():
-                    for field in fields:
-                        res[report.id][field] += value.get(field)
-            elif report.type == 'account_report' and report.account_report_id:
-                # it's the amount of the linked
-                res[report.id]['account'] = self._compute_account_balance(
-                    report.account_ids)
-                for value in res[report.id]['account'].values():
+                # it's the inflow or the outflow of the parent
+                if report.parent_id:
+                    parent = _compute(report.parent_id)
+                    if report in cash_in:
+                        values['debit'] += parent['debit']
+                        values['balance'] += parent['debit']
+                    elif report in cash_out:
+                        values['credit'] += parent['credit']
+                        values['balance'] += -(parent['credit'])
+            elif report.id in report_accounts:
+                # it's the sum of the linked accounts, or of the leaf
+                # accounts with such an account type
+                values['account'] = dict(
+                    (account.id, dict(balances[account.id]))
+                    for account in report_accounts[report.id])
+                for value in values['account'].values():
                     for field in fields:
-                        res[report.id][field] += value.get(field)
+                        values[field] += value.get(field)
+            return values
 
-            elif report.type == 'sum':
-                # it's the sum of the linked accounts
-                res[report.id]['account'] = self._compute_account_balance(
-                    report.account_ids)
-                for values in res[report.id]['account'].values():
-                    for field in fields:
-                        res[report.id][field] += values.get(field)
-        return res
+        return dict((report.id, _compute(report)) for report in reports)
 
     def get_account_lines(self, data):
         lines = []
         account_report = self.env['account.financial.report'].search(
             [('id', '=', data['account_report_id'][0])])
         child_reports = account_report._get_children_by_order()
+        report_accounts = self._get_report_accounts(child_reports)
         res = self.with_context(
-            data.get('used_context'))._compute_report_balance(child_reports)
+            data.get('used_context'))._compute_report_balance(
+            child_reports, report_accounts)
         if data['enable_filter']:
             comparison_res = self.with_context(
                 data.get('comparison_context'))._compute_report_balance(
-                child_reports)
+                child_reports, report_accounts)
             for report_id, value in comparison_res.items():
                 res[report_id]['comp_bal'] = value['balance']
                 report_acc = res[report_id].get('account')
@@ -23,8 +23,6 @@
 import time
 from datetime import datetime
 
-from dateutil.relativedelta import relativedelta
-
 from odoo import api, models, _
 from odoo.exceptions import UserError
 from odoo.tools import float_is_zero
@@ -47,224 +45,124 @@ class ReportAgedPartnerBalance(models.AbstractModel):
         # 61 - 90  : 2018-12-09 - 2018-11-10
         # 91 - 120 : 2018-11-09 - 2018-10-11
         # +120     : 2018-10-10
-        periods = {}
-        start = datetime.strptime(date_from, "%Y-%m-%d")
-        date_from = datetime.strptime(date_from, "%Y-%m-%d").date()
-        for i in range(5)[::-1]:
-            stop = start - relativedelta(days=period_length)
-            period_name = str((5 - (i + 1)) * period_length + 1) + '-' + str(
-                (5 - i) * period_length)
-            period_stop = (start - relativedelta(days=1)).strftime('%Y-%m-%d')
-            if i == 0:
-                period_name = '+' + str(4 * period_length)
-            periods[str(i)] = {
-                'name': period_name,
-                'stop': period_stop,
-                'start': (i != 0 and stop.strftime('%Y-%m-%d') or False),
-            }
-            start = stop
-
-        res = []
-        total = []
+        #
+        # The open amount of every line at date_from, its partial
+        # reconciliations up to date_from deducted, is aged and summed per
+        # partner in a single query: period '4' holds the lines overdue by
+        # 1 to period_length days, ..., period '0' the ones overdue by more
+        # than 4 * period_length days and 'direction' the lines not due.
+        # The third value returned maps each partner to its number of open
+        # lines.
         cr = self.env.cr
-        user_company = self.env.user.company_id
+        user_company = self.env.company
         user_currency = user_company.currency_id
-        ResCurrency = self.env['res.currency'].with_context(date=date_from)
         company_ids = self._context.get('company_ids') or [user_company.id]
         move_state = ['draft', 'posted']
         if target_move == 'posted':
             move_state = ['posted']
-        arg_list = (tuple(move_state), tuple(account_type))
-        # build the reconciliation clause to see what partner needs to be printed
-        reconciliation_clause = '(l.reconciled IS FALSE)'
-        cr.execute(
-            'SELECT debit_move_id, credit_move_id FROM account_partial_reconcile where max_date > %s',
-            (date_from,))
-        reconciled_after_date = []
-        for row in cr.fetchall():
-            reconciled_after_date += [row[0], row[1]]
-        if reconciled_after_date:
-            reconciliation_clause = '(l.reconciled IS FALSE OR l.id IN %s)'
-            arg_list += (tuple(reconciled_after_date),)
-        arg_list += (date_from, tuple(company_ids))
+        date_from = datetime.strptime(date_from, "%Y-%m-%d").date()
+
+        # conversion of the company currencies to the currency of the user
+        rate_table, rate_params = self.env[
+            'account.currency.converter']._get_rate_table(
+            self.env['res.company'].browse(company_ids).mapped('currency_id'),
+            user_currency, date_from)
+
+        arg_list = [date_from, date_from, period_length,
+                    user_currency.decimal_places,
+                    user_currency.decimal_places] + rate_params + [
+            date_from, tuple(move_state), tuple(account_type), date_from,
+            tuple(company_ids), date_from]
         query = '''
-            SELECT DISTINCT l.partner_id, UPPER(res_partner.name)
-            FROM account_move_line AS l left join res_partner on l.partner_id = res_partner.id, account_account, account_move am
-            WHERE (l.account_id = account_account.id)
-                AND (l.move_id = am.id)
-                AND (am.state IN %s)
-                AND (account_account.internal_type IN %s)
-                AND ''' + reconciliation_clause + '''
-                AND (l.date <= %s)
-                AND l.company_id IN %s
-            ORDER BY UPPER(res_partner.name)'''
+            WITH aged AS (
+                SELECT l.partner_id,
+                       CASE WHEN COALESCE(l.date_maturity, l.date) >= %s
+                            THEN 6
+                            ELSE 4 - LEAST(
+                                (%s - COALESCE(l.date_maturity, l.date) - 1)
+                                / %s, 4)
+                       END AS period,
+                       ROUND(l.balance * rate.factor, %s) AS balance,
+                       ROUND((l.balance + COALESCE(partial.amount, 0))
+                             * rate.factor, %s) AS amount
+                FROM account_move_line l
+                JOIN account_account a ON a.id = l.account_id
+                JOIN account_move am ON am.id = l.move_id
+                JOIN ''' + rate_table + '''
+                    ON rate.currency_id = l.company_currency_id
+                LEFT JOIN LATERAL (
+                    SELECT COALESCE(SUM(pr.amount) FILTER (
+                               WHERE pr.credit_move_id = l.id), 0)
+                         - COALESCE(SUM(pr.amount) FILTER (
+                               WHERE pr.debit_move_id = l.id), 0) AS amount
+                    FROM account_partial_reconcile pr
+                    WHERE (pr.credit_move_id = l.id OR pr.debit_move_id = l.id)
+                      AND pr.max_date <= %s
+                ) partial ON TRUE
+                WHERE am.state IN %s
+                  AND a.internal_type IN %s
+                  AND l.date <= %s
+                  AND l.company_id IN %s
+                  -- the line is open, or was still open at date_from
+                  AND (l.reconciled IS FALSE OR EXISTS (
+                      SELECT 1 FROM account_partial_reconcile pr
+                      WHERE (pr.debit_move_id = l.id OR pr.credit_move_id = l.id)
+                        AND pr.max_date > %s))
+            )
+            SELECT aged.partner_id, p.name, p.trust,
+                   COALESCE(SUM(amount) FILTER (WHERE period = 6), 0),
+                   COALESCE(SUM(amount) FILTER (WHERE period = 0), 0),
+                   COALESCE(SUM(amount) FILTER (WHERE period = 1), 0),
+                   COALESCE(SUM(amount) FILTER (WHERE period = 2), 0),
+                   COALESCE(SUM(amount) FILTER (WHERE period = 3), 0),
+                   COALESCE(SUM(amount) FILTER (WHERE period = 4), 0),
+                   COUNT(*)
+            FROM aged
+            LEFT JOIN res_partner p ON p.id = aged.partner_id
+            WHERE aged.balance != 0 AND aged.amount != 0
+            GROUP BY aged.partner_id, p.name, p.trust
+            ORDER BY UPPER(p.name)'''
         cr.execute(query, arg_list)
 
-        partners = cr.dictfetchall()
-        # put a total of 0
-        for i in range(7):
-            total.append(0)
-
-        # Build a string like (1,2,3) for easy use in SQL query
-        partner_ids = [partner['partner_id'] for partner in partners if
-                       partner['partner_id']]
-        lines = dict(
-            (partner['partner_id'] or False, []) for partner in partners)
-        if not partner_ids:
-            return [], [], {}
-
-        # This dictionary will store the not due amount of all partners
-        undue_amounts = {}
-        query = '''SELECT l.id
-                FROM account_move_line AS l, account_account, account_move am
-                WHERE (l.account_id = account_account.id) AND (l.move_id = am.id)
-                    AND (am.state IN %s)
-                    AND (account_account.internal_type IN %s)
-                    AND (COALESCE(l.date_maturity,l.date) >= %s)\
-                    AND ((l.partner_id IN %s) OR (l.partner_id IS NULL))
-                AND (l.date <= %s)
-                AND l.company_id IN %s'''
-        cr.execute(query, (
-            tuple(move_state), tuple(account_type), date_from,
-            tuple(partner_ids), date_from, tuple(company_ids)))
-        aml_ids = cr.fetchall()
-        aml_ids = aml_ids and [x[0] for x in aml_ids] or []
-        for line in self.env['account.move.line'].browse(aml_ids):
-            partner_id = line.partner_id.id or False
-            if partner_id not in undue_amounts:
-                undue_amounts[partner_id] = 0.0
-            line_amount = ResCurrency._compute(line.company_id.currency_id,
-                                               user_currency, line.balance)
-            if user_currency.is_zero(line_amount):
-                continue
-            for partial_line in line.matched_debit_ids:
-                if partial_line.max_date <= date_from:
-                    line_amount += ResCurrency._compute(
-                        partial_line.company_id.currency_id, user_currency,
-                        partial_line.amount)
-            for partial_line in line.matched_credit_ids:
-                if partial_line.max_date <= date_from:
-                    line_amount -= ResCurrency._compute(
-                        partial_line.company_id.currency_id, user_currency,
-                        partial_line.amount)
-            if not self.env.user.company_id.currency_id.is_zero(line_amount):
-                undue_amounts[partner_id] += line_amount
-                lines[partner_id].append({
-                    'line': line,
-                    'amount': line_amount,
-                    'period': 6,
-                })
-
-        # Use one query per period and store results in history (a list variable)
-        # Each history will contain: history[1] = {'<partner_id>': <partner_debit-credit>}
-        history = []
-        for i in range(5):
-            args_list = (
-            tuple(move_state), tuple(account_type), tuple(partner_ids),)
-            dates_query = '(COALESCE(l.date_maturity,l.date)'
-
-            if periods[str(i)]['start'] and periods[str(i)]['stop']:
-                dates_query += ' BETWEEN %s AND %s)'
-                args_list += (
-                periods[str(i)]['start'], periods[str(i)]['stop'])
-            elif periods[str(i)]['start']:
-                dates_query += ' >= %s)'
-                args_list += (periods[str(i)]['start'],)
-            else:
-                dates_query += ' <= %s)'
-                args_list += (periods[str(i)]['stop'],)
-            args_list += (date_from, tuple(company_ids))
-
-            query = '''SELECT l.id
-                    FROM account_move_line AS l, account_account, account_move am
-                    WHERE (l.account_id = account_account.id) AND (l.move_id = am.id)
-                        AND (am.state IN %s)
-                        AND (account_account.internal_type IN %s)
-                        AND ((l.partner_id IN %s) OR (l.partner_id IS NULL))
-                        AND ''' + dates_query + '''
-                    AND (l.date <= %s)
-                    AND l.company_id IN %s'''
-            cr.execute(query, args_list)
-            partners_amount = {}
-            aml_ids = cr.fetchall()
-            aml_ids = aml_ids and [x[0] for x in aml_ids] or []
-            for line in self.env['account.move.line'].browse(aml_ids):
-                partner_id = line.partner_id.id or False
-                if partner_id not in partners_amount:
-                    partners_amount[partner_id] = 0.0
-                line_amount = ResCurrency._compute(line.company_id.currency_id,
-                                                   user_currency, line.balance)
-                if user_currency.is_zero(line_amount):
-                    continue
-                for partial_line in line.matched_debit_ids:
-                    if partial_line.max_date <= date_from:
-                        line_amount += ResCurrency._compute(
-                            partial_line.company_id.currency_id, user_currency,
-                            partial_line.amount)
-                for partial_line in line.matched_credit_ids:
-                    if partial_line.max_date <= date_from:
-                        line_amount -= ResCurrency._compute(
-                            partial_line.company_id.currency_id, user_currency,
-                            partial_line.amount)
-
-                if not self.env.user.company_id.currency_id.is_zero(
-                        line_amount):
-                    partners_amount[partner_id] += line_amount
-                    lines[partner_id].append({
-                        'line': line,
-                        'amount': line_amount,
-                        'period': i + 1,
-                    })
-            history.append(partners_amount)
-
-        for partner in partners:
-            if partner['partner_id'] is None:
-                partner['partner_id'] = False
-            at_least_one_amount = False
-            values = {}
-            undue_amt = 0.0
-            if partner[
-                'partner_id'] in undue_amounts:  # Making sure this partner actually was found by the query
-                undue_amt = undue_amounts[partner['partner_id']]
-
-            total[6] = total[6] + undue_amt
-            values['direction'] = undue_amt
-            if not float_is_zero(values['direction'],
-                                 precision_rounding=self.env.user.company_id.currency_id.rounding):
-                at_least_one_amount = True
+        rows = cr.fetchall()
+        lines = {row[0] or False: row[9] for row in rows}
+        res, total = self._get_partner_values(rows)
+        return res, total, lines
 
+    def _get_partner_values(self, rows):
+        """ Build the partner lines of the report and their totals from
+        rows of (partner_id, name, trust, not due amount, amounts of the
+        periods 0 to 4, number of open lines)."""
+        res = []
+        total = [0.0] * 7
+        rounding = self.env.company.currency_id.rounding
+        for row in rows:
+            partner_id, name, trust, undue_amt = row[:4]
+            partner_id = partner_id or False
+            values = {'direction': undue_amt}
             for i in range(5):
-                during = False
-                if partner['partner_id'] in history[i]:
-                    during = [history[i][partner['partner_id']]]
-                # Adding counter
-                total[(i)] = total[(i)] + (during and during[0] or 0)
-                values[str(i)] = during and during[0] or 0.0
-                if not float_is_zero(values[str(i)],
-                                     precision_rounding=self.env.user.company_id.currency_id.rounding):
-                    at_least_one_amount = True
+                values[str(i)] = row[4 + i]
+            at_least_one_amount = any(
+                not float_is_zero(values[key], precision_rounding=rounding)
+                for key in ['direction'] + [str(i) for i in range(5)])
             values['total'] = sum(
                 [values['direction']] + [values[str(i)] for i in range(5)])
-            ## Add for total
-            total[(i + 1)] += values['total']
-            values['partner_id'] = partner['partner_id']
-            if partner['partner_id']:
-                browsed_partner = self.env['res.partner'].browse(
-                    partner['partner_id'])
-                values['name'] = browsed_partner.name and len(
-                    browsed_partner.name) >= 45 and browsed_partner.name[
-                                                    0:40] + '...' or browsed_partner.name
-                values['trust'] = browsed_partner.trust
+            values['partner_id'] = partner_id
+            if partner_id:
+                values['name'] = name and len(name) >= 45 and \
+                    name[0:40] + '...' or name
+                values['trust'] = trust
             else:
                 values['name'] = _('Unknown Partner')
                 values['trust'] = False
-
-            if at_least_one_amount or (
-                    self._context.get('include_nullified_amount') and lines[
-                partner['partner_id']]):
+            if at_least_one_amount or self._context.get(
+                    'include_nullified_amount'):
+                total[6] += values['direction']
+                for i in range(5):
+                    total[i] += values[str(i)]
+                total[5] += values['total']
                 res.append(values)
-
-        return res, total, lines
+        return res, total
 
     @api.model
     def _get_report_values(self, docids, data=None):
@@ -287,11 +185,18 @@ class ReportAgedPartnerBalance(models.AbstractModel):
         else:
             account_type = ['payable', 'receivable']
 
-        movelines, total, dummy = self._get_partner_move_lines(account_type,
-                                                               date_from,
-                                                               target_move,
-                                                               data['form'][
-                                                                   'period_length'])
+        snapshot = None
+        if data['form'].get('use_snapshot') and target_move == 'posted':
+            snapshot = self.env['account.aged.snapshot']._get_aged_balances(
+                self._context.get('company_ids') or self.env.company.ids,
+                date_from, data['form']['result_selection'],
+                data['form']['period_length'])
+        if snapshot is not None:
+            movelines, total = snapshot
+        else:
+            movelines, total, dummy = self._get_partner_move_lines(
+                account_type, date_from, target_move,
+                data['form']['period_length'])
         return {
             'doc_ids': self.ids,
             'doc_model': model,
@@ -30,72 +30,77 @@ class ReportPartnerLedger(models.AbstractModel):
     _name = 'report.base_accounting_kit.report_partnerledger'
     _description = 'Partner Ledger Report'
 
-    def _lines(self, data, partner):
-        full_account = []
+    def _get_partner_lines(self, data):
+        """ Return the lines of every partner of the ledger, keyed by
+        partner id and in the order they are printed, with their running
+        balance in ``progress`` and the debit/credit totals of their partner.
+
+        All the partners are read by a single query, the totals and running
+        balances being computed by window functions. The amounts are
+        converted to the currency of the current company at the end date of
+        the report.
+        """
         currency = self.env['res.currency']
+        used_context = data['form'].get('used_context', {})
         query_get_data = self.env['account.move.line'].with_context(
-            data['form'].get('used_context', {}))._query_get()
+            used_context)._query_get()
         reconcile_clause = "" if data['form'][
             'reconciled'] else ' AND "account_move_line".full_reconcile_id IS NULL '
-        params = [partner.id, tuple(data['computed']['move_state']),
-                  tuple(data['computed']['account_ids'])] + \
+        company_currency = self.env.company.currency_id
+        companies = self.env['res.company'].browse(
+            used_context.get('company_ids') or self.env.companies.ids)
+        rate_table, rate_params = self.env[
+            'account.currency.converter']._get_rate_table(
+            companies.mapped('currency_id'), company_currency,
+            used_context.get('date_to'))
+        params = rate_params + [company_currency.decimal_places,
+                                company_currency.decimal_places,
+                                tuple(data['computed']['move_state']),
+                                tuple(data['computed']['account_ids'])] + \
                  query_get_data[2]
         query = """
-            SELECT "account_move_line".id, "account_move_line".date, j.code, acc.code as a_code, acc.name as a_name, "account_move_line".ref, m.name as move_name, "account_move_line".name, "account_move_line".debit, "account_move_line".credit, "account_move_line".amount_currency,"account_move_line".currency_id, c.symbol AS currency_code
+            SELECT "account_move_line".partner_id, p.ref AS partner_ref, p.name AS partner_name,
+                "account_move_line".id, "account_move_line".date, j.code, acc.code as a_code, acc.name as a_name, "account_move_line".ref, m.name as move_name, "account_move_line".name, amount.debit, amount.credit, "account_move_line".amount_currency,"account_move_line".currency_id, c.symbol AS currency_code,
+                SUM(amount.debit - amount.credit) OVER (PARTITION BY "account_move_line".partner_id ORDER BY "account_move_line".date, "account_move_line".id) AS progress,
+                SUM(amount.debit) OVER (PARTITION BY "account_move_line".partner_id) AS partner_debit,
+                SUM(amount.credit) OVER (PARTITION BY "account_move_line".partner_id) AS partner_credit
             FROM """ + query_get_data[0] + """
+            JOIN """ + rate_table + """ ON (rate.currency_id = "account_move_line".company_currency_id)
+            CROSS JOIN LATERAL (
+                SELECT ROUND("account_move_line".debit * rate.factor, %s) AS debit,
+                       ROUND("account_move_line".credit * rate.factor, %s) AS credit
+            ) amount
+            JOIN res_partner p ON ("account_move_line".partner_id = p.id)
             LEFT JOIN account_journal j ON ("account_move_line".journal_id = j.id)
             LEFT JOIN account_account acc ON ("account_move_line".account_id = acc.id)
             LEFT JOIN res_currency c ON ("account_move_line".currency_id=c.id)
             LEFT JOIN account_move m ON (m.id="account_move_line".move_id)
-            WHERE "account_move_line".partner_id = %s
-                AND m.state IN %s
+            WHERE m.state IN %s
                 AND "account_move_line".account_id IN %s AND """ + \
                 query_get_data[1] + reconcile_clause + """
-                ORDER BY "account_move_line".date"""
+                ORDER BY "account_move_line".partner_id, "account_move_line".date, "account_move_line".id"""
         self.env.cr.execute(query, tuple(params))
-        res = self.env.cr.dictfetchall()
-        sum = 0.0
-        lang_code = self.env.context.get('lang') or 'en_US'
-        lang = self.env['res.lang']
-        lang_id = lang._lang_get(lang_code)
-        date_format = lang_id.date_format
-        for r in res:
-            r['date'] = r['date']
+        partner_lines = {}
+        for r in self.env.cr.dictfetchall():
             r['displayed_name'] = '-'.join(
                 r[field_name] for field_name in ('move_name', 'ref', 'name')
                 if r[field_name] not in (None, '', '/')
             )
-            sum += r['debit'] - r['credit']
-            r['progress'] = sum
             r['currency_id'] = currency.browse(r.get('currency_id'))
-            full_account.append(r)
-        return full_account
+            partner_lines.setdefault(r['partner_id'], []).append(r)
+        return partner_lines
 
-    def _sum_partner(self, data, partner, field):
+    @staticmethod
+    def _sum_lines(lines, field):
         if field not in ['debit', 'credit', 'debit - credit']:
             return
-        result = 0.0
-        query_get_data = self.env['account.move.line'].with_context(
-            data['form'].get('used_context', {}))._query_get()
-        reconcile_clause = "" if data['form'][
-            'reconciled'] else ' AND "account_move_line".full_reconcile_id IS NULL '
-
-        params = [partner.id, tuple(data['computed']['move_state']),
-                  tuple(data['computed']['account_ids'])] + \
-                 query_get_data[2]
-        query = """SELECT sum(""" + field + """)
-                FROM """ + query_get_data[0] + """, account_move AS m
-                WHERE "account_move_line".partner_id = %s
-                    AND m.id = "account_move_line".move_id
-                    AND m.state IN %s
-                    AND account_id IN %s
-                    AND """ + query_get_data[1] + reconcile_clause
-        self.env.cr.execute(query, tuple(params))
-
-        contemp = self.env.cr.fetchone()
-        if contemp is not None:
-            result = contemp[0] or 0.0
-        return result
+        if not lines:
+            return 0.0
+        if field == 'debit':
+            return lines[0]['partner_debit']
+        if field == 'credit':
+            return lines[0]['partner_credit']
+        return lines[0]['partner_debit'] - lines[0]['partner_credit']
 
     @api.model
     def _get_report_values(self, docids, data=None):
@@ -106,8 +111,6 @@ class ReportPartnerLedger(models.AbstractModel):
         data['computed'] = {}
 
         obj_partner = self.env['res.partner']
-        query_get_data = self.env['account.move.line'].with_context(
-            data['form'].get('used_context', {}))._query_get()
         data['computed']['move_state'] = ['draft', 'posted']
         if data['form'].get('target_move', 'all') == 'posted':
             data['computed']['move_state'] = ['posted']
@@ -127,30 +130,19 @@ class ReportPartnerLedger(models.AbstractModel):
                             (tuple(data['computed']['ACCOUNT_TYPE']),))
         data['computed']['account_ids'] = [a for (a,) in
                                            self.env.cr.fetchall()]
-        params = [tuple(data['computed']['move_state']),
-                  tuple(data['computed']['account_ids'])] + query_get_data[2]
-        reconcile_clause = "" if data['form'][
-            'reconciled'] else ' AND "account_move_line".full_reconcile_id IS NULL '
-        query = """
-            SELECT DISTINCT "account_move_line".partner_id
-            FROM """ + query_get_data[0] + """, account_account AS account, account_move AS am
-            WHERE "account_move_line".partner_id IS NOT NULL
-                AND "account_move_line".account_id = account.id
-                AND am.id = "account_move_line".move_id
-                AND am.state IN %s
-                AND "account_move_line".account_id IN %s
-                AND NOT account.deprecated
-                AND """ + query_get_data[1] + reconcile_clause
-        self.env.cr.execute(query, tuple(params))
-        partner_ids = [res['partner_id'] for res in self.env.cr.dictfetchall()]
+        partner_lines = self._get_partner_lines(data)
+        partner_ids = sorted(
+            partner_lines, key=lambda partner_id: (
+                partner_lines[partner_id][0]['partner_ref'] or '',
+                partner_lines[partner_id][0]['partner_name'] or ''))
         partners = obj_partner.browse(partner_ids)
-        partners = sorted(partners, key=lambda x: (x.ref or '', x.name or ''))
         return {
             'doc_ids': partner_ids,
             'doc_model': self.env['res.partner'],
             'data': data,
             'docs': partners,
             'time': time,
-            'lines': self._lines,
-            'sum_partner': self._sum_partner,
+            'lines': lambda data, partner: partner_lines.get(partner.id, []),
+            'sum_partner': lambda data, partner, field: self._sum_lines(
+                partner_lines.get(partner.id), field),
         }
@@ -24,65 +24,158 @@ import time
 
 from odoo import api, models, _
 from odoo.exceptions import UserError
+from odoo.tools import float_is_zero
 
 
 class ReportTrialBalance(models.AbstractModel):
     _name = 'report.base_accounting_kit.report_trial_balance'
     _description = 'Trial Balance Report'
+    # served from account.report.cache to identical requests
+    _cache_results = True
 
-    def _get_accounts(self, accounts, display_account):
+    def _get_periods(self, data):
+        """ Return the periods of the report columns, oldest first, as
+        dicts with a ``name`` and the ``date_from``/``date_to`` of the
+        period. Without comparison periods, the single column covers the
+        dates of the wizard."""
+        form = data['form']
+        return form.get('periods') or [{
+            'name': _('Balance'),
+            'date_from': form.get('used_context', {}).get('date_from'),
+            'date_to': form.get('used_context', {}).get('date_to'),
+        }]
+
+    def _get_accounts(self, accounts, display_account, periods=None):
         """ compute the balance, debit and credit for the provided accounts
             :Arguments:
                 `accounts`: list of accounts record,
                 `display_account`: it's used to display either all accounts or those accounts which balance is > 0
-            :Returns a list of dictionary of Accounts with following key and value
+                `periods`: list of dictionaries with the `date_from` and
+                    `date_to` of each column, the dates of the context by
+                    default
+            :Returns a list of dictionary of Accounts and account groups,
+             each account group preceding its accounts and subgroups, with
+             following key and value
+                `type`: 'account' or 'group',
+                `level`: depth in the account group hierarchy,
                 `name`: Account name,
                 `code`: Account code,
-                `credit`: total amount of credit,
-                `debit`: total amount of debit,
-                `balance`: total amount of balance,
+                `credit`: total amount of credit of the last period,
+                `debit`: total amount of debit of the last period,
+                `balance`: total amount of balance of the last period,
+                `columns`: list of the credit, debit and balance of each
+                    period,
         """
+        if periods is None:
+            periods = [{'date_from': self.env.context.get('date_from'),
+                        'date_to': self.env.context.get('date_to')}]
+        MoveLine = self.env['account.move.line']
+        # every period filters on the same tables, only the dates differ
+        tables = None
+        columns = []
+        column_params = []
+        period_wheres = []
+        period_params = []
+        for index, period in enumerate(periods):
+            period_tables, where_clause, where_params = MoveLine.with_context(
+                date_from=period.get('date_from'),
+                date_to=period.get('date_to'))._query_get()
+            tables = tables or period_tables
+            where = "(%s)" % (where_clause.strip() or "TRUE")
+            columns.append(
+                "SUM(account_move_line.debit) FILTER (WHERE %s) AS debit_%d, "
+                "SUM(account_move_line.credit) FILTER (WHERE %s) AS credit_%d"
+                % (where, index, where, index))
+            column_params += list(where_params) * 2
+            period_wheres.append(where)
+            period_params += list(where_params)
+        tables = tables.replace('"', '') or 'account_move_line'
+        sums = ", ".join(
+            "SUM(t.debit_%d), SUM(t.credit_%d)" % (index, index)
+            for index in range(len(periods)))
 
-        account_result = {}
-        # Prepare sql query base on selected parameters from wizard
-        tables, where_clause, where_params = self.env[
-            'account.move.line']._query_get()
-        tables = tables.replace('"', '')
-        if not tables:
-            tables = 'account_move_line'
-        wheres = [""]
-        if where_clause.strip():
-            wheres.append(where_clause.strip())
-        filters = " AND ".join(wheres)
-        # compute the balance, debit and credit for the provided accounts
-        request = (
-                    "SELECT account_id AS id, SUM(debit) AS debit, SUM(credit) AS credit, (SUM(debit) - SUM(credit)) AS balance" + \
-                    " FROM " + tables + " WHERE account_id IN %s " + filters + " GROUP BY account_id")
-        params = (tuple(accounts.ids),) + tuple(where_params)
+        # compute the totals of every period for the accounts, and their
+        # subtotals for every account group above them, in one query
+        request = """
+            WITH totals AS (
+                SELECT account_move_line.account_id, """ + ", ".join(columns) + """
+                FROM """ + tables + """
+                WHERE account_move_line.account_id IN %s
+                  AND (""" + " OR ".join(period_wheres) + """)
+                GROUP BY account_move_line.account_id
+            )
+            SELECT 'account', t.account_id, """ + sums + """
+            FROM totals t
+            GROUP BY t.account_id
+            UNION ALL
+            SELECT 'group', parent.id, """ + sums + """
+            FROM totals t
+            JOIN account_account a ON a.id = t.account_id
+            JOIN account_group g ON g.id = a.group_id
+            JOIN account_group parent
+                ON g.parent_path LIKE parent.parent_path || '%%'
+            GROUP BY parent.id
+        """
+        params = column_params + [tuple(accounts.ids)] + period_params
         self.env.cr.execute(request, params)
-        for row in self.env.cr.dictfetchall():
-            account_result[row.pop('id')] = row
+        totals = {}
+        for row in self.env.cr.fetchall():
+            totals[row[:2]] = [
+                {'debit': debit or 0.0, 'credit': credit or 0.0,
+                 'balance': (debit or 0.0) - (credit or 0.0)}
+                for debit, credit in zip(row[2::2], row[3::2])]
 
+        empty = [dict(debit=0.0, credit=0.0, balance=0.0) for __ in periods]
         account_res = []
+        # account and group metadata are read in bulk, the digits of the
+        # currencies once per currency
+        groups = accounts.mapped('group_id')
+        groups |= self.env['account.group'].browse(
+            [int(parent_id) for group in groups
+             for parent_id in group.parent_path.split('/') if parent_id])
+        for group in groups:
+            account_res.append({
+                'type': 'group',
+                'level': group.parent_path.count('/') - 1,
+                'code': group.code_prefix or '',
+                'name': group.name,
+                'columns': totals.get(('group', group.id), empty),
+                'rounding': self.env.company.currency_id.rounding,
+            })
         for account in accounts:
-            res = dict((fn, 0.0) for fn in ['credit', 'debit', 'balance'])
-            currency = account.currency_id and account.currency_id or account.company_id.currency_id
-            res['code'] = account.code
-            res['name'] = account.name
-            if account.id in account_result:
-                res['debit'] = account_result[account.id].get('debit')
-                res['credit'] = account_result[account.id].get('credit')
-                res['balance'] = account_result[account.id].get('balance')
-            if display_account == 'all':
-                account_res.append(res)
-            if display_account == 'not_zero' and not currency.is_zero(
-                    res['balance']):
-                account_res.append(res)
-            if display_account == 'movement' and (
-                    not currency.is_zero(res['debit']) or not currency.is_zero(
-                    res['credit'])):
-                account_res.append(res)
-        return account_res
+            currency = account.currency_id or account.company_id.currency_id
+            account_res.append({
+                'type': 'account',
+                'level': account.group_id.parent_path.count('/')
+                if account.group_id else 0,
+                'code': account.code,
+                'name': account.name,
+                'columns': totals.get(('account', account.id), empty),
+                'rounding': currency.rounding,
+            })
+        # groups precede the accounts and subgroups sharing their prefix
+        account_res.sort(key=lambda res: (res['code'],
+                                          res['type'] == 'account',
+                                          res['level']))
+
+        result = []
+        for res in account_res:
+            rounding = res.pop('rounding')
+            res.update(res['columns'][-1])
+            if display_account == 'not_zero' and all(
+                    float_is_zero(column['balance'],
+                                  precision_rounding=rounding)
+                    for column in res['columns']):
+                continue
+            if display_account == 'movement' and all(
+                    float_is_zero(column['debit'],
+                                  precision_rounding=rounding) and
+                    float_is_zero(column['credit'],
+                                  precision_rounding=rounding)
+                    for column in res['columns']):
+                continue
+            result.append(res)
+        return result
 
     @api.model
     def _get_report_values(self, docids, data=None):
@@ -96,14 +189,17 @@ class ReportTrialBalance(models.AbstractModel):
         display_account = data['form'].get('display_account')
         accounts = docs if self.model == 'account.account' else self.env[
             'account.account'].search([])
+        periods = self._get_periods(data)
         account_res = self.with_context(
             data['form'].get('used_context'))._get_accounts(accounts,
-                                                            display_account)
+                                                            display_account,
+                                                            periods)
         return {
             'doc_ids': self.ids,
             'doc_model': self.model,
             'data': data['form'],
             'docs': docs,
             'time': time,
+            'Periods': periods,
             'Accounts': account_res,
         }
@@ -1382,21 +1382,23 @@ odoo.define('AccountingDashboard.AccountingDashboard', function (require) {
                     }
 
 
-                    rpc.query({
+                    var bundle = rpc.query({
                         model: "account.move",
-                        method: "get_currency",
-                    })
-                        .then(function (result) {
-                            currency = result;
+                        method: "get_dashboard_bundle",
+                        args: ['this_month', posted],
+                    });
+                    var widget = function (name) {
+                        return bundle.then(function (data) {
+                            return data[name];
+                        });
+                    };
 
-                        })
+                    bundle.then(function (data) {
+                        currency = data.get_currency;
+                    });
 
 
-                    rpc.query({
-                        model: "account.move",
-                        method: "get_income_this_month",
-                        args: [posted],
-                    })
+                    widget("get_income_this_month")
                         .then(function (result) {
 
 
@@ -1458,19 +1460,11 @@ odoo.define('AccountingDashboard.AccountingDashboard', function (require) {
 
                         })
 
-                    rpc.query({
-                        model: 'account.move',
-                        method: 'get_overdues_this_month',
-                        args: [posted],
-                    }).then(function (result) {
+                    widget("get_overdues_this_month").then(function (result) {
 
                             //
                         })
-                    rpc.query({
-                        model: 'account.move',
-                        method: 'get_overdues_this_month',
-                        args: [posted],
-                    })
+                    widget("get_overdues_this_month")
                         .then(function (result) {
                             // Doughnut Chart
                             $(document).ready(function () {
@@ -1522,11 +1516,7 @@ odoo.define('AccountingDashboard.AccountingDashboard', function (require) {
                                 });
                             });
                         })
-                    rpc.query({
-                        model: "account.move",
-                        method: "get_total_invoice_current_month",
-                        args: [posted],
-                    }).then(function (result) {
+                    widget("get_total_invoice_current_month").then(function (result) {
 
                             $('#total_supplier_invoice_paid').hide();
                             $('#total_supplier_invoice').hide();
@@ -1586,11 +1576,7 @@ odoo.define('AccountingDashboard.AccountingDashboard', function (require) {
                             $('#total_supplier_invoice_current_month').append('<div" class="logo">' + '<span>' + supplier_invoice_total_current_month + '</span><span>Total Invoice<span></div>');
 
                         })
-                    rpc.query({
-                        model: 'account.move',
-                        method: 'get_latebills_this_month',
-                        args: [posted],
-                    })
+                    widget("get_latebills_this_month")
                         .then(function (result) {
 
                             $(document).ready(function () {
@@ -1642,11 +1628,7 @@ odoo.define('AccountingDashboard.AccountingDashboard', function (require) {
                                 });
                             });
                         })
-                    rpc.query({
-                        model: "account.move",
-                        method: "get_overdues",
-
-                    }).then(function (result) {
+                    widget("get_overdues").then(function (result) {
                             var due_count = 0;
                             _.forEach(result, function (x) {
                                 due_count++;
@@ -1658,11 +1640,7 @@ odoo.define('AccountingDashboard.AccountingDashboard', function (require) {
 
                             $('#due_count').append('<span class="badge badge-danger">' + due_count + ' Due(s)</span>');
                         })
-                    rpc.query({
-                        model: "account.move",
-                        method: "get_top_10_customers",
-                        args: [posted]
-                    }).then(function (result) {
+                    widget("get_top_10_customers").then(function (result) {
                             var due_count = 0;
                             _.forEach(result, function (x) {
 
@@ -1673,11 +1651,7 @@ odoo.define('AccountingDashboard.AccountingDashboard', function (require) {
 
                             });
                         })
-                    rpc.query({
-                        model: "account.move",
-                        method: "bank_balance",
-                        args: [posted]
-                    })
+                    widget("bank_balance")
                         .then(function (result) {
                             var banks = result['banks'];
                             var balance = result['banking'];
@@ -1689,11 +1663,7 @@ odoo.define('AccountingDashboard.AccountingDashboard', function (require) {
                             }
                         })
 
-                    rpc.query({
-                        model: "account.move",
-                        method: "get_latebills",
-
-                    }).then(function (result) {
+                    widget("get_latebills").then(function (result) {
                             var late_count = 0;
 
                             _.forEach(result, function (x) {
@@ -1702,20 +1672,13 @@ odoo.define('AccountingDashboard.AccountingDashboard', function (require) {
                             });
                             $('#late_count').append('<span class="badge badge-danger">' + late_count + ' Late(s)</span>');
                         })
-                    rpc.query({
-                        model: "account.move",
-                        method: "get_total_invoice",
-                    })
+                    widget("get_total_invoice")
                         .then(function (result) {
                             var total_invoice = result[0].sum;
                             total_invoice = total_invoice
                             $('#total_invoice').append('<span>' + total_invoice + ' ' + currency + '</span> ')
                         })
-                    rpc.query({
-                        model: "account.move",
-                        method: "get_total_invoice_this_month",
-                        args: [posted],
-                    })
+                    widget("get_total_invoice_this_month")
                         .then(function (result) {
                             var invoice_this_month = result[0].sum;
                             if (invoice_this_month) {
@@ -1724,40 +1687,26 @@ odoo.define('AccountingDashboard.AccountingDashboard', function (require) {
                             }
                         })
 
-                    rpc.query({
-                        model: "account.move",
-                        method: "get_total_invoice_last_month",
-                    })
+                    widget("get_total_invoice_last_month")
                         .then(function (result) {
                             var invoice_last_month = result[0].sum;
                             var total_invoices_last_month = invoice_last_month
                             $('#total_invoices_last').append('<span>' + total_invoices_last_month + ' ' + currency + '</span><div class="title">Last month</div>')
                         })
 
-                    rpc.query({
-                        model: "account.move",
-                        method: "unreconcile_items"
-                    })
+                    widget("unreconcile_items")
                         .then(function (result) {
 
                             var unreconciled_count = result[0].count;
 
                             $('#unreconciled_items').append('<span>' + unreconciled_count + ' Item(s)</a></span> ')
                         })
-                    rpc.query({
-                        model: "account.move",
-                        method: "unreconcile_items_this_month",
-                        args: [posted],
-                    })
+                    widget("unreconcile_items_this_month")
                         .then(function (result) {
                             var unreconciled_counts_ = result[0].count;
                             $('#unreconciled_items_').append('<span>' + unreconciled_counts_ + ' Item(s)</span><div class="title">This month</div>')
                         })
-                    rpc.query({
-                        model: "account.move",
-                        method: "unreconcile_items_this_year",
-                        args: [posted],
-                    })
+                    widget("unreconcile_items_this_year")
                         .then(function (result) {
 
                             var unreconciled_counts_this_year = result[0].count;
@@ -1766,31 +1715,21 @@ odoo.define('AccountingDashboard.AccountingDashboard', function (require) {
                             //                            $('#unreconciled_counts_this_year').append('<span style= "color:#455e7b;">' + unreconciled_counts_this_year + ' Item(s)</span><div class="title">This Year</div>')
                         })
 
-                    rpc.query({
-                        model: "account.move",
-                        method: "unreconcile_items_last_year"
-                    })
+                    widget("unreconcile_items_last_year")
                         .then(function (result) {
                             var unreconciled_counts_last_year = result[0].count;
 
                             $('#unreconciled_counts_last_year').append('<span>' + unreconciled_counts_last_year + '  Item(s)</span><div class="title">Last Year</div>')
 
                         })
-                    rpc.query({
-                        model: "account.move",
-                        method: "month_income"
-                    })
+                    widget("month_income")
                         .then(function (result) {
                             var income = result[0].debit - result[0].credit;
                             income = -income;
 
                             $('#total_income').append('<span>' + income.toFixed(2) + ' ' + currency + '</span>')
                         })
-                    rpc.query({
-                        model: "account.move",
-                        method: "month_income_this_month",
-                        args: [posted],
-                    })
+                    widget("month_income_this_month")
                         .then(function (result) {
                             var incomes_ = result[0].debit - result[0].credit;
                             if (incomes_) {
@@ -1804,10 +1743,7 @@ odoo.define('AccountingDashboard.AccountingDashboard', function (require) {
                             }
                         })
 
-                    rpc.query({
-                        model: "account.move",
-                        method: "month_income_last_month"
-                    })
+                    widget("month_income_last_month")
                         .then(function (result) {
                             var incomes_last = result[0].debit - result[0].credit;
                             incomes_last = -incomes_last;
@@ -1815,20 +1751,13 @@ odoo.define('AccountingDashboard.AccountingDashboard', function (require) {
                             $('#total_incomes_last').append('<span>' + incomes_last + ' ' + currency + '</span><div class="title">Last month</div>')
                         })
 
-                    rpc.query({
-                        model: "account.move",
-                        method: "month_expense"
-                    })
+                    widget("month_expense")
                         .then(function (result) {
                             var expense = result[0].debit - result[0].credit;
                             var expenses = expense.toFixed()
                             $('#total_expense').append('<span>' + expenses + ' ' + currency + '</span>')
                         })
-                    rpc.query({
-                        model: "account.move",
-                        method: "month_expense_this_month",
-                        args: [posted],
-                    }).then(function (result) {
+                    widget("month_expense_this_month").then(function (result) {
                             var expense_this_month = result[0].debit - result[0].credit;
                             if (expense_this_month) {
 
@@ -1840,11 +1769,7 @@ odoo.define('AccountingDashboard.AccountingDashboard', function (require) {
 
                             }
                         })
-                    rpc.query({
-                        model: "account.move",
-                        method: "month_expense_this_year",
-                        args: [posted],
-                    }).then(function (result) {
+                    widget("month_expense_this_year").then(function (result) {
                             var expense_this_year = result[0].debit - result[0].credit;
                             if (expense_this_year) {
 
@@ -1857,21 +1782,14 @@ odoo.define('AccountingDashboard.AccountingDashboard', function (require) {
                                 $('#total_expense_this_year').append('<span >' + 0.0 + ' ' + currency + '</span><div class="title">This Year</div>')
                             }
                         })
-                    rpc.query({
-                        model: "account.move",
-                        method: "month_income_last_year"
-                    })
+                    widget("month_income_last_year")
                         .then(function (result) {
                             var incomes_last_year = result[0].debit - result[0].credit;
                             incomes_last_year = -incomes_last_year
 
                             $('#total_incomes_last_year').append('<span>' + incomes_last_year + '' + currency + '</span><div class="title">Last Year</div>')
                         })
-                    rpc.query({
-                        model: "account.move",
-                        method: "month_income_this_year",
-                        args: [posted],
-                    })
+                    widget("month_income_this_year")
                         .then(function (result) {
                             var incomes_this_year = result[0].debit - result[0].credit;
                             if (incomes_this_year) {
@@ -1886,11 +1804,7 @@ odoo.define('AccountingDashboard.AccountingDashboard', function (require) {
 
                         })
 
-                    rpc.query({
-                        model: "account.move",
-                        method: "profit_income_this_month",
-                        args: [posted],
-                    }).then(function (result) {
+                    widget("profit_income_this_month").then(function (result) {
                             var net_profit = true
                             if (result[1] == undefined) {
                                 result[1] = 0;
@@ -1927,11 +1841,7 @@ odoo.define('AccountingDashboard.AccountingDashboard', function (require) {
                             }
                         })
 
-                    rpc.query({
-                        model: "account.move",
-                        method: "profit_income_this_year",
-                        args: [posted],
-                    })
+                    widget("profit_income_this_year")
                         .then(function (result) {
                             var net_profit = true
 
@@ -0,0 +1,375 @@
+# -*- coding: utf-8 -*-
+#############################################################################
+#
+#    Cybrosys Technologies Pvt. Ltd.
+#
+#    Copyright (C) 2019-TODAY Cybrosys Technologies(<https://www.cybrosys.com>)
+#    Author: Cybrosys Techno Solutions(<https://www.cybrosys.com>)
+#
+#    You can modify it under the terms of the GNU LESSER
+#    GENERAL PUBLIC LICENSE (LGPL v3), Version 3.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU LESSER GENERAL PUBLIC LICENSE (LGPL v3) for more details.
+#
+#    You should have received a copy of the GNU LESSER GENERAL PUBLIC LICENSE
+#    (LGPL v3) along with this program.
+#    If not, see <http://www.gnu.org/licenses/>.
+#
+#############################################################################
+
+import json
+from contextlib import contextmanager
+from datetime import date
+from unittest.mock import patch
+
+from dateutil.relativedelta import relativedelta
+
+from odoo.sql_db import Cursor
+from odoo.tests.common import TransactionCase
+
+from ..models.account_dashboard import DASHBOARD_PERIOD_WIDGETS, \
+    get_period_bounds
+from ..models.account_dashboard_cache import dashboard_cache
+
+# work budget of a single dashboard widget, whatever the size of the
+# database: a widget must not load data proportional to the number of
+# partners, entries or journal items
+WIDGET_MAX_QUERIES = 4
+WIDGET_MAX_ROWS = 40
+WIDGET_MAX_RECORDS = 10
+
+
+class TestAccountDashboard(TransactionCase):
+
+    def setUp(self):
+        super(TestAccountDashboard, self).setUp()
+        dashboard_cache.invalidate(self.env.cr.dbname)
+
+    @contextmanager
+    def _record_queries(self):
+        """ Collect the (query, params) executed in the block."""
+        queries = []
+        execute = Cursor.execute
+
+        def recording_execute(cr, query, params=None, log_exceptions=None):
+            queries.append((query, params))
+            return execute(cr, query, params, log_exceptions)
+
+        with patch.object(Cursor, 'execute', recording_execute):
+            yield queries
+
+    def _index_conditions(self, query, params):
+        """ Return the index conditions of the plan of ``query``, with
+        sequential scans disabled so that the plan shows whether the
+        filters can be answered by an index at all."""
+        self.env.cr.execute("SET LOCAL enable_seqscan TO off")
+        self.env.cr.execute("EXPLAIN (FORMAT JSON) " + query, params)
+        plan = self.env.cr.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        conditions = []
+        nodes = [plan[0]['Plan']]
+        while nodes:
+            node = nodes.pop()
+            if node.get('Index Cond'):
+                conditions.append((node['Index Name'], node['Index Cond']))
+            nodes.extend(node.get('Plans', []))
+        return conditions
+
+    def _assert_index_scan(self, method, column):
+        """ Check that the period filter on ``column`` (a qualified column
+        name) of every query run by ``method`` is resolved by an index."""
+        dashboard = self.env['account.move']
+        with self._record_queries() as queries:
+            getattr(dashboard, method)('posted')
+        filtered = [(query, params) for query, params in queries
+                    if "%s >= " % column in query]
+        self.assertTrue(filtered, "%s did not filter on %s" % (method, column))
+        field = column.split('.')[-1]
+        for query, params in filtered:
+            conditions = self._index_conditions(query, params)
+            self.assertTrue(
+                any(field in condition for name, condition in conditions),
+                "%s does not filter %s through an index: %s" % (
+                    method, column, conditions))
+
+    def test_period_bounds(self):
+        today = date(2020, 1, 15)
+        self.assertEqual(get_period_bounds('this_month', today),
+                         (date(2020, 1, 1), date(2020, 2, 1)))
+        self.assertEqual(get_period_bounds('last_month', today),
+                         (date(2019, 12, 1), date(2020, 1, 1)))
+        self.assertEqual(get_period_bounds('this_year', today),
+                         (date(2020, 1, 1), date(2021, 1, 1)))
+        self.assertEqual(get_period_bounds('last_year', today),
+                         (date(2019, 1, 1), date(2020, 1, 1)))
+
+    def test_dashboard_indexes(self):
+        self.env.cr.execute("""
+            SELECT indexname FROM pg_indexes WHERE indexname IN %s
+        """, [('account_move_line_company_state_date_index',
+               'account_move_company_type_payment_due_index',
+               'account_dashboard_aggregate_lookup_index')])
+        self.assertEqual(len(self.env.cr.fetchall()), 3)
+
+    def test_move_line_queries_use_date_index(self):
+        for method in ('unreconcile_items_this_month',
+                       'unreconcile_items_this_year'):
+            self._assert_index_scan(method, 'l.date')
+
+    def test_move_queries_use_due_date_index(self):
+        for method in ('get_overdues_this_month', 'get_latebills_this_month',
+                       'get_overdues_this_year', 'get_latebills_this_year'):
+            self._assert_index_scan(method, 'account_move.invoice_date_due')
+
+    def test_widget_cache(self):
+        dashboard = self.env['account.move']
+        stats = dashboard.get_dashboard_cache_stats()
+        first = dashboard.bank_balance('posted')
+        with self._record_queries() as queries:
+            second = dashboard.bank_balance('posted')
+        self.assertEqual(first, second)
+        self.assertFalse([query for query, params in queries
+                          if 'account_move_line' in query])
+        after = dashboard.get_dashboard_cache_stats()
+        self.assertEqual(after['misses'] - stats['misses'], 1)
+        self.assertEqual(after['hits'] - stats['hits'], 1)
+
+        # the other state filter is cached separately
+        dashboard.bank_balance(False)
+        self.assertEqual(
+            dashboard.get_dashboard_cache_stats()['misses'] - stats['misses'],
+            2)
+
+        dashboard_cache.invalidate(self.env.cr.dbname,
+                                   [self.env.company.id])
+        with self._record_queries() as queries:
+            dashboard.bank_balance('posted')
+        self.assertTrue([query for query, params in queries
+                         if 'account_move_line' in query])
+
+    def test_metric_engine(self):
+        dashboard = self.env['account.move']
+        with self._record_queries() as queries:
+            totals = dashboard.get_total_invoice_current_year('posted')
+        self.assertEqual(len([query for query, params in queries
+                              if 'from account_move' in query]), 1)
+        self.assertEqual(len(totals), 8)
+
+        partner = self.env['res.partner'].create({'name': 'Dashboard'})
+        invoice = self.env['account.move'].create({
+            'type': 'out_invoice',
+            'partner_id': partner.id,
+            'invoice_date': date.today(),
+            'invoice_line_ids': [(0, 0, {'name': 'Line', 'price_unit': 100.0,
+                                         'quantity': 1})],
+        })
+        invoice.post()
+        metrics = dashboard._compute_metrics(
+            ['customer_invoice_amount', 'customer_invoice'],
+            period='this_month')
+        self.assertEqual(dashboard.get_total_invoice_this_month('posted'),
+                         [{'sum': metrics['customer_invoice_amount']}])
+        self.assertGreaterEqual(metrics['customer_invoice_amount'],
+                                invoice.amount_total)
+
+    def test_prewarmed_bundle(self):
+        dashboard = self.env['account.move']
+        stored = self.env['account.dashboard.bundle']
+        company_id = self.env.company.id
+        dashboard._prewarm_dashboard()
+        self.assertEqual(stored.search_count([('company_id', '=', company_id)]),
+                         2 * len(DASHBOARD_PERIOD_WIDGETS))
+
+        with self._record_queries() as queries:
+            bundle = dashboard.get_dashboard_bundle('this_year', 'posted')
+        self.assertIn('get_total_invoice_current_year', bundle)
+        self.assertFalse([query for query, params in queries
+                          if 'account_move_line' in query])
+
+        partner = self.env['res.partner'].create({'name': 'Dashboard'})
+        self.env['account.move'].create({
+            'type': 'out_invoice',
+            'partner_id': partner.id,
+            'invoice_line_ids': [(0, 0, {'name': 'Line', 'price_unit': 10.0,
+                                         'quantity': 1})],
+        }).post()
+        self.assertIsNone(stored._fetch(company_id, 'this_year', ('posted',)))
+
+    def test_bundle_bounds(self):
+        stored = self.env['account.dashboard.bundle']
+        company_id = self.env.company.id
+        today = date.today()
+        last_month = today.replace(day=1) - relativedelta(days=1)
+        stored._store(company_id, 'this_month', ('posted',), {'a': 1},
+                      today=last_month)
+        stored._store(company_id, 'last_year', ('posted',), {'a': 1},
+                      today=last_month)
+        stored._store(company_id, 'this_year', ('posted',), {'a': 1})
+        stored._store(company_id, 'this_year', ('posted', 'draft'), {'a': 1})
+        # computed in the previous month, whose widgets of the current
+        # month are stale even when the bounds of the period are the same
+        self.assertIsNone(stored._fetch(company_id, 'this_month',
+                                        ('posted',)))
+        self.assertIsNone(stored._fetch(company_id, 'last_year',
+                                        ('posted',)))
+        self.assertEqual(stored._fetch(company_id, 'this_year', ('posted',)),
+                         {'a': 1})
+
+        # a draft entry drops every bundle, as the 'posted' dashboard reads
+        # draft entries in some widgets
+        partner = self.env['res.partner'].create({'name': 'Dashboard'})
+        self.env['account.move'].create({
+            'type': 'out_invoice',
+            'partner_id': partner.id,
+            'invoice_line_ids': [(0, 0, {'name': 'Line', 'price_unit': 10.0,
+                                         'quantity': 1})],
+        })
+        self.assertIsNone(stored._fetch(company_id, 'this_year',
+                                        ('posted', 'draft')))
+        self.assertIsNone(stored._fetch(company_id, 'this_year',
+                                        ('posted',)))
+
+    def test_prewarm_dispatch(self):
+        stored = self.env['account.dashboard.bundle']
+        stored._cron_dispatch_prewarm()
+        stored._cron_dispatch_prewarm()
+        jobs = self.env['ir.cron'].search([
+            ('code', '=like', 'model._cron_prewarm([%])')])
+        self.assertEqual(
+            sorted(jobs.mapped('code')),
+            sorted('model._cron_prewarm([%d])' % company.id
+                   for company in self.env['res.company'].search([])))
+
+    def test_top_partners(self):
+        self.env['ir.config_parameter'].sudo().set_param(
+            'base_accounting_kit.dashboard_top_n', 3)
+        dashboard = self.env['account.move']
+        before = dashboard.get_overdues('posted')
+        for amount in (40.0, 30.0, 20.0, 10.0):
+            partner = self.env['res.partner'].create({
+                'name': 'Customer %s' % amount})
+            self.env['account.move'].create({
+                'type': 'out_invoice',
+                'partner_id': partner.id,
+                'invoice_line_ids': [(0, 0, {'name': 'Line',
+                                             'price_unit': amount,
+                                             'quantity': 1})],
+            }).post()
+        overdues = dashboard.get_overdues('posted')
+        self.assertEqual(len(overdues['due_partner']), 3)
+        self.assertEqual(overdues['due_partner'][-1], "Others")
+        self.assertAlmostEqual(sum(overdues['due_amount']),
+                               sum(before['due_amount']) + 100.0)
+        self.assertEqual(len(dashboard.get_top_10_customers('posted')), 3)
+
+    def test_widget_budget(self):
+        self.env['res.partner'].create([{'name': 'Partner %s' % index}
+                                        for index in range(WIDGET_MAX_ROWS * 2)])
+        dashboard = self.env['account.move']
+        for period in DASHBOARD_PERIOD_WIDGETS:
+            for states in ('posted', False):
+                profile = dashboard.get_dashboard_profile(period, states)
+                for method, stats in profile.items():
+                    message = "%s (%s, %s) %s" % (method, period, states,
+                                                  stats)
+                    self.assertLessEqual(stats['queries'], WIDGET_MAX_QUERIES,
+                                         message)
+                    self.assertLessEqual(stats['rows'], WIDGET_MAX_ROWS,
+                                         message)
+                    self.assertLessEqual(stats['records'], WIDGET_MAX_RECORDS,
+                                         message)
+
+    def test_export_series(self):
+        dashboard = self.env['account.move']
+        company_ids = dashboard._check_dashboard_export(
+            'income_expense_daily', 'csv', [])
+        self.assertIn(self.env.company.id, company_ids)
+        date_from, date_to = get_period_bounds('this_year')
+        export = b''.join(dashboard._dashboard_export_stream(
+            'income_expense_daily', 'csv', company_ids, date_from, date_to))
+        lines = export.decode('utf-8').splitlines()
+        self.assertEqual(lines[0], 'Company,Date,Group,State,Debit,Credit,'
+                                   'Balance')
+        self.env.cr.execute("""
+            SELECT count(*) FROM (
+                SELECT 1 FROM account_dashboard_aggregate
+                WHERE company_id IN %s AND date >= %s AND date < %s
+                GROUP BY company_id, date, internal_group, parent_state) rows
+        """, [tuple(company_ids), date_from, date_to])
+        self.assertEqual(len(lines) - 1, self.env.cr.fetchone()[0])
+
+        xlsx = b''.join(dashboard._dashboard_export_stream(
+            'overdues', 'xlsx', company_ids, date_from, date_to))
+        self.assertTrue(xlsx.startswith(b'PK'))
+
+    def _aggregate(self, day, state):
+        self.env.cr.execute("""
+            SELECT COALESCE(SUM(debit), 0), COALESCE(SUM(credit), 0)
+            FROM account_dashboard_aggregate
+            WHERE company_id = %s AND internal_group = 'income'
+              AND date = %s AND parent_state = %s
+        """, [self.env.company.id, day, state])
+        return self.env.cr.fetchone()
+
+    def test_aggregate_deltas(self):
+        journal = self.env['account.journal'].search(
+            [('type', '=', 'general'),
+             ('company_id', '=', self.env.company.id)], limit=1)
+        income = self.env['account.account'].create({
+            'name': 'Dashboard Income',
+            'code': 'DASHINC',
+            'user_type_id': self.env.ref('account.data_account_type_revenue').id,
+        })
+        counterpart = self.env['account.account'].create({
+            'name': 'Dashboard Counterpart',
+            'code': 'DASHCP',
+            'user_type_id': self.env.ref(
+                'account.data_account_type_current_assets').id,
+        })
+        draft_day, posted_day = date(2001, 1, 15), date(2001, 2, 15)
+        move = self.env['account.move'].create({
+            'journal_id': journal.id,
+            'date': draft_day,
+            'line_ids': [
+                (0, 0, {'account_id': income.id, 'name': 'Income',
+                        'credit': 40.0}),
+                (0, 0, {'account_id': counterpart.id, 'name': 'Income',
+                        'debit': 40.0}),
+            ],
+        })
+        # draft entries are counted as soon as they are saved
+        self.assertEqual(self._aggregate(draft_day, 'draft'), (0.0, 40.0))
+        move.write({'line_ids': [
+            (1, move.line_ids.filtered(
+                lambda line: line.account_id == income).id,
+             {'credit': 50.0}),
+            (1, move.line_ids.filtered(
+                lambda line: line.account_id == counterpart).id,
+             {'debit': 50.0}),
+        ]})
+        self.assertEqual(self._aggregate(draft_day, 'draft'), (0.0, 50.0))
+
+        # posting on another day moves the amounts out of the draft day
+        move.date = posted_day
+        move.post()
+        self.assertEqual(self._aggregate(draft_day, 'draft'), (0.0, 0.0))
+        self.assertEqual(self._aggregate(posted_day, 'draft'), (0.0, 0.0))
+        self.assertEqual(self._aggregate(posted_day, 'posted'), (0.0, 50.0))
+
+        # the reconciliation pass repairs the buckets changed behind its back
+        self.env.cr.execute("""
+            UPDATE account_dashboard_aggregate SET credit = 0
+            WHERE company_id = %s AND internal_group = 'income'
+              AND date = %s AND parent_state = 'posted'
+        """, [self.env.company.id, posted_day])
+        self.env['account.dashboard.aggregate']._reconcile()
+        self.assertEqual(self._aggregate(posted_day, 'posted'), (0.0, 50.0))
+
+        move.button_draft()
+        self.assertEqual(self._aggregate(posted_day, 'posted'), (0.0, 0.0))
+        move.unlink()
+        self.assertEqual(self._aggregate(posted_day, 'draft'), (0.0, 0.0))
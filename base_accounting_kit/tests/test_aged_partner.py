@@ -0,0 +1,203 @@
+# -*- coding: utf-8 -*-
+#############################################################################
+#
+#    Cybrosys Technologies Pvt. Ltd.
+#
+#    Copyright (C) 2019-TODAY Cybrosys Technologies(<https://www.cybrosys.com>)
+#    Author: Cybrosys Techno Solutions(<https://www.cybrosys.com>)
+#
+#    You can modify it under the terms of the GNU LESSER
+#    GENERAL PUBLIC LICENSE (LGPL v3), Version 3.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU LESSER GENERAL PUBLIC LICENSE (LGPL v3) for more details.
+#
+#    You should have received a copy of the GNU LESSER GENERAL PUBLIC LICENSE
+#    (LGPL v3) along with this program.
+#    If not, see <http://www.gnu.org/licenses/>.
+#
+#############################################################################
+
+from unittest.mock import patch
+
+from dateutil.relativedelta import relativedelta
+
+from odoo import fields
+from odoo.sql_db import Cursor
+from odoo.tests.common import TransactionCase
+
+
+class TestAgedPartner(TransactionCase):
+
+    def setUp(self):
+        super(TestAgedPartner, self).setUp()
+        self.report = self.env[
+            'report.base_accounting_kit.report_agedpartnerbalance']
+        self.date_from = fields.Date.today()
+        self.partner = self.env['res.partner'].create({'name': 'Aged Partner'})
+        self.receivable = self.partner.property_account_receivable_id
+        self.journal = self.env['account.journal'].search(
+            [('type', '=', 'general'),
+             ('company_id', '=', self.env.company.id)], limit=1)
+        self.counterpart = self.env['account.account'].search(
+            [('company_id', '=', self.env.company.id),
+             ('internal_type', '=', 'other')], limit=1)
+
+    def _create_line(self, amount, days, maturity_days=None):
+        """ Post an entry of ``amount`` on the receivable account, dated
+        ``days`` after date_from, and return its receivable line."""
+        date = self.date_from + relativedelta(days=days)
+        maturity = self.date_from + relativedelta(
+            days=days if maturity_days is None else maturity_days)
+        move = self.env['account.move'].create({
+            'journal_id': self.journal.id,
+            'date': date,
+            'line_ids': [
+                (0, 0, {'account_id': self.receivable.id, 'name': 'Aged',
+                        'partner_id': self.partner.id,
+                        'date_maturity': maturity,
+                        'debit': max(amount, 0.0),
+                        'credit': max(-amount, 0.0)}),
+                (0, 0, {'account_id': self.counterpart.id, 'name': 'Aged',
+                        'debit': max(-amount, 0.0),
+                        'credit': max(amount, 0.0)}),
+            ],
+        })
+        move.post()
+        return move.line_ids.filtered(
+            lambda line: line.account_id == self.receivable)
+
+    def _create_reconciliation_history(self, count):
+        """ Benchmark fixture: ``count`` receivable entries, each fully
+        reconciled with itself after date_from."""
+        moves = self.env['account.move'].create([{
+            'journal_id': self.journal.id,
+            'date': self.date_from + relativedelta(days=1),
+            'line_ids': [
+                (0, 0, {'account_id': self.receivable.id, 'name': 'History',
+                        'partner_id': self.partner.id, 'debit': 10.0}),
+                (0, 0, {'account_id': self.receivable.id, 'name': 'History',
+                        'partner_id': self.partner.id, 'credit': 10.0}),
+            ],
+        } for __ in range(count)])
+        moves.post()
+        for move in moves:
+            move.line_ids.reconcile()
+
+    def _age(self):
+        """ Return the aging of the partner and the size of the largest
+        statement executed to compute it."""
+        sizes = []
+        execute = Cursor.execute
+
+        def measuring_execute(cr, query, params=None, log_exceptions=None):
+            sizes.append(len(cr.mogrify(query, params)))
+            return execute(cr, query, params, log_exceptions)
+
+        with patch.object(Cursor, 'execute', measuring_execute):
+            res = self.report._get_partner_move_lines(
+                ['receivable'], fields.Date.to_string(self.date_from),
+                'posted', 30)[0]
+        values = [value for value in res
+                  if value['partner_id'] == self.partner.id]
+        return values, max(sizes)
+
+    def test_reconciliation_history(self):
+        """ Benchmark: the reconciliations made after date_from are looked
+        up in the database, the statement does not grow with them."""
+        self._create_line(100.0, -10)
+        values, size = self._age()
+        self._create_reconciliation_history(200)
+        history_values, history_size = self._age()
+        self.assertEqual(history_values, values)
+        self.assertEqual(history_size, size)
+
+    def test_aging_buckets(self):
+        self._create_line(100.0, -1, maturity_days=5)
+        overdue = self._create_line(200.0, -10)
+        old = self._create_line(300.0, -100)
+        # paid in part before date_from
+        (old | self._create_line(-50.0, -2)).reconcile()
+        # paid in part after date_from, which does not change the aging
+        (overdue | self._create_line(-30.0, 3)).reconcile()
+
+        queries = self.env.cr.sql_log_count
+        res, total, lines = self.report._get_partner_move_lines(
+            ['receivable'], fields.Date.to_string(self.date_from), 'posted',
+            30)
+        self.assertLessEqual(self.env.cr.sql_log_count - queries, 6)
+        values = [value for value in res
+                  if value['partner_id'] == self.partner.id][0]
+        self.assertEqual(values['name'], 'Aged Partner')
+        self.assertEqual(values['direction'], 100.0)
+        self.assertEqual(values['4'], 200.0)
+        self.assertEqual(values['1'], 250.0)
+        self.assertEqual(values['0'] + values['2'] + values['3'], 0.0)
+        self.assertEqual(values['total'], 550.0)
+        self.assertEqual(lines[self.partner.id], 3)
+
+    def test_snapshot(self):
+        self._create_line(100.0, -1, maturity_days=5)
+        self._create_line(200.0, -40)
+        date = fields.Date.to_string(self.date_from)
+        Snapshot = self.env['account.aged.snapshot']
+        self.assertIsNone(Snapshot._get_aged_balances(
+            self.env.company.ids, date, 'customer', 30))
+        Snapshot._build(self.env.company, self.date_from, 30)
+
+        live = self.report._get_partner_move_lines(
+            ['receivable'], date, 'posted', 30)[:2]
+        self.assertEqual(Snapshot._get_aged_balances(
+            self.env.company.ids, date, 'customer', 30), live)
+        partner = Snapshot.search([('partner_id', '=', self.partner.id)])
+        self.assertEqual(partner.period_3, 200.0)
+        self.assertEqual(partner.line_count, 2)
+
+        # the snapshot keeps the balances of its date
+        self._create_line(50.0, 1)
+        res, total = Snapshot._get_aged_balances(
+            self.env.company.ids, date, 'customer', 30)
+        self.assertEqual(total, live[1])
+        values = self.report.with_context(
+            active_model='account.aged.trial.balance',
+            active_id=1)._get_report_values(None, {'form': {
+                'date_from': date, 'target_move': 'posted',
+                'result_selection': 'customer', 'period_length': 30,
+                'use_snapshot': True}})
+        self.assertEqual(values['get_direction'], live[1])
+
+    def test_snapshot_invalidation(self):
+        self._create_line(100.0, -10)
+        date = fields.Date.to_string(self.date_from)
+        Snapshot = self.env['account.aged.snapshot']
+        company = self.env.company
+        Snapshot._build(company, self.date_from, 30)
+        self.assertTrue(Snapshot._get_aged_balances(
+            company.ids, date, 'customer', 30))
+        self.assertFalse(company.aged_snapshot_date)
+
+        # an entry back-dated before the snapshot makes it stale
+        line = self._create_line(-30.0, -5)
+        self.assertEqual(company.aged_snapshot_date,
+                         self.date_from + relativedelta(days=-5))
+        self.assertIsNone(Snapshot._get_aged_balances(
+            company.ids, date, 'customer', 30))
+
+        Snapshot._refresh(company, months=0)
+        self.assertFalse(company.aged_snapshot_date)
+        live = self.report._get_partner_move_lines(
+            ['receivable'], date, 'posted', 30)[:2]
+        self.assertEqual(Snapshot._get_aged_balances(
+            company.ids, date, 'customer', 30), live)
+
+        # so does a reconciliation dated before the snapshot
+        (line | self.env['account.move.line'].search([
+            ('partner_id', '=', self.partner.id),
+            ('account_id', '=', self.receivable.id), ('debit', '>', 0)])
+         ).reconcile()
+        self.assertEqual(company.aged_snapshot_date,
+                         self.date_from + relativedelta(days=-5))
+        self.assertIsNone(Snapshot._get_aged_balances(
+            company.ids, date, 'customer', 30))
@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+#############################################################################
+#
+#    Cybrosys Technologies Pvt. Ltd.
+#
+#    Copyright (C) 2019-TODAY Cybrosys Technologies(<https://www.cybrosys.com>)
+#    Author: Cybrosys Techno Solutions(<https://www.cybrosys.com>)
+#
+#    You can modify it under the terms of the GNU LESSER
+#    GENERAL PUBLIC LICENSE (LGPL v3), Version 3.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU LESSER GENERAL PUBLIC LICENSE (LGPL v3) for more details.
+#
+#    You should have received a copy of the GNU LESSER GENERAL PUBLIC LICENSE
+#    (LGPL v3) along with this program.
+#    If not, see <http://www.gnu.org/licenses/>.
+#
+#############################################################################
+
+from dateutil.relativedelta import relativedelta
+
+from odoo import fields
+from odoo.tests.common import TransactionCase
+
+
+class TestCurrencyConverter(TransactionCase):
+
+    def setUp(self):
+        super(TestCurrencyConverter, self).setUp()
+        self.converter = self.env['account.currency.converter']
+        self.company_currency = self.env.company.currency_id
+        self.currency = self.env['res.currency'].with_context(
+            active_test=False).search(
+            [('id', '!=', self.company_currency.id)], limit=1)
+        self.currency.active = True
+        self.today = fields.Date.today()
+        self.env['res.currency.rate'].search([
+            ('currency_id', 'in', (self.currency | self.company_currency).ids),
+        ]).unlink()
+        self.env['res.currency.rate'].create([
+            {'currency_id': self.currency.id, 'rate': 2.0,
+             'name': self.today - relativedelta(days=10),
+             'company_id': self.env.company.id},
+            {'currency_id': self.currency.id, 'rate': 4.0,
+             'name': self.today,
+             'company_id': self.env.company.id},
+        ])
+
+    def test_rates(self):
+        yesterday = self.today - relativedelta(days=1)
+        rates = self.converter._get_rates([
+            (self.currency.id, self.today), (self.currency.id, yesterday),
+            (self.company_currency.id, self.today),
+        ])
+        self.assertEqual(rates[(self.currency.id, self.today)], 4.0)
+        self.assertEqual(rates[(self.currency.id, yesterday)], 2.0)
+        # without any rate
+        self.assertEqual(rates[(self.company_currency.id, self.today)], 1.0)
+
+    def test_convert(self):
+        amounts = [10.0, 25.0, 7.5]
+        currency_ids = [self.currency.id, self.company_currency.id,
+                        self.currency.id]
+        queries = self.env.cr.sql_log_count
+        converted = self.converter._convert(
+            amounts, currency_ids, self.company_currency, self.today)
+        self.assertLessEqual(self.env.cr.sql_log_count - queries, 3)
+        expected = [
+            self.env['res.currency'].browse(currency_id)._convert(
+                amount, self.company_currency, self.env.company, self.today)
+            for amount, currency_id in zip(amounts, currency_ids)]
+        self.assertEqual(converted, expected)
@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+#############################################################################
+#
+#    Cybrosys Technologies Pvt. Ltd.
+#
+#    Copyright (C) 2019-TODAY Cybrosys Technologies(<https://www.cybrosys.com>)
+#    Author: Cybrosys Techno Solutions(<https://www.cybrosys.com>)
+#
+#    You can modify it under the terms of the GNU LESSER
+#    GENERAL PUBLIC LICENSE (LGPL v3), Version 3.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU LESSER GENERAL PUBLIC LICENSE (LGPL v3) for more details.
+#
+#    You should have received a copy of the GNU LESSER GENERAL PUBLIC LICENSE
+#    (LGPL v3) along with this program.
+#    If not, see <http://www.gnu.org/licenses/>.
+#
+#############################################################################
+
+
+from unittest.mock import patch
+
+from odoo import fields
+from odoo.sql_db import Cursor
+from odoo.tests.common import TransactionCase
+
+
+class TestFinancialReport(TransactionCase):
+
+    def setUp(self):
+        super(TestFinancialReport, self).setUp()
+        self.journal = self.env['account.journal'].search(
+            [('type', '=', 'general'),
+             ('company_id', '=', self.env.company.id)], limit=1)
+        self.account_type = self.env['account.account.type'].create({
+            'name': 'Financial Report Test',
+            'type': 'other',
+            'internal_group': 'asset',
+        })
+        self.account = self.env['account.account'].create({
+            'name': 'Financial Report Test',
+            'code': 'FINREP1',
+            'user_type_id': self.account_type.id,
+        })
+        self.counterpart = self.env['account.account'].create({
+            'name': 'Financial Report Counterpart',
+            'code': 'FINREP2',
+            'user_type_id': self.env.ref(
+                'account.data_account_type_current_liabilities').id,
+        })
+        self.env['account.move'].create({
+            'journal_id': self.journal.id,
+            'date': fields.Date.today(),
+            'line_ids': [
+                (0, 0, {'account_id': self.account.id, 'name': 'Test',
+                        'debit': 80.0}),
+                (0, 0, {'account_id': self.counterpart.id, 'name': 'Test',
+                        'credit': 80.0}),
+            ],
+        }).post()
+        Report = self.env['account.financial.report']
+        self.root = Report.create({'name': 'Root', 'type': 'sum'})
+        self.by_account = Report.create({
+            'name': 'Counterpart', 'type': 'accounts',
+            'parent_id': self.root.id,
+            'account_ids': [(6, 0, self.counterpart.ids)],
+        })
+        self.by_type = Report.create({
+            'name': 'Test Type', 'type': 'account_type',
+            'parent_id': self.root.id,
+            'account_type_ids': [(6, 0, self.account_type.ids)],
+        })
+        self.linked = Report.create({
+            'name': 'Linked', 'type': 'account_report',
+            'account_report_id': self.by_type.id,
+        })
+
+    def test_report_balance(self):
+        reports = self.root._get_children_by_order() | self.linked
+        queries = []
+        execute = Cursor.execute
+
+        def counting_execute(cr, query, params=None, log_exceptions=None):
+            if 'GROUP BY account_id' in query:
+                queries.append(query)
+            return execute(cr, query, params, log_exceptions)
+
+        wizard = self.env['financial.report'].with_context(
+            journal_ids=[self.journal.id], state='posted')
+        with patch.object(Cursor, 'execute', counting_execute):
+            res = wizard._compute_report_balance(reports)
+        # all the leaf accounts of the tree are summed in a single query
+        self.assertEqual(len(queries), 1)
+        self.assertEqual(res[self.by_type.id]['balance'], 80.0)
+        self.assertEqual(
+            res[self.by_type.id]['account'][self.account.id]['debit'], 80.0)
+        self.assertEqual(res[self.by_account.id]['balance'], -80.0)
+        self.assertEqual(res[self.linked.id]['balance'], 80.0)
+        self.assertEqual(res[self.root.id]['balance'], 0.0)
+        self.assertNotIn('account', res[self.root.id])
@@ -0,0 +1,189 @@
+# -*- coding: utf-8 -*-
+#############################################################################
+#
+#    Cybrosys Technologies Pvt. Ltd.
+#
+#    Copyright (C) 2019-TODAY Cybrosys Technologies(<https://www.cybrosys.com>)
+#    Author: Cybrosys Techno Solutions(<https://www.cybrosys.com>)
+#
+#    You can modify it under the terms of the GNU LESSER
+#    GENERAL PUBLIC LICENSE (LGPL v3), Version 3.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU LESSER GENERAL PUBLIC LICENSE (LGPL v3) for more details.
+#
+#    You should have received a copy of the GNU LESSER GENERAL PUBLIC LICENSE
+#    (LGPL v3) along with this program.
+#    If not, see <http://www.gnu.org/licenses/>.
+#
+#############################################################################
+
+from dateutil.relativedelta import relativedelta
+
+from odoo import fields
+from odoo.tests.common import TransactionCase
+
+
+class TestGeneralLedger(TransactionCase):
+
+    def setUp(self):
+        super(TestGeneralLedger, self).setUp()
+        self.report = self.env['report.base_accounting_kit.report_general_ledger']
+        self.journal = self.env['account.journal'].search(
+            [('type', '=', 'general'),
+             ('company_id', '=', self.env.company.id)], limit=1)
+        self.account = self.env['account.account'].create({
+            'name': 'Ledger Test',
+            'code': 'LEDGER1',
+            'user_type_id': self.env.ref(
+                'account.data_account_type_current_assets').id,
+        })
+        self.counterpart = self.env['account.account'].create({
+            'name': 'Ledger Counterpart',
+            'code': 'LEDGER2',
+            'user_type_id': self.env.ref(
+                'account.data_account_type_current_liabilities').id,
+        })
+        self.moves = self.env['account.move']
+        for amount in (100.0, 50.0, -30.0):
+            self.moves |= self._create_move(amount)
+        self.moves.post()
+
+    def _create_move(self, amount, date=None):
+        return self.env['account.move'].create({
+            'journal_id': self.journal.id,
+            'date': date or fields.Date.today(),
+            'line_ids': [
+                (0, 0, {'account_id': self.account.id, 'name': 'Test',
+                        'debit': max(amount, 0.0),
+                        'credit': max(-amount, 0.0)}),
+                (0, 0, {'account_id': self.counterpart.id, 'name': 'Test',
+                        'debit': max(-amount, 0.0),
+                        'credit': max(amount, 0.0)}),
+            ],
+        })
+
+    def _context(self):
+        return {'journal_ids': [self.journal.id], 'state': 'posted',
+                'strict_range': True}
+
+    def test_streamed_ledger(self):
+        accounts = self.account | self.counterpart
+        entries = list(self.report.with_context(
+            self._context())._iter_account_move_entry(
+            accounts, False, 'sort_date', 'movement'))
+        self.assertEqual([entry['code'] for entry in entries],
+                         ['LEDGER1', 'LEDGER2'])
+        ledger = entries[0]
+        self.assertEqual([line['balance'] for line in ledger['move_lines']],
+                         [100.0, 150.0, 120.0])
+        self.assertEqual(ledger['balance'], 120.0)
+        self.assertEqual(ledger['debit'], 150.0)
+        self.assertEqual(ledger['credit'], 30.0)
+
+    def test_export(self):
+        data = {
+            'ids': (self.account | self.counterpart).ids,
+            'model': 'account.account',
+            'form': {
+                'used_context': self._context(),
+                'initial_balance': False,
+                'sortby': 'sort_date',
+                'display_account': 'movement',
+            },
+        }
+        export = b''.join(self.report._export_ledger(data, 'csv'))
+        lines = export.decode('utf-8').splitlines()
+        # header, 3 lines and a total per account
+        self.assertEqual(len(lines), 1 + 2 * 4)
+        self.assertIn(self.moves[0].name, export.decode('utf-8'))
+        xlsx = b''.join(self.report._export_ledger(data, 'xlsx'))
+        self.assertTrue(xlsx.startswith(b'PK'))
+
+    def test_running_balance(self):
+        today = fields.Date.today()
+        self._create_move(25.0, today - relativedelta(years=1)).post()
+        context = dict(self._context(), date_from=today.replace(day=1))
+        for report in ('report.base_accounting_kit.report_general_ledger',
+                       'report.base_accounting_kit.report_bank_book',
+                       'report.base_accounting_kit.report_cash_book'):
+            entries = self.env[report].with_context(
+                context)._get_account_move_entry(
+                self.account, True, 'sort_date', 'movement')
+            lines = entries[0]['move_lines']
+            self.assertEqual(lines[0]['lname'], 'Initial Balance', report)
+            self.assertEqual([line['balance'] for line in lines],
+                             [25.0, 125.0, 175.0, 145.0], report)
+            self.assertEqual(entries[0]['balance'], 145.0, report)
+
+    def test_balance_snapshot(self):
+        today = fields.Date.today()
+        Snapshot = self.env['account.balance.snapshot']
+        self._create_move(25.0, today - relativedelta(years=1)).post()
+        self._create_move(7.0, today - relativedelta(months=1)).post()
+        Snapshot._build(self.env.company)
+        self.assertEqual(self.env.company.balance_snapshot_date,
+                         today.replace(day=1))
+        context = dict(self._context(), date_from=today)
+        # every entry is posted: the full scan over all states agrees
+        expected = self.report.with_context(
+            dict(context, state='all'))._get_initial_balances(self.account)
+        balances = Snapshot.with_context(context)._get_initial_balances(
+            self.account)
+        self.assertEqual(balances, {self.account.id: (
+            expected[self.account.id]['debit'],
+            expected[self.account.id]['credit'])})
+
+        # a back-dated entry invalidates the snapshots from its month on
+        back_date = today - relativedelta(years=2)
+        self._create_move(-5.0, back_date).post()
+        self.assertEqual(self.env.company.balance_snapshot_date,
+                         back_date.replace(day=1))
+        self.assertIsNone(Snapshot.with_context(
+            context)._get_initial_balances(self.account))
+        init = self.report.with_context(context)._get_initial_balances(
+            self.account)
+        self.assertEqual(init[self.account.id]['balance'],
+                         expected[self.account.id]['balance'] - 5.0)
+
+        Snapshot._cron_build()
+        init = self.report.with_context(context)._get_initial_balances(
+            self.account)
+        self.assertEqual(init[self.account.id]['balance'],
+                         expected[self.account.id]['balance'] - 5.0)
+        self.assertEqual(init[self.account.id]['lname'], 'Initial Balance')
+
+    def test_book_ledgers(self):
+        data = {'form': {
+            'used_context': self._context(),
+            'initial_balance': False,
+            'sortby': 'sort_date',
+            'display_account': 'all',
+            'account_ids': [self.account.id],
+        }}
+        for report in ('report.base_accounting_kit.report_bank_book',
+                       'report.base_accounting_kit.report_cash_book'):
+            entries = list(self.env[report]._iter_ledger(data))
+            # the books only print the selected accounts with movements
+            self.assertEqual([entry['code'] for entry in entries],
+                             ['LEDGER1'], report)
+            self.assertEqual(entries[0]['balance'], 120.0, report)
+
+    def test_day_book(self):
+        today = fields.Date.today()
+        self._create_move(10.0, today - relativedelta(days=1)).post()
+        report = self.env['report.base_accounting_kit.day_book_report_template']
+        days = report._get_account_move_entry(self.account, {
+            'target_move': 'posted',
+            'journal_ids': [self.journal.id],
+            'date_from': str(today - relativedelta(days=2)),
+            'date_to': str(today),
+        })
+        self.assertEqual([day['date'] for day in days],
+                         [today - relativedelta(days=1), today])
+        self.assertEqual(len(days[1]['child_lines']), 3)
+        self.assertEqual((days[1]['debit'], days[1]['credit'],
+                          days[1]['balance']), (150.0, 30.0, 120.0))
+        self.assertEqual(days[0]['balance'], 10.0)
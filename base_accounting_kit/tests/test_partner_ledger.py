@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+#############################################################################
+#
+#    Cybrosys Technologies Pvt. Ltd.
+#
+#    Copyright (C) 2019-TODAY Cybrosys Technologies(<https://www.cybrosys.com>)
+#    Author: Cybrosys Techno Solutions(<https://www.cybrosys.com>)
+#
+#    You can modify it under the terms of the GNU LESSER
+#    GENERAL PUBLIC LICENSE (LGPL v3), Version 3.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU LESSER GENERAL PUBLIC LICENSE (LGPL v3) for more details.
+#
+#    You should have received a copy of the GNU LESSER GENERAL PUBLIC LICENSE
+#    (LGPL v3) along with this program.
+#    If not, see <http://www.gnu.org/licenses/>.
+#
+#############################################################################
+
+from odoo.tests.common import TransactionCase
+
+
+class TestPartnerLedger(TransactionCase):
+
+    def setUp(self):
+        super(TestPartnerLedger, self).setUp()
+        self.report = self.env['report.base_accounting_kit.report_partnerledger']
+        self.data = {'form': {
+            'used_context': {'state': 'posted', 'strict_range': False},
+            'reconciled': True,
+            'target_move': 'posted',
+            'result_selection': 'customer',
+            'amount_currency': False,
+        }}
+
+    def _create_invoices(self, count):
+        partners = self.env['res.partner'].create([
+            {'name': 'Ledger Partner %s' % index} for index in range(count)])
+        for partner in partners:
+            invoice = self.env['account.move'].create({
+                'type': 'out_invoice',
+                'partner_id': partner.id,
+                'invoice_line_ids': [(0, 0, {'name': 'Line',
+                                             'price_unit': 100.0,
+                                             'quantity': 1})],
+            })
+            invoice.post()
+        return partners
+
+    def _render_count(self):
+        """ Return the number of queries needed to compute the ledger and
+        read every value the template reads from it."""
+        self.env.invalidate_all()
+        count = self.env.cr.sql_log_count
+        values = self.report._get_report_values(None, dict(self.data))
+        for partner in values['docs']:
+            values['sum_partner'](values['data'], partner, 'debit')
+            values['sum_partner'](values['data'], partner, 'credit')
+            values['sum_partner'](values['data'], partner, 'debit - credit')
+            values['lines'](values['data'], partner)
+        return self.env.cr.sql_log_count - count
+
+    def test_partner_ledger(self):
+        partners = self._create_invoices(2)
+        values = self.report._get_report_values(None, dict(self.data))
+        self.assertTrue(set(partners.ids) <= set(values['doc_ids']))
+        partner = partners[0]
+        lines = values['lines'](values['data'], partner)
+        self.assertEqual(len(lines), 1)
+        self.assertEqual(lines[0]['progress'], lines[0]['debit'])
+        self.assertEqual(values['sum_partner'](values['data'], partner,
+                                               'debit - credit'),
+                         lines[0]['debit'] - lines[0]['credit'])
+
+    def test_query_count(self):
+        """ Benchmark: the ledger of many partners costs the same number of
+        queries as the ledger of a few."""
+        self._create_invoices(3)
+        few = self._render_count()
+        self._create_invoices(30)
+        many = self._render_count()
+        self.assertEqual(few, many)
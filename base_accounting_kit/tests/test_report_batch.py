@@ -0,0 +1,173 @@
+# -*- coding: utf-8 -*-
+#############################################################################
+#
+#    Cybrosys Technologies Pvt. Ltd.
+#
+#    Copyright (C) 2019-TODAY Cybrosys Technologies(<https://www.cybrosys.com>)
+#    Author: Cybrosys Techno Solutions(<https://www.cybrosys.com>)
+#
+#    You can modify it under the terms of the GNU LESSER
+#    GENERAL PUBLIC LICENSE (LGPL v3), Version 3.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU LESSER GENERAL PUBLIC LICENSE (LGPL v3) for more details.
+#
+#    You should have received a copy of the GNU LESSER GENERAL PUBLIC LICENSE
+#    (LGPL v3) along with this program.
+#    If not, see <http://www.gnu.org/licenses/>.
+#
+#############################################################################
+
+import base64
+import io
+import threading
+import zipfile
+from datetime import timedelta
+from unittest.mock import patch
+
+from odoo import fields
+from odoo.tests.common import TransactionCase
+
+from ..models.account_report_batch import AccountReportBatchLine
+
+
+class TestReportBatch(TransactionCase):
+
+    def test_render_batch(self):
+        batch = self.env['account.report.batch'].create({
+            'name': 'Test Pack',
+            'company_ids': [(6, 0, self.env.company.ids)],
+            'aged_balance': False,
+        })
+        batch._prepare_lines()
+        self.assertEqual(sorted(batch.line_ids.mapped('report')),
+                         ['general_ledger', 'trial_balance'])
+        self.assertEqual(batch.progress, 0.0)
+        # the cron renders the lines in separate cursors, which do not see
+        # the uncommitted test data: render them in the test transaction
+        for line in batch.line_ids:
+            line._render()
+            self.assertEqual(line.state, 'done', line.error)
+        self.assertEqual(batch.progress, 100.0)
+
+        batch._build_archive()
+        archive = zipfile.ZipFile(io.BytesIO(
+            base64.b64decode(batch.attachment_id.datas)))
+        names = archive.namelist()
+        self.assertIn('%s - General Ledger.xlsx' % self.env.company.name,
+                      names)
+        self.assertEqual(len(names), 2)
+
+        # a failed line is rendered again by the next run
+        batch.line_ids[0].state = 'failed'
+        batch._prepare_lines()
+        self.assertEqual(len(batch.line_ids), 2)
+        self.assertEqual(batch.line_ids[0].state, 'pending')
+
+    def _archive_names(self, batch):
+        return sorted(zipfile.ZipFile(io.BytesIO(
+            base64.b64decode(batch.attachment_id.datas))).namelist())
+
+    def test_run_batch(self):
+        self.env['ir.config_parameter'].sudo().set_param(
+            'base_accounting_kit.report_batch_workers', 2)
+        batch = self.env['account.report.batch'].create({
+            'name': 'Test Pack',
+            'company_ids': [(6, 0, self.env.company.ids)],
+            'aged_balance': False,
+            'ledger_format': 'xlsx',
+        })
+        batch.action_run()
+        # the cursors of the workers share the test transaction, where
+        # their commits are savepoints
+        self.registry.enter_test_mode(self.env.cr)
+        self.addCleanup(self.registry.leave_test_mode)
+
+        rendered = []
+        render_report = AccountReportBatchLine._render_report
+
+        def failing_render_report(line):
+            rendered.append((line.report, threading.current_thread()))
+            if line.report == 'trial_balance' and len(rendered) <= 2:
+                raise ValueError("Trial balance unavailable")
+            return render_report(line)
+
+        with patch.object(AccountReportBatchLine, '_render_report',
+                          failing_render_report):
+            self.assertTrue(batch._run())
+            self.assertEqual(batch.state, 'failed')
+            self.assertEqual(batch.progress, 100.0)
+            self.assertEqual(
+                {line.report: line.state for line in batch.line_ids},
+                {'general_ledger': 'done', 'trial_balance': 'failed'})
+            self.assertEqual(len(rendered), 2)
+            # rendered by the worker threads
+            self.assertNotIn(threading.current_thread(),
+                             [thread for __, thread in rendered])
+            self.assertEqual(self._archive_names(batch), [
+                '%s - General Ledger.xlsx' % self.env.company.name])
+            ledger = batch.line_ids.filtered(
+                lambda line: line.report == 'general_ledger')
+            attachment = ledger.attachment_id
+
+            # the next run only renders the failed line again
+            batch.action_run()
+            self.assertTrue(batch._run())
+        self.assertEqual(len(rendered), 3)
+        self.assertEqual(rendered[-1][0], 'trial_balance')
+        self.assertEqual(batch.state, 'done')
+        self.assertEqual(ledger.attachment_id, attachment)
+        self.assertEqual(len(self._archive_names(batch)), 2)
+
+    def test_cron_keeps_transaction(self):
+        batch = self.env['account.report.batch'].create({
+            'name': 'Test Pack',
+            'company_ids': [(6, 0, self.env.company.ids)],
+            'trial_balance': False,
+            'aged_balance': False,
+        })
+        batch.action_run()
+        self.registry.enter_test_mode(self.env.cr)
+        self.addCleanup(self.registry.leave_test_mode)
+        # the cron runs inside a transaction of its own, which the batch
+        # must neither commit nor need to see its changes
+        with patch.object(type(self.env.cr), 'commit') as commit:
+            self.env['account.report.batch']._cron_run()
+        commit.assert_not_called()
+        self.assertEqual(batch.state, 'done')
+        # a running batch is not run twice
+        batch.state = 'running'
+        batch.flush()
+        self.assertFalse(batch._run())
+
+    def test_stale_batch(self):
+        self.env['ir.config_parameter'].sudo().set_param(
+            'base_accounting_kit.report_batch_timeout', 60)
+        Batch = self.env['account.report.batch']
+        batch = Batch.create({
+            'name': 'Test Pack',
+            'company_ids': [(6, 0, self.env.company.ids)],
+        })
+        batch.action_run()
+        # claimed by a worker which is still rendering
+        batch.write({'state': 'running', 'attempts': 1,
+                     'date_started': fields.Datetime.now()})
+        Batch._recover_stale()
+        self.assertEqual(batch.state, 'running')
+
+        # left behind by a killed worker: queued again
+        batch.date_started = fields.Datetime.now() - timedelta(hours=1)
+        Batch._recover_stale()
+        self.assertEqual(batch.state, 'queued')
+
+        # and failed once it used all its attempts, the user can run it
+        # again from scratch
+        batch.write({'state': 'running', 'attempts': 2,
+                     'date_started': fields.Datetime.now() - timedelta(
+                         hours=1)})
+        Batch._recover_stale()
+        self.assertEqual(batch.state, 'failed')
+        batch.action_run()
+        self.assertEqual((batch.state, batch.attempts), ('queued', 0))
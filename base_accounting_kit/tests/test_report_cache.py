@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+#############################################################################
+#
+#    Cybrosys Technologies Pvt. Ltd.
+#
+#    Copyright (C) 2019-TODAY Cybrosys Technologies(<https://www.cybrosys.com>)
+#    Author: Cybrosys Techno Solutions(<https://www.cybrosys.com>)
+#
+#    You can modify it under the terms of the GNU LESSER
+#    GENERAL PUBLIC LICENSE (LGPL v3), Version 3.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU LESSER GENERAL PUBLIC LICENSE (LGPL v3) for more details.
+#
+#    You should have received a copy of the GNU LESSER GENERAL PUBLIC LICENSE
+#    (LGPL v3) along with this program.
+#    If not, see <http://www.gnu.org/licenses/>.
+#
+#############################################################################
+
+from odoo import fields
+from odoo.tests.common import TransactionCase
+
+
+class TestReportCache(TransactionCase):
+
+    def setUp(self):
+        super(TestReportCache, self).setUp()
+        self.report = self.env.ref(
+            'base_accounting_kit.action_report_trial_balance')
+        self.Cache = self.env['account.report.cache']
+        self.data = {'ids': [], 'model': 'ir.ui.menu', 'form': {
+            'id': 1,
+            'display_account': 'movement',
+            'date_from': False,
+            'date_to': False,
+            'target_move': 'posted',
+            'used_context': {'state': 'posted', 'strict_range': False},
+        }}
+
+    def _render(self, data):
+        return self.report.with_context(
+            active_model='ir.ui.menu').render_qweb_pdf([], data=data)
+
+    def _entries(self):
+        return self.Cache.search(
+            [('report_name', '=', self.report.report_name)])
+
+    def test_identical_requests(self):
+        content = self._render(self.data)[0]
+        self.assertEqual(len(self._entries()), 1)
+        # another wizard with the same options is served from the cache
+        data = dict(self.data, form=dict(self.data['form'], id=2))
+        self.assertEqual(self._render(data)[0], content)
+        self.assertEqual(len(self._entries()), 1)
+        # other options are rendered again
+        data['form']['display_account'] = 'all'
+        self._render(data)
+        self.assertEqual(len(self._entries()), 2)
+
+    def test_new_posting(self):
+        key = self.Cache._get_key(self.report.report_name, [], self.data)
+        self._render(self.data)
+        journal = self.env['account.journal'].search(
+            [('type', '=', 'general'),
+             ('company_id', '=', self.env.company.id)], limit=1)
+        account = self.env['account.account'].search(
+            [('company_id', '=', self.env.company.id)], limit=1)
+        self.env['account.move'].create({
+            'journal_id': journal.id,
+            'date': fields.Date.today(),
+            'line_ids': [
+                (0, 0, {'account_id': account.id, 'name': 'Test',
+                        'debit': 10.0}),
+                (0, 0, {'account_id': account.id, 'name': 'Test',
+                        'credit': 10.0}),
+            ],
+        }).post()
+        self.assertNotEqual(
+            self.Cache._get_key(self.report.report_name, [], self.data), key)
+        self.assertIsNone(self.Cache._fetch(
+            self.report.report_name,
+            self.Cache._get_key(self.report.report_name, [], self.data)))
+
+    def test_changed_in_transaction(self):
+        self.assertFalse(self.Cache._is_changed())
+        journal = self.env['account.journal'].search(
+            [('type', '=', 'general'),
+             ('company_id', '=', self.env.company.id)], limit=1)
+        move = self.env['account.move'].create({
+            'journal_id': journal.id,
+            'date': fields.Date.today(),
+        })
+        move.unlink()
+        # the deletion is only purged from the cache once committed, and
+        # the uncommitted state is neither served from nor stored in it
+        self.assertTrue(self.Cache._is_changed())
+        self._render(self.data)
+        self.assertFalse(self._entries())
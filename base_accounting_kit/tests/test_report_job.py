@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+#############################################################################
+#
+#    Cybrosys Technologies Pvt. Ltd.
+#
+#    Copyright (C) 2019-TODAY Cybrosys Technologies(<https://www.cybrosys.com>)
+#    Author: Cybrosys Techno Solutions(<https://www.cybrosys.com>)
+#
+#    You can modify it under the terms of the GNU LESSER
+#    GENERAL PUBLIC LICENSE (LGPL v3), Version 3.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU LESSER GENERAL PUBLIC LICENSE (LGPL v3) for more details.
+#
+#    You should have received a copy of the GNU LESSER GENERAL PUBLIC LICENSE
+#    (LGPL v3) along with this program.
+#    If not, see <http://www.gnu.org/licenses/>.
+#
+#############################################################################
+
+from datetime import timedelta
+
+from odoo import fields
+from odoo.tests.common import TransactionCase
+
+
+class TestReportJob(TransactionCase):
+
+    def setUp(self):
+        super(TestReportJob, self).setUp()
+        self.wizard = self.env['account.report.general.ledger'].create({
+            'target_move': 'posted',
+        })
+
+    def test_background_report(self):
+        action = self.wizard.action_print_background()
+        job = self.env['account.report.job'].browse(action['res_id'])
+        self.assertEqual(job.state, 'queued')
+        self.assertEqual(job.method, 'check_report')
+
+        # the same report is queued once
+        action = self.wizard.action_print_background()
+        self.assertEqual(action['res_id'], job.id)
+
+        job._run()
+        self.assertEqual(job.state, 'done', job.error)
+        self.assertTrue(job.attachment_id.datas)
+        self.assertEqual(job.attachment_id.res_id, job.id)
+
+        # a recently finished job is reused, other options are not
+        action = self.wizard.action_print_background()
+        self.assertEqual(action['res_id'], job.id)
+        self.wizard.target_move = 'all'
+        action = self.wizard.action_print_background()
+        self.assertNotEqual(action['res_id'], job.id)
+
+    def test_expired_wizard(self):
+        action = self.wizard.action_print_background()
+        job = self.env['account.report.job'].browse(action['res_id'])
+        self.wizard.unlink()
+        job._run()
+        self.assertEqual(job.state, 'failed')
+        self.assertFalse(job.attachment_id)
+
+    def test_stale_job(self):
+        self.env['ir.config_parameter'].sudo().set_param(
+            'base_accounting_kit.report_job_timeout', 60)
+        Job = self.env['account.report.job']
+        action = self.wizard.action_print_background()
+        job = Job.browse(action['res_id'])
+        self.assertEqual(Job._claim(self.env.cr), (job.id, self.env.uid))
+        job.invalidate_cache()
+        self.assertEqual((job.state, job.attempts), ('running', 1))
+        self.assertIsNone(Job._claim(self.env.cr))
+        # still running: reused
+        action = self.wizard.action_print_background()
+        self.assertEqual(action['res_id'], job.id)
+
+        # left behind by a killed worker: not reused, queued again
+        job.date_started = fields.Datetime.now() - timedelta(hours=1)
+        action = self.wizard.action_print_background()
+        self.assertNotEqual(action['res_id'], job.id)
+        Job.browse(action['res_id']).unlink()
+        Job._recover_stale()
+        self.assertEqual(job.state, 'queued')
+
+        # and failed once it used all its attempts
+        Job._claim(self.env.cr)
+        job.invalidate_cache()
+        job.date_started = fields.Datetime.now() - timedelta(hours=1)
+        Job._recover_stale()
+        self.assertEqual(job.state, 'failed')
+        self.assertEqual(job.attempts, 2)
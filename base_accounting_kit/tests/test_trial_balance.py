@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+#############################################################################
+#
+#    Cybrosys Technologies Pvt. Ltd.
+#
+#    Copyright (C) 2019-TODAY Cybrosys Technologies(<https://www.cybrosys.com>)
+#    Author: Cybrosys Techno Solutions(<https://www.cybrosys.com>)
+#
+#    You can modify it under the terms of the GNU LESSER
+#    GENERAL PUBLIC LICENSE (LGPL v3), Version 3.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU LESSER GENERAL PUBLIC LICENSE (LGPL v3) for more details.
+#
+#    You should have received a copy of the GNU LESSER GENERAL PUBLIC LICENSE
+#    (LGPL v3) along with this program.
+#    If not, see <http://www.gnu.org/licenses/>.
+#
+#############################################################################
+
+from dateutil.relativedelta import relativedelta
+
+from odoo import fields
+from odoo.tests.common import TransactionCase
+
+
+class TestTrialBalance(TransactionCase):
+
+    def setUp(self):
+        super(TestTrialBalance, self).setUp()
+        self.report = self.env['report.base_accounting_kit.report_trial_balance']
+        self.journal = self.env['account.journal'].search(
+            [('type', '=', 'general'),
+             ('company_id', '=', self.env.company.id)], limit=1)
+        self.group = self.env['account.group'].create({
+            'name': 'Trial Group', 'code_prefix': 'TRIAL'})
+        self.subgroup = self.env['account.group'].create({
+            'name': 'Trial Subgroup', 'code_prefix': 'TRIAL1',
+            'parent_id': self.group.id})
+        income = self.env.ref('account.data_account_type_revenue')
+        self.account = self.env['account.account'].create({
+            'name': 'Trial Income', 'code': 'TRIAL10',
+            'user_type_id': income.id, 'group_id': self.subgroup.id})
+        self.account2 = self.env['account.account'].create({
+            'name': 'Trial Income 2', 'code': 'TRIAL20',
+            'user_type_id': income.id, 'group_id': self.group.id})
+        self.counterpart = self.env['account.account'].create({
+            'name': 'Trial Counterpart', 'code': 'TRIAL90',
+            'user_type_id': income.id})
+        self.date_from = fields.Date.today().replace(day=1)
+        self.date_to = self.date_from + relativedelta(day=31)
+        for months, account, amount in ((0, self.account, 10.0),
+                                        (1, self.account, 20.0),
+                                        (2, self.account2, 40.0)):
+            date = self.date_from - relativedelta(months=months)
+            self.env['account.move'].create({
+                'journal_id': self.journal.id,
+                'date': date,
+                'line_ids': [
+                    (0, 0, {'account_id': account.id, 'name': 'Test',
+                            'credit': amount}),
+                    (0, 0, {'account_id': self.counterpart.id,
+                            'name': 'Test', 'debit': amount}),
+                ],
+            }).post()
+
+    def test_comparison_periods(self):
+        wizard = self.env['account.balance.report'].create({
+            'date_from': self.date_from,
+            'date_to': self.date_to,
+            'comparison_count': 2,
+        })
+        periods = wizard._get_periods()
+        self.assertEqual(len(periods), 3)
+        self.assertEqual(periods[-1]['date_to'],
+                         fields.Date.to_string(self.date_to))
+        self.assertEqual(
+            periods[0]['date_to'], fields.Date.to_string(
+                self.date_to - relativedelta(months=2, day=31)))
+
+        accounts = self.account | self.account2 | self.counterpart
+        queries = self.env.cr.sql_log_count
+        result = self.report.with_context(
+            journal_ids=[self.journal.id], state='posted')._get_accounts(
+            accounts, 'movement', periods)
+        # one query for the columns and the rollups, plus the metadata
+        self.assertLessEqual(self.env.cr.sql_log_count - queries, 8)
+        rows = {row['code']: row for row in result}
+        self.assertEqual(
+            [row['code'] for row in result],
+            ['TRIAL', 'TRIAL1', 'TRIAL10', 'TRIAL20', 'TRIAL90'])
+        self.assertEqual(
+            [column['balance'] for column in rows['TRIAL10']['columns']],
+            [0.0, -20.0, -10.0])
+        self.assertEqual(
+            [column['balance'] for column in rows['TRIAL']['columns']],
+            [-40.0, -20.0, -10.0])
+        self.assertEqual(rows['TRIAL1']['level'], 1)
+        self.assertEqual(rows['TRIAL10']['level'], 2)
+        self.assertEqual(rows['TRIAL']['balance'], -10.0)
+        self.assertEqual(rows['TRIAL90']['debit'], 10.0)
@@ -20,10 +20,12 @@
 #    If not, see <http://www.gnu.org/licenses/>.
 #
 #############################################################################
+from . import account_ledger_report
 from . import account_bank_book_wizard
 from . import account_cash_book_wizard
 from . import account_day_book_wizard
 from . import account_lock_date
+from . import account_report_background
 from . import account_report_common_partner
 from . import aged_partner
 from . import asset_depreciation_confirmation_wizard
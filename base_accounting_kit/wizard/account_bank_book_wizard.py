@@ -28,6 +28,8 @@ from odoo.exceptions import UserError
 class BankBookWizard(models.TransientModel):
     _name = 'account.bank.book.report'
     _description = 'Account Bank Book Report'
+    _inherit = 'account.ledger.report.mixin'
+    _ledger_report = 'report.base_accounting_kit.report_bank_book'
 
     company_id = fields.Many2one('res.company', string='Company',
                                  readonly=True,
@@ -106,6 +108,8 @@ class BankBookWizard(models.TransientModel):
         data['form']['used_context'] = dict(used_context,
                                             lang=self.env.context.get(
                                                 'lang') or 'en_US')
+        if self.env.context.get('ledger_export'):
+            return self._export_report(data, self.env.context['ledger_export'])
         return self.env.ref(
             'base_accounting_kit.action_report_bank_book').report_action(self,
                                                                          data=data)
@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+#############################################################################
+#
+#    Cybrosys Technologies Pvt. Ltd.
+#
+#    Copyright (C) 2019-TODAY Cybrosys Technologies(<https://www.cybrosys.com>)
+#    Author: Cybrosys Techno Solutions(<https://www.cybrosys.com>)
+#
+#    You can modify it under the terms of the GNU LESSER
+#    GENERAL PUBLIC LICENSE (LGPL v3), Version 3.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU LESSER GENERAL PUBLIC LICENSE (LGPL v3) for more details.
+#
+#    You should have received a copy of the GNU LESSER GENERAL PUBLIC LICENSE
+#    (LGPL v3) along with this program.
+#    If not, see <http://www.gnu.org/licenses/>.
+#
+#############################################################################
+
+import json
+
+from odoo import fields, models
+
+
+class AccountLedgerReportMixin(models.AbstractModel):
+    """ Common part of the wizards of the ledger reports computed by
+    ``account.ledger.engine``: their "Export XLSX" and "Export CSV" buttons
+    call ``check_report`` with the ``ledger_export`` context key, and the
+    ledger is then streamed by the engine instead of printed."""
+    _name = 'account.ledger.report.mixin'
+    _description = 'Ledger Report Wizard'
+
+    # model of the report, inheriting from account.ledger.engine
+    _ledger_report = None
+
+    export_data = fields.Text(string='Export Data', readonly=True)
+
+    def _get_ledger_report(self):
+        return self.env[self._ledger_report]
+
+    def _export_report(self, data, file_format):
+        """ Download the ledger as a streamed CSV or XLSX file instead of a
+        PDF, for periods too large to be rendered."""
+        self.export_data = json.dumps(data, default=str)
+        return {
+            'type': 'ir.actions.act_url',
+            'url': '/base_accounting_kit/ledger/export/%s/%s?file_format=%s'
+                   % (self._name, self.id, file_format),
+            'target': 'self',
+        }
@@ -38,12 +38,17 @@ class AccountAgedTrialBalance(models.TransientModel):
     period_length = fields.Integer(string='Period Length (days)',
                                    required=True, default=30)
     date_from = fields.Date(default=lambda *a: time.strftime('%Y-%m-%d'))
+    use_snapshot = fields.Boolean(
+        string='Use Month End Snapshot',
+        help='Read the aged balances of a past month end from its stored '
+             'snapshot instead of recomputing them. Only the posted '
+             'entries are snapshotted.')
 
     def _print_report(self, data):
 
         res = {}
         data = self.pre_print_report(data)
-        data['form'].update(self.read(['period_length'])[0])
+        data['form'].update(self.read(['period_length', 'use_snapshot'])[0])
         period_length = data['form']['period_length']
         if period_length <= 0:
             raise UserError(_('You must set a period length greater than 0.'))
@@ -28,6 +28,7 @@ class FinancialReport(models.TransientModel):
     _name = "financial.report"
     _inherit = "account.common.report"
     _description = "Financial Reports"
+    _background_report_method = 'view_report_pdf'
 
     view_format = fields.Selection([
         ('vertical', 'Vertical'),
@@ -125,14 +126,15 @@ class FinancialReport(models.TransientModel):
 
     def _compute_account_balance(self, accounts):
         """ compute the balance, debit
-        and credit for the provided accounts
+        and credit for the provided accounts, in the currency of the
+        current company
         """
         mapping = {
             'balance':
-                "COALESCE(SUM(debit),0) - COALESCE(SUM(credit), 0)"
-                " as balance",
-            'debit': "COALESCE(SUM(debit), 0) as debit",
-            'credit': "COALESCE(SUM(credit), 0) as credit",
+                "COALESCE(SUM(debit * rate.factor),0) - "
+                "COALESCE(SUM(credit * rate.factor), 0) as balance",
+            'debit': "COALESCE(SUM(debit * rate.factor), 0) as debit",
+            'credit': "COALESCE(SUM(credit * rate.factor), 0) as credit",
         }
 
         res = {}
@@ -148,67 +150,102 @@ class FinancialReport(models.TransientModel):
             if where_clause.strip():
                 wheres.append(where_clause.strip())
             filters = " AND ".join(wheres)
+            companies = self.env['res.company'].browse(
+                self.env.context.get('company_ids') or self.env.companies.ids)
+            rate_table, rate_params = self.env[
+                'account.currency.converter']._get_rate_table(
+                companies.mapped('currency_id'),
+                self.env.company.currency_id,
+                self.env.context.get('date_to'))
             request = ("SELECT account_id as id, " +
                        ', '.join(mapping.values()) +
-                       " FROM " + tables +
-                       " WHERE account_id IN %s " +
+                       " FROM " + tables + ", " + rate_table +
+                       " WHERE rate.currency_id = "
+                       "account_move_line.company_currency_id"
+                       " AND account_id IN %s " +
                        filters +
                        " GROUP BY account_id")
-            params = (tuple(accounts._ids),) + tuple(where_params)
+            params = tuple(rate_params) + (tuple(accounts._ids),) + \
+                tuple(where_params)
             self.env.cr.execute(request, params)
             for row in self.env.cr.dictfetchall():
                 res[row['id']] = row
         return res
 
-    def _compute_report_balance(self, reports):
+    def _get_report_accounts(self, reports):
+        """returns a dictionary with key=the ID of an 'accounts' or
+        'account_type' record reachable from the given reports and
+        value=the accounts whose balances make it up. The account types
+        of the whole tree are resolved with a single search."""
+        nodes = self.env['account.financial.report']
+        todo = reports
+        while todo:
+            nodes |= todo
+            todo = (todo.filtered(lambda r: r.type == 'sum').mapped(
+                'children_ids') | todo.filtered(
+                lambda r: r.type == 'account_report').mapped(
+                'account_report_id')) - nodes
+        account_types = nodes.filtered(
+            lambda r: r.type == 'account_type').mapped('account_type_ids')
+        type_accounts = self.env['account.account']
+        if account_types:
+            type_accounts = type_accounts.search([
+                ('user_type_id', 'in', account_types.ids)
+            ])
+        res = {}
+        for report in nodes:
+            if report.type == 'accounts':
+                res[report.id] = report.account_ids
+            elif report.type == 'account_type':
+                res[report.id] = type_accounts.filtered(
+                    lambda a: a.user_type_id in report.account_type_ids)
+        return res
+
+    def _compute_report_balance(self, reports, report_accounts=None):
         """returns a dictionary with key=the ID of a record and
          value=the credit, debit and balance amount
-        computed for this record. If the record is of type :
-        'accounts' : it's the sum of the linked accounts
-        'account_type' : it's the sum of leaf accounts with
+        computed for this record. If the record is of type :
+        'accounts' : it's the sum of the linked accounts
+        'account_type' : it's the sum of leaf accounts with
          such an account_type
-        'account_report' : it's the amount of the related report
-        'sum' : it's the sum of the children of this record
-         (aka a 'view' record)"""
-        res = {}
+        'account_report' : it's the amount of the related report
+        'sum' : it's the sum of the children of this record
+         (aka a 'view' record)
+        The leaf account balances are fetched with one query and summed
+        up the tree, each record being computed once. ``report_accounts``
+        is the result of :meth:`_get_report_accounts`, so that comparison
+        columns can share it."""
+        if report_accounts is None:
+            report_accounts = self._get_report_accounts(reports)
+        balances = self._compute_account_balance(
+            self.env['account.account'].union(*report_accounts.values()))
         fields = ['credit', 'debit', 'balance']
-        for report in reports:
+        res = {}
+
+        def _compute(report):
             if report.id in res:
-                continue
-            res[report.id] = dict((fn, 0.0) for fn in fields)
-            if report.type == 'accounts':
-                # it's the sum of the linked accounts
-                res[report.id]['account'] = self._compute_account_balance(
-                    report.account_ids
-                )
-                for value in \
-                        res[report.id]['account'].values():
-                    for field in fields:
-                        res[report.id][field] += value.get(field)
-            elif report.type == 'account_type':
-                # it's the sum the leaf accounts
-                #  with such an account type
-                accounts = self.env['account.account'].search([
-                    ('user_type_id', 'in', report.account_type_ids.ids)
-                ])
-                res[report.id]['account'] = self._compute_account_balance(
-                    accounts)
-                for value in res[report.id]['account'].values():
-                    for field in fields:
-                        res[report.id][field] += value.get(field)
+                return res[report.id]
+            values = res[report.id] = dict((fn, 0.0) for fn in fields)
+            children = []
+            if report.id in report_accounts:
+                # it's the sum of the linked accounts, or of the leaf
+                # accounts with such an account type
+                values['account'] = dict(
+                    (account.id, dict(balances[account.id]))
+                    for account in report_accounts[report.id])
+                children = values['account'].values()
             elif report.type == 'account_report' and report.account_report_id:
                 # it's the amount of the linked report
-                res2 = self._compute_report_balance(report.account_report_id)
-                for key, value in res2.items():
-                    for field in fields:
-                        res[report.id][field] += value[field]
+                children = [_compute(report.account_report_id)]
             elif report.type == 'sum':
                 # it's the sum of the children of this account.report
-                res2 = self._compute_report_balance(report.children_ids)
-                for key, value in res2.items():
-                    for field in fields:
-                        res[report.id][field] += value[field]
-        return res
+                children = [_compute(child) for child in report.children_ids]
+            for value in children:
+                for field in fields:
+                    values[field] += value[field]
+            return values
+
+        return dict((report.id, _compute(report)) for report in reports)
 
     def get_account_lines(self, data):
         lines = []
@@ -216,10 +253,13 @@ class FinancialReport(models.TransientModel):
             ('id', '=', data['account_report_id'][0])
         ])
         child_reports = account_report._get_children_by_order()
+        report_accounts = self._get_report_accounts(child_reports)
         res = self.with_context(
-            data.get('used_context'))._compute_report_balance(child_reports)
+            data.get('used_context'))._compute_report_balance(
+            child_reports, report_accounts)
         if data['enable_filter']:
-            comparison_res = self._compute_report_balance(child_reports)
+            comparison_res = self._compute_report_balance(
+                child_reports, report_accounts)
             for report_id, value in comparison_res.items():
                 res[report_id]['comp_bal'] = value['balance']
                 report_acc = res[report_id].get('account')
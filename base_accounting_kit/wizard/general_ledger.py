@@ -25,9 +25,11 @@ from odoo.exceptions import UserError
 
 
 class AccountReportGeneralLedger(models.TransientModel):
-    _inherit = "account.common.account.report"
+    _inherit = ["account.common.account.report",
+                "account.ledger.report.mixin"]
     _name = "account.report.general.ledger"
     _description = "General Ledger Report"
+    _ledger_report = 'report.base_accounting_kit.report_general_ledger'
 
     initial_balance = fields.Boolean(string='Include Initial Balances',
                                      help='If you selected date, this field '
@@ -49,6 +51,8 @@ class AccountReportGeneralLedger(models.TransientModel):
         if data['form'].get('initial_balance') and not data['form'].get(
                 'date_from'):
             raise UserError(_("You must define a Start Date"))
+        if self.env.context.get('ledger_export'):
+            return self._export_report(data, self.env.context['ledger_export'])
         records = self.env[data['model']].browse(data.get('ids', []))
         return self.env.ref(
             'base_accounting_kit.action_report_general_ledger').with_context(
@@ -20,7 +20,12 @@
 #
 #############################################################################
 
-from odoo import fields, models
+from dateutil.relativedelta import relativedelta
+
+from odoo import fields, models, _
+from odoo.exceptions import UserError
+
+COMPARISON_MONTHS = {'month': 1, 'quarter': 3, 'year': 12}
 
 
 class AccountBalanceReport(models.TransientModel):
@@ -33,10 +38,46 @@ class AccountBalanceReport(models.TransientModel):
                                    'account_id', 'journal_id',
                                    string='Journals', required=True,
                                    default=[])
+    comparison_count = fields.Integer(
+        string='Comparison Periods', default=0,
+        help='Number of earlier periods printed as additional columns, '
+             'each one shifted from the selected dates by the comparison '
+             'interval.')
+    comparison_interval = fields.Selection(
+        [('month', 'Month'), ('quarter', 'Quarter'), ('year', 'Year')],
+        string='Comparison Interval', required=True, default='month')
+
+    def _get_periods(self):
+        """ Return the report columns, the oldest period first and the
+        selected dates last."""
+        self.ensure_one()
+        if not self.comparison_count:
+            return []
+        if not self.date_from or not self.date_to:
+            raise UserError(_("You must define a Start Date and an End Date "
+                              "to compare periods."))
+        # a period ending on a month end compares with whole months
+        month_end = self.date_to + relativedelta(day=31) == self.date_to
+        periods = []
+        for index in range(self.comparison_count, -1, -1):
+            shift = relativedelta(
+                months=COMPARISON_MONTHS[self.comparison_interval] * index)
+            date_from = self.date_from - shift
+            date_to = self.date_to - shift
+            if month_end:
+                date_to += relativedelta(day=31)
+            periods.append({
+                'name': '%s - %s' % (date_from, date_to),
+                'date_from': fields.Date.to_string(date_from),
+                'date_to': fields.Date.to_string(date_to),
+            })
+        return periods
 
     def _print_report(self, data):
         data = self.pre_print_report(data)
+        data['form']['periods'] = self._get_periods()
         records = self.env[data['model']].browse(data.get('ids', []))
         return self.env.ref(
-            'base_accounting_kit.action_report_trial_balance').report_action(
+            'base_accounting_kit.action_report_trial_balance').with_context(
+            landscape=bool(data['form']['periods'])).report_action(
             records, data=data)